@@ -0,0 +1,195 @@
+"""
+Admission control: keeps read latency bounded during write storms.
+
+- Writes (POST/PUT/PATCH/DELETE) pass a per-client token bucket (429 when
+  empty) and a global one (503 when empty). Paths in
+  `client_exempt_paths` skip the per-client bucket: app-open heartbeats
+  and "prayed for this" taps from a congregation behind one NAT share an
+  address. These may be route templates, e.g.
+  `/api/prayer-requests/{request_id}/pray`, where `{...}` matches one
+  path segment.
+- The client is the address seen by the outermost trusted proxy, the
+  `trusted_proxies`-th X-Forwarded-For hop from the right. Hops further
+  left are set by the caller and would let it pick a fresh bucket per
+  request.
+- Reads and writes have separate concurrency limits, so a burst of writes
+  can only use its own share of the Mongo connection pool. A request that
+  cannot get a slot within `queue_timeout` gets a 503.
+
+Rejections carry `Retry-After` and are decided before the app runs, so
+they cost almost nothing.
+"""
+
+import asyncio
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Pattern, Tuple
+
+from starlette.responses import JSONResponse
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> Tuple[bool, float]:
+        """Take one token. Returns (admitted, seconds until a token is available)."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True, 0.0
+        return False, (1 - self.tokens) / self.rate if self.rate > 0 else 60.0
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        client_rate: float = 2.0,
+        client_burst: float = 20.0,
+        global_rate: float = 200.0,
+        global_burst: float = 400.0,
+        read_concurrency: int = 64,
+        write_concurrency: int = 16,
+        queue_timeout: float = 0.1,
+        max_clients: int = 10000,
+    ):
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.read_slots = asyncio.Semaphore(read_concurrency)
+        self.write_slots = asyncio.Semaphore(write_concurrency)
+        self.queue_timeout = queue_timeout
+        self.max_clients = max_clients
+        self._clients: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.rejected = {"client_rate": 0, "global_rate": 0, "read_busy": 0, "write_busy": 0}
+
+    def _client_bucket(self, client: str) -> TokenBucket:
+        bucket = self._clients.get(client)
+        if bucket is None:
+            bucket = self._clients[client] = TokenBucket(self.client_rate, self.client_burst)
+            if len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+        else:
+            self._clients.move_to_end(client)
+        return bucket
+
+    def check_rate(self, client: Optional[str]) -> Optional[Tuple[int, float, str]]:
+        """Return (status, retry_after, reason) for a rejected write, else None.
+        `client=None` only applies the global bucket."""
+        if client is not None:
+            admitted, retry_after = self._client_bucket(client).try_acquire()
+            if not admitted:
+                self.rejected["client_rate"] += 1
+                return 429, retry_after, "Too many requests"
+        admitted, retry_after = self.global_bucket.try_acquire()
+        if not admitted:
+            self.rejected["global_rate"] += 1
+            return 503, retry_after, "Server busy"
+        return None
+
+    async def acquire_slot(self, is_write: bool) -> Optional[asyncio.Semaphore]:
+        slots = self.write_slots if is_write else self.read_slots
+        try:
+            await asyncio.wait_for(slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected["write_busy" if is_write else "read_busy"] += 1
+            return None
+        return slots
+
+    def stats(self) -> dict:
+        return {
+            "tracked_clients": len(self._clients),
+            "read_slots_free": self.read_slots._value,
+            "write_slots_free": self.write_slots._value,
+            **{f"rejected_{reason}": count for reason, count in self.rejected.items()},
+        }
+
+
+def client_key(scope, trusted_proxies: int = 1) -> str:
+    """The caller's address as recorded by the outermost of `trusted_proxies`
+    proxies. Each proxy appends the address it received the request from,
+    so only the right-most `trusted_proxies` hops can be trusted."""
+    if trusted_proxies > 0:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                hops = [hop.strip() for hop in value.decode("latin-1").split(",") if hop.strip()]
+                if hops:
+                    return hops[-min(trusted_proxies, len(hops))]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def path_pattern(paths: Iterable[str]) -> Optional[Pattern]:
+    """One regex matching any of `paths` exactly, with `{name}` segments
+    matching any single path segment. None when `paths` is empty."""
+    alternatives = [
+        "/".join("[^/]+" if re.fullmatch(r"\{\w+\}", part) else re.escape(part) for part in path.strip().split("/"))
+        for path in paths
+        if path.strip()
+    ]
+    return re.compile("|".join(alternatives)) if alternatives else None
+
+
+class AdmissionMiddleware:
+    def __init__(
+        self,
+        app,
+        controller: AdmissionController,
+        exempt_paths: Iterable[str] = (),
+        client_exempt_paths: Iterable[str] = (),
+        trusted_proxies: int = 1,
+    ):
+        self.app = app
+        self.controller = controller
+        self.exempt_paths = tuple(exempt_paths)
+        self.client_exempt_paths = path_pattern(client_exempt_paths)
+        self.trusted_proxies = trusted_proxies
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or not scope["path"].startswith("/api")
+            or scope["path"].startswith(self.exempt_paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        is_write = scope["method"] in WRITE_METHODS
+        if is_write:
+            if self.client_exempt_paths and self.client_exempt_paths.fullmatch(scope["path"]):
+                client = None
+            else:
+                client = client_key(scope, self.trusted_proxies)
+            rejection = self.controller.check_rate(client)
+            if rejection:
+                status, retry_after, detail = rejection
+                await self._reject(scope, receive, send, status, retry_after, detail)
+                return
+
+        slots = await self.controller.acquire_slot(is_write)
+        if slots is None:
+            await self._reject(scope, receive, send, 503, 1.0, "Server busy")
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            slots.release()
+
+    @staticmethod
+    async def _reject(scope, receive, send, status: int, retry_after: float, detail: str):
+        response = JSONResponse(
+            {"detail": detail}, status_code=status, headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,88 @@
+"""
+Payload size and latency of list endpoints with sparse fieldsets and compression.
+
+Requests go through server.app in-process (httpx ASGI transport), with the
+same fixtures as load.py. Each list is fetched with all fields and with a
+mobile list view's `fields=`, each as identity, gzip and brotli. Transfer
+sizes are taken from Content-Length. Latency includes compression, but
+not the network time it saves.
+
+    python backend/benchmarks/bench_payloads.py --memory [--fixtures 1000] [--repeat 50]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from load import load_fixtures  # noqa: E402
+
+LISTS = [
+    ("/api/events", "title,date,time"),
+    ("/api/prayer-requests", "name,message,prayed_count"),
+    ("/api/reading-plan", "day,book,chapters"),
+]
+ENCODINGS = ["identity", "gzip", "br"]
+
+
+async def measure(client: httpx.AsyncClient, url: str, encoding: str, repeat: int):
+    sizes, timings = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await client.get(url, headers={"Accept-Encoding": encoding})
+        timings.append(time.perf_counter() - started)
+        sizes.append(int(response.headers.get("content-length", len(response.content))))
+        served = response.headers.get("content-encoding", "identity")
+    return served, statistics.median(sizes), statistics.median(timings) * 1000
+
+
+async def run(args) -> None:
+    os.environ["DB_NAME"] = f"bench_{uuid.uuid4().hex[:8]}"
+    os.environ.setdefault("ADMISSION_ENABLED", "false")
+    import server
+
+    if args.memory:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("--memory needs mongomock-motor: pip install mongomock-motor")
+        server.create_mongo_client = AsyncMongoMockClient
+
+    transport = httpx.ASGITransport(app=server.app)
+    print(f"{'list':<60} {'encoding':>9} {'bytes':>9} {'vs full':>8} {'p50 ms':>8}")
+    try:
+        async with server.app.router.lifespan_context(server.app):
+            await load_fixtures(server.db, args.fixtures, random.Random(1))
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                for path, fields in LISTS:
+                    baseline = None
+                    for url in (path, f"{path}?fields={fields}"):
+                        for encoding in ENCODINGS:
+                            served, size, p50 = await measure(client, url, encoding, args.repeat)
+                            baseline = baseline or size
+                            print(f"{url:<60} {served:>9} {size:>9.0f} {size / baseline:>8.0%} {p50:>8.2f}")
+    finally:
+        if not args.memory and server.client is not None:
+            await server.client.drop_database(os.environ["DB_NAME"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fixtures", type=int, default=1000, help="documents preloaded per collection")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--memory", action="store_true", help="use mongomock-motor instead of MONGO_URL")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Micro-benchmark: current list serialization vs. the SERIALIZATION_MODE fast paths.
+
+Runs the route-level work without Mongo: documents as they come back from
+the driver go through model construction, FastAPI's response_model
+validation and encoding, and the final response render.
+
+    python backend/benchmarks/bench_serialization.py [--docs 300] [--repeat 200]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from serialization import DocumentSerializer  # noqa: E402
+from server import Event  # noqa: E402
+
+
+def make_docs(count: int) -> List[dict]:
+    now = datetime.utcnow().replace(microsecond=0)
+    return [
+        {
+            "_id": ObjectId(),
+            "id": str(uuid.uuid4()),
+            "title": f"Culto {i}",
+            "description": "Culto de adoração e palavra " * 3,
+            "date": now + timedelta(days=i),
+            "time": "19:30",
+            "location": "Igreja PIB do Cordeiro",
+            "type": "culto",
+        }
+        for i in range(count)
+    ]
+
+
+def project(docs: List[dict], projection: dict) -> List[dict]:
+    # what Mongo returns for the projection used by the fast path
+    return [{key: value for key, value in doc.items() if projection.get(key)} for doc in docs]
+
+
+async def current_path(docs, field):
+    items = [Event(**doc) for doc in docs]
+    content = await serialize_response(field=field, response_content=items)
+    return JSONResponse(content).body
+
+
+async def fast_path(docs, serializer):
+    return serializer.respond(serializer.load(docs)).body
+
+
+def timed(label, fn, repeat):
+    async def run():
+        await fn()  # warm-up
+        start = time.perf_counter()
+        for _ in range(repeat):
+            await fn()
+        return (time.perf_counter() - start) / repeat
+
+    per_call = asyncio.run(run())
+    print(f"{label:<12} {per_call * 1000:8.3f} ms/call")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    docs = make_docs(args.docs)
+    field = create_response_field(name="Response_get_events", type_=List[Event])
+    validate = DocumentSerializer(Event, "validate")
+    trusted = DocumentSerializer(Event, "trusted")
+    projected = project(docs, validate.projection)
+
+    print(f"{args.docs} documents, {args.repeat} repetitions")
+    baseline = timed("pydantic", lambda: current_path(docs, field), args.repeat)
+    for label, serializer in (("validate", validate), ("trusted", trusted)):
+        elapsed = timed(label, lambda: fast_path(projected, serializer), args.repeat)
+        print(f"{'':<12} {baseline / elapsed:8.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
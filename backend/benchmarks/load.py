@@ -0,0 +1,334 @@
+"""
+Load-test harness: runs concurrent traffic scenarios against server.app in-process.
+
+Requests go through httpx's ASGI transport, so there is no network or
+uvicorn in the measurement, only the app, the driver and the database.
+Use a disposable local mongod (the default; a fresh database is created
+and dropped) or `--memory` for mongomock-motor, which needs
+`pip install mongomock-motor` and only measures the app side.
+
+    python backend/benchmarks/load.py --save baseline.json
+    python backend/benchmarks/load.py --compare baseline.json --max-regression 0.2
+
+Reports p50/p95/p99 latency and throughput per route and scenario; exits
+with status 1 when --compare finds a p95 regression above the threshold.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Request = (route label, method, url, json body or None)
+Request = Tuple[str, str, str, Optional[object]]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, route: str, seconds: float, ok: bool) -> None:
+        self.samples.setdefault(route, []).append(seconds)
+        if not ok:
+            self.errors[route] = self.errors.get(route, 0) + 1
+
+    def summary(self, wall_seconds: float) -> Dict[str, dict]:
+        result = {}
+        for route, values in sorted(self.samples.items()):
+            values = sorted(values)
+            result[route] = {
+                "requests": len(values),
+                "errors": self.errors.get(route, 0),
+                "p50_ms": percentile(values, 0.50) * 1000,
+                "p95_ms": percentile(values, 0.95) * 1000,
+                "p99_ms": percentile(values, 0.99) * 1000,
+                "throughput_rps": len(values) / wall_seconds if wall_seconds else 0.0,
+            }
+        return result
+
+
+async def run_requests(client: httpx.AsyncClient, requests: List[Request], concurrency: int) -> Dict[str, dict]:
+    recorder = Recorder()
+    queue = iter(requests)
+
+    async def worker():
+        for route, method, url, body in queue:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            recorder.record(route, time.perf_counter() - started, ok)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return recorder.summary(time.perf_counter() - started)
+
+
+# Scenarios -------------------------------------------------------------------
+
+def home_burst(total: int, context: dict) -> List[Request]:
+    """The whole congregation opening the app after a service."""
+    screen = [
+        ("GET /api/home", "GET", "/api/home", None),
+        ("GET /api/events/next", "GET", "/api/events/next", None),
+        ("GET /api/reading-plan/today", "GET", "/api/reading-plan/today", None),
+        ("GET /api/church-info", "GET", "/api/church-info", None),
+        ("POST /api/status", "POST", "/api/status", {"client_name": "bench"}),
+    ]
+    return [screen[i % len(screen)] for i in range(total)]
+
+
+def prayer_submission(total: int, context: dict) -> List[Request]:
+    return [
+        ("POST /api/prayer-requests", "POST", "/api/prayer-requests",
+         {"name": f"Membro {i}", "message": "Peço oração pela minha família", "is_public": i % 4 != 0})
+        for i in range(total)
+    ]
+
+
+MODERATION_BULK_SIZE = 50
+
+
+def moderation_ids_needed(total: int) -> int:
+    bulks = (total + 9) // 10
+    reads = (total + 4) // 10
+    return bulks * MODERATION_BULK_SIZE + total - bulks - reads
+
+
+def admin_moderation(total: int, context: dict) -> List[Request]:
+    """Moderators clearing the queue: single approves, a bulk approve every
+    tenth request and the odd look at the wall. Each approve targets a
+    request no other one touches (see moderation_fixtures)."""
+    pending = iter(context["moderation_ids"])
+    requests: List[Request] = []
+    for i in range(total):
+        if i % 10 == 0:
+            batch = [next(pending) for _ in range(MODERATION_BULK_SIZE)]
+            requests.append(("PATCH /api/prayer-requests/bulk/approve", "PATCH", "/api/prayer-requests/bulk/approve", batch))
+        elif i % 10 == 5:
+            requests.append(("GET /api/prayer-requests", "GET", "/api/prayer-requests", None))
+        else:
+            request_id = next(pending)
+            requests.append(("PATCH /api/prayer-requests/{id}/approve", "PATCH", f"/api/prayer-requests/{request_id}/approve", None))
+    return requests
+
+
+def prayer_taps(total: int, context: dict) -> List[Request]:
+    """"Orei por isso" taps concentrated on a few popular requests."""
+    popular = context["approved_prayer_ids"][:5]
+    return [
+        ("POST /api/prayer-requests/{id}/pray", "POST", f"/api/prayer-requests/{popular[i % len(popular)]}/pray", None)
+        for i in range(total)
+    ]
+
+
+def large_list_reads(total: int, context: dict) -> List[Request]:
+    lists = [
+        ("GET /api/events", "GET", "/api/events", None),
+        ("GET /api/prayer-requests", "GET", "/api/prayer-requests", None),
+        ("GET /api/reading-plan", "GET", "/api/reading-plan", None),
+        ("GET /api/status?limit=1000", "GET", "/api/status?limit=1000", None),
+        ("GET /api/sync", "GET", "/api/sync", None),
+    ]
+    return [lists[i % len(lists)] for i in range(total)]
+
+
+SCENARIOS: Dict[str, Callable[[int, dict], List[Request]]] = {
+    "home_burst": home_burst,
+    "prayer_submission": prayer_submission,
+    "admin_moderation": admin_moderation,
+    "prayer_taps": prayer_taps,
+    "large_list_reads": large_list_reads,
+}
+
+
+# Fixtures --------------------------------------------------------------------
+
+def prayer_request(i: int, now: datetime, approved: bool) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "name": f"Membro {i}",
+        "message": "Peço oração pela saúde da minha família",
+        "is_public": True,
+        "is_approved": approved,
+        "is_answered": False,
+        "testimony": None,
+        "created_at": now - timedelta(minutes=i),
+        "updated_at": now,
+    }
+
+
+async def load_fixtures(db, size: int, rng: random.Random) -> dict:
+    now = datetime.utcnow()
+    events = [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"Evento {i}",
+            "description": "Programação especial da igreja",
+            "date": now + timedelta(hours=rng.randint(-24 * 30, 24 * 90)),
+            "time": "19:30",
+            "location": "Igreja PIB do Cordeiro",
+            "type": rng.choice(["culto", "reuniao", "evento"]),
+            "updated_at": now,
+        }
+        for i in range(size)
+    ]
+    prayers = [prayer_request(i, now, approved=i % 2 == 0) for i in range(size)]
+    statuses = [
+        {"id": str(uuid.uuid4()), "client_name": "bench", "timestamp": now - timedelta(seconds=i)}
+        for i in range(size)
+    ]
+    await db.events.insert_many(events)
+    await db.prayer_requests.insert_many(prayers)
+    await db.status_checks.insert_many(statuses)
+    return {"approved_prayer_ids": [p["id"] for p in prayers if p["is_approved"]]}
+
+
+async def moderation_fixtures(db, total: int) -> dict:
+    """A fresh pending request for every approve in the scenario, so that
+    approves stay writes instead of running out after the first few."""
+    now = datetime.utcnow()
+    pending = [prayer_request(i, now, approved=False) for i in range(moderation_ids_needed(total))]
+    await db.prayer_requests.insert_many(pending)
+    return {"moderation_ids": [p["id"] for p in pending]}
+
+
+# Scenarios that need their own documents, created just before they run
+SCENARIO_FIXTURES = {
+    "admin_moderation": moderation_fixtures,
+}
+
+
+# Reporting -------------------------------------------------------------------
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: Dict[str, Dict[str, dict]]) -> None:
+    header = f"{'scenario / route':<58} {'reqs':>6} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rps':>8}"
+    print(header)
+    print("-" * len(header))
+    for scenario, routes in results.items():
+        print(scenario)
+        for route, row in routes.items():
+            print(
+                f"  {route:<56} {row['requests']:>6} {row['errors']:>4} {row['p50_ms']:>8.2f} "
+                f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['throughput_rps']:>8.1f}"
+            )
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> bool:
+    """Print p95 deltas against `baseline`; return False if any route regressed
+    by more than `max_regression` (0.2 = 20%)."""
+    ok = True
+    print(f"\nComparison against {baseline.get('revision') or 'baseline'} ({baseline.get('created_at')})")
+    for scenario, routes in results.items():
+        for route, row in routes.items():
+            before = baseline["results"].get(scenario, {}).get(route)
+            if not before or not before["p95_ms"]:
+                continue
+            change = row["p95_ms"] / before["p95_ms"] - 1
+            flag = ""
+            if change > max_regression:
+                flag, ok = "  REGRESSION", False
+            print(f"  {scenario}/{route}: p95 {before['p95_ms']:.2f} -> {row['p95_ms']:.2f} ms ({change:+.0%}){flag}")
+    return ok
+
+
+# Main ------------------------------------------------------------------------
+
+async def run(args) -> dict:
+    os.environ["DB_NAME"] = f"bench_{uuid.uuid4().hex[:8]}"
+    # every simulated user shares one client address, so per-client limits
+    # would reject most writes; measure the app itself unless asked
+    os.environ.setdefault("ADMISSION_ENABLED", "true" if args.admission else "false")
+    import server
+
+    if args.memory:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("--memory needs mongomock-motor: pip install mongomock-motor")
+        server.create_mongo_client = AsyncMongoMockClient
+
+    rng = random.Random(args.seed)
+    results = {}
+    transport = httpx.ASGITransport(app=server.app)
+    try:
+        async with server.app.router.lifespan_context(server.app):
+            context = await load_fixtures(server.db, args.fixtures, rng)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                for name in args.scenarios:
+                    if name in SCENARIO_FIXTURES:
+                        context.update(await SCENARIO_FIXTURES[name](server.db, args.requests))
+                    requests = SCENARIOS[name](args.requests, context)
+                    rng.shuffle(requests)
+                    results[name] = await run_requests(client, requests, args.concurrency)
+    finally:
+        if not args.memory and server.client is not None:
+            await server.client.drop_database(os.environ["DB_NAME"])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=1000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--fixtures", type=int, default=1000, help="documents preloaded per collection")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--memory", action="store_true", help="use mongomock-motor instead of MONGO_URL")
+    parser.add_argument("--admission", action="store_true", help="keep admission control enabled")
+    parser.add_argument("--save", type=Path, help="write results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="compare p95 against a saved baseline")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_results(results)
+
+    document = {
+        "revision": git_revision(),
+        "created_at": datetime.utcnow().isoformat(),
+        "config": {key: vars(args)[key] for key in ("requests", "concurrency", "fixtures", "seed", "memory")},
+        "results": results,
+    }
+    if args.save:
+        args.save.write_text(json.dumps(document, indent=2))
+        print(f"\nSaved baseline to {args.save}")
+    if args.compare:
+        if not compare(results, json.loads(args.compare.read_text()), args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+In-process pub/sub broker for the live prayer wall (Server-Sent Events).
+
+Each subscriber owns a bounded deque; when a slow client falls behind,
+the oldest undelivered events are dropped so publishing never blocks.
+Published events also go into a short replay log, so a reconnecting
+client that sends `Last-Event-ID` gets whatever it missed, as long as it
+is still in the log. Event ids are "<milliseconds>-<worker>-<sequence>"
+strings that sort by time across processes; with several workers,
+relay.WorkerRelay delivers each worker's events to the others, so a
+client can resume on any of them.
+
+Idle subscribers cost one deque and one waiting Event; there is no
+per-connection task or timer besides the SSE keep-alive.
+"""
+
+import asyncio
+import itertools
+import json
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Optional, Set, Tuple
+
+Message = Tuple[str, str, str]  # (event id, event type, JSON data)
+
+
+class Subscriber:
+    __slots__ = ("queue", "ready", "dropped")
+
+    def __init__(self, maxsize: int):
+        self.queue: Deque[Message] = deque(maxlen=maxsize)
+        self.ready = asyncio.Event()
+        self.dropped = 0
+
+    def push(self, message: Message) -> None:
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append(message)
+        self.ready.set()
+
+
+class Broker:
+    def __init__(self, queue_size: int = 100, replay_size: int = 1000, worker: Optional[str] = None):
+        self.queue_size = queue_size
+        self.replay_size = replay_size
+        self.worker = worker or uuid.uuid4().hex[:8]
+        self._subscribers: Set[Subscriber] = set()
+        self._replay: Deque[Message] = deque(maxlen=replay_size)
+        self._sequence = itertools.count()
+        self.published = 0
+
+    def next_id(self) -> str:
+        return f"{int(time.time() * 1000):013d}-{self.worker}-{next(self._sequence) % 1000000:06d}"
+
+    def publish(self, event: str, data: Any) -> Message:
+        message = (self.next_id(), event, json.dumps(data, ensure_ascii=False, default=str))
+        self.published += 1
+        self.deliver(message)
+        return message
+
+    def deliver(self, message: Message) -> None:
+        """Fan out a message, published here or relayed from another worker."""
+        self._replay.append(message)
+        for subscriber in self._subscribers:
+            subscriber.push(message)
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Subscriber:
+        subscriber = Subscriber(self.queue_size)
+        if last_event_id is not None:
+            for message in self._replay:
+                if message[0] > last_event_id:
+                    subscriber.push(message)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    async def stream(
+        self, last_event_id: Optional[str] = None, keepalive: float = 15.0
+    ) -> AsyncIterator[str]:
+        """Yield SSE-formatted frames until the client disconnects."""
+        subscriber = self.subscribe(last_event_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.ready.wait(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    # comment frame keeps proxies from closing idle connections
+                    yield ": keep-alive\n\n"
+                    continue
+                subscriber.ready.clear()
+                while subscriber.queue:
+                    event_id, event, data = subscriber.queue.popleft()
+                    yield f"id: {event_id}\nevent: {event}\ndata: {data}\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped": sum(subscriber.dropped for subscriber in self._subscribers),
+            "replay_size": len(self._replay),
+        }
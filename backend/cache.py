@@ -0,0 +1,97 @@
+"""
+In-process TTL cache with LRU eviction for hot read endpoints.
+
+Keys are tuples whose first element is a namespace (e.g. "events");
+write paths call `invalidate(namespace)` to drop every entry for it.
+Concurrent misses on the same key share a single loader call.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 256, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self._generations: Dict[Hashable, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    async def get_or_load(self, key: Tuple, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # the caller running the load was cancelled (e.g. a timeout); load again
+                return await self.get_or_load(key, loader)
+
+        self.misses += 1
+        namespace = key[0]
+        generation = self._generations.get(namespace, 0)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # mark retrieved so an unobserved failure is not logged as a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            # an invalidation during the load means the value may already be stale
+            if self._generations.get(namespace, 0) == generation:
+                self._store(key, value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    def _store(self, key: Tuple, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, namespace: Hashable) -> None:
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+        for key in [key for key in self._entries if key[0] == namespace]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        for namespace in {key[0] for key in self._entries}:
+            self.invalidate(namespace)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+        }
@@ -0,0 +1,119 @@
+"""
+Response compression negotiated per request from `Accept-Encoding`.
+
+Brotli is used when the optional `brotli` package is installed and the
+client accepts it; otherwise gzip. Bodies smaller than
+`CompressionSettings.minimum_size` are sent as is, since compression costs more than it saves there.
+Streamed responses (SSE, exports) are passed through untouched:
+compressing them would buffer events, and their size is not known up
+front. A strong ETag becomes weak on a compressed response, so it still
+matches If-None-Match (see http_cache.etag_matches) without claiming
+byte equality with the uncompressed body. Pre-serialized `CachedBody`
+payloads keep their compressed variants, so hot cached responses are
+compressed once per cache fill rather than once per request. The
+middleware and `http_cache.conditional_response` take the same settings.
+"""
+
+import gzip
+from typing import NamedTuple, Optional
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+def accepted_encodings(header: str) -> dict:
+    """{"gzip": 1.0, "br": 0.5, ...} from an Accept-Encoding header."""
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    accepted = accepted_encodings(header)
+    wildcard = accepted.get("*", 0.0)
+    for encoding in (["br"] if brotli else []) + ["gzip"]:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+class CompressionSettings(NamedTuple):
+    minimum_size: int = 1024
+    gzip_level: int = 6
+    brotli_quality: int = 4
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+
+DEFAULT_SETTINGS = CompressionSettings()
+
+
+class CompressionMiddleware:
+    def __init__(self, app, settings: CompressionSettings = DEFAULT_SETTINGS):
+        self.app = app
+        self.settings = settings
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"accept-encoding"), "")
+        encoding = choose_encoding(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            # first body message: decide once, based on the whole body
+            body = message.get("body", b"")
+            names = {name.lower() for name, _ in start_message["headers"]}
+            if message.get("more_body") or len(body) < self.settings.minimum_size or b"content-encoding" in names:
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = self.settings.compress(body, encoding)
+            headers = []
+            for name, value in start_message["headers"]:
+                if name.lower() == b"content-length":
+                    continue
+                if name.lower() == b"etag" and not value.startswith(b"W/"):
+                    value = b"W/" + value
+                headers.append((name, value))
+            headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", b"Accept-Encoding"),
+            ]
+            passthrough = True
+            await send({**start_message, "headers": headers})
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,97 @@
+"""
+Buffered counters: increments are summed in memory and written with one
+unordered `$inc` bulk_write per flush instead of one update per event.
+
+Keys are values of `key_field` (e.g. a day or a document id); each key
+holds any number of counter fields. `pending()` exposes the unflushed
+delta, so a reader can add it to the persisted value. `timestamp_field`
+is set to the flush time on every updated document, and `on_flush` is
+called with the flushed keys, e.g. to invalidate cached reads. As with
+`WriteBuffer`, increments still in memory are lost if the process dies;
+`close()` flushes them on a clean shutdown.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+
+class CounterBuffer:
+    def __init__(
+        self,
+        collection,
+        key_field: str = "id",
+        upsert: bool = False,
+        flush_interval: float = 1.0,
+        timestamp_field: Optional[str] = None,
+        on_flush: Optional[Callable[[List[str]], None]] = None,
+    ):
+        self.collection = collection
+        self.key_field = key_field
+        self.upsert = upsert
+        self.flush_interval = flush_interval
+        self.timestamp_field = timestamp_field
+        self.on_flush = on_flush
+        self._pending: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        # the batch being written; still counted by pending() until it lands
+        self._flushing: Dict[str, Dict[str, int]] = {}
+        self._loop = PeriodicTask(self.flush, flush_interval, "Counter flush")
+        self.flushes = 0
+        self.written = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        self._loop.start()
+
+    def incr(self, key: str, field: str, amount: int = 1) -> None:
+        self._pending[key][field] += amount
+
+    def pending(self, key: str, field: str) -> int:
+        return sum(batch[key].get(field, 0) for batch in (self._pending, self._flushing) if key in batch)
+
+    async def flush(self) -> None:
+        # only the loop flushes until close(), which waits for the loop to end
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, defaultdict(lambda: defaultdict(int))
+        self._flushing = batch
+        update = {}
+        if self.timestamp_field:
+            update["$set"] = {self.timestamp_field: datetime.utcnow()}
+        operations = [
+            UpdateOne({self.key_field: key}, {**update, "$inc": dict(fields)}, upsert=self.upsert)
+            for key, fields in batch.items()
+        ]
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+        except Exception:
+            # an $inc may or may not have applied; retrying could count twice
+            self.failed += len(operations)
+            logger.exception("Failed to flush %d counter updates to %s", len(operations), self.collection.name)
+        else:
+            self.written += len(operations)
+            if self.on_flush:
+                self.on_flush(list(batch))
+        finally:
+            self._flushing = {}
+        self.flushes += 1
+
+    async def close(self) -> None:
+        await self._loop.stop()
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending_keys": len(self._pending),
+            "flush_interval": self.flush_interval,
+            "flushes": self.flushes,
+            "written": self.written,
+            "failed": self.failed,
+        }
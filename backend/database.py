@@ -0,0 +1,38 @@
+"""
+Motor client factory.
+
+The client is created inside the app lifespan rather than at import time:
+gunicorn/uvicorn workers fork after importing the app, and a client
+created before the fork would share its pool sockets and monitor threads
+across processes. Pool size and timeouts come from the environment, so
+they can be tuned per deployment (a pool per worker: total connections
+to Mongo are roughly workers x MONGO_MAX_POOL_SIZE).
+"""
+
+import os
+from typing import Callable, Iterable, Mapping
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+# environment variable -> pymongo option
+CLIENT_OPTIONS = {
+    'MONGO_MAX_POOL_SIZE': 'maxPoolSize',
+    'MONGO_MIN_POOL_SIZE': 'minPoolSize',
+    'MONGO_MAX_IDLE_TIME_MS': 'maxIdleTimeMS',
+    'MONGO_WAIT_QUEUE_TIMEOUT_MS': 'waitQueueTimeoutMS',
+    'MONGO_SERVER_SELECTION_TIMEOUT_MS': 'serverSelectionTimeoutMS',
+    'MONGO_CONNECT_TIMEOUT_MS': 'connectTimeoutMS',
+    'MONGO_SOCKET_TIMEOUT_MS': 'socketTimeoutMS',
+}
+
+
+def client_options(environ: Mapping[str, str] = os.environ) -> dict:
+    """Pymongo client options set in the environment; unset ones keep the
+    driver defaults."""
+    return {option: int(environ[name]) for name, option in CLIENT_OPTIONS.items() if environ.get(name)}
+
+
+def client_factory(url: str, event_listeners: Iterable = (), **options) -> Callable[[], AsyncIOMotorClient]:
+    def create() -> AsyncIOMotorClient:
+        return AsyncIOMotorClient(url, event_listeners=list(event_listeners), **client_options(), **options)
+    return create
@@ -0,0 +1,81 @@
+"""
+Streaming exports as NDJSON or CSV.
+
+Documents are read from an async Motor cursor in `batch_size` batches and
+encoded into chunks of about `chunk_rows` rows. Only one batch and one
+chunk are held at a time, so memory stays flat however many rows are
+exported.
+"""
+
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator, List, NamedTuple, Optional
+
+import orjson
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+class ExportSource(NamedTuple):
+    collection: str
+    date_field: str
+    fields: List[str]
+
+
+def export_query(source: ExportSource, start: Optional[datetime], end: Optional[datetime]) -> dict:
+    if not (start or end):
+        return {}
+    return {source.date_field: {key: value for key, value in (("$gte", start), ("$lt", end)) if value}}
+
+
+def _csv_value(value) -> object:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def export_rows(
+    collection, source: ExportSource, query: dict, fmt: str, batch_size: int = 1000, chunk_rows: int = 500
+) -> AsyncIterator[bytes]:
+    projection = {"_id": 0, **{field: 1 for field in source.fields}}
+    cursor = (
+        collection.find(query, projection)
+        .sort([(source.date_field, 1), ("id", 1)])
+        .batch_size(batch_size)
+    )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    chunk: List[bytes] = []
+    rows = 0
+    if fmt == "csv":
+        writer.writerow(source.fields)
+    try:
+        async for doc in cursor:
+            if fmt == "csv":
+                writer.writerow([_csv_value(doc.get(field)) for field in source.fields])
+            else:
+                chunk.append(orjson.dumps(doc))
+                chunk.append(b"\n")
+            rows += 1
+            if rows % chunk_rows == 0:
+                yield _take(buffer, chunk)
+        tail = _take(buffer, chunk)
+        if tail:
+            yield tail
+    finally:
+        # also runs when the client disconnects mid-export
+        await cursor.close()
+
+
+def _take(buffer: io.StringIO, chunk: List[bytes]) -> bytes:
+    data = buffer.getvalue().encode() + b"".join(chunk)
+    buffer.seek(0)
+    buffer.truncate()
+    chunk.clear()
+    return data
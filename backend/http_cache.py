@@ -0,0 +1,86 @@
+"""
+Conditional GET support: pre-serialized JSON bodies with a strong ETag.
+
+A `CachedBody` is built once per content version (at startup for static
+payloads, on cache fill for slow-changing ones), so requests only compare
+the ETag and copy bytes instead of re-encoding the payload. Compressed
+variants are kept alongside the body and served directly when the
+client accepts them.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from compression import DEFAULT_SETTINGS, CompressionSettings, choose_encoding
+
+
+class CachedBody:
+    __slots__ = ("body", "etag", "_encoded")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+        self._encoded: Dict[Tuple[str, CompressionSettings], bytes] = {}
+
+    def encoded(self, encoding: str, settings: CompressionSettings = DEFAULT_SETTINGS) -> bytes:
+        key = (encoding, settings)
+        body = self._encoded.get(key)
+        if body is None:
+            body = self._encoded[key] = settings.compress(self.body, encoding)
+        return body
+
+    @classmethod
+    def from_content(cls, content: Any) -> "CachedBody":
+        # same encoding as FastAPI's JSONResponse
+        body = json.dumps(
+            jsonable_encoder(content),
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        return cls(body)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        # If-None-Match uses the weak comparison function
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def conditional_response(
+    request: Request,
+    payload: CachedBody,
+    max_age: int,
+    headers: Optional[Dict[str, str]] = None,
+    compression: CompressionSettings = DEFAULT_SETTINGS,
+) -> Response:
+    response_headers = {
+        "ETag": payload.etag,
+        "Cache-Control": f"public, max-age={max_age}",
+    }
+    if headers:
+        response_headers.update(headers)
+    if etag_matches(request, payload.etag):
+        return Response(status_code=304, headers=response_headers)
+    accept = request.headers.get("accept-encoding")
+    encoding = choose_encoding(accept) if accept and len(payload.body) >= compression.minimum_size else None
+    if encoding is None:
+        return Response(content=payload.body, media_type="application/json", headers=response_headers)
+    # the compression middleware leaves responses that are already encoded alone
+    response_headers.update({"ETag": "W/" + payload.etag, "Content-Encoding": encoding, "Vary": "Accept-Encoding"})
+    return Response(content=payload.encoded(encoding, compression), media_type="application/json", headers=response_headers)
@@ -0,0 +1,161 @@
+"""
+MongoDB index declarations for every query issued by the API.
+
+`ensure_indexes` is called on startup and is safe to run on every boot:
+`create_indexes` is a no-op for indexes that already exist with the same
+definition. `audit_indexes` reports declared indexes that are missing and
+existing indexes that have never been used since the server started.
+"""
+
+import logging
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "events": [
+        # approve/answer style lookups and upserts by id
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # get_events / get_next_event: {"date": {"$gte": now}} sorted by date,
+        # with id as the pagination tie-breaker
+        IndexModel([("date", ASCENDING), ("id", ASCENDING)], name="date_id"),
+        # sync_changes: updated_at range scan with id tie-breaker
+        IndexModel([("updated_at", ASCENDING), ("id", ASCENDING)], name="updated_at_id"),
+        # search: Portuguese stemming; v3 text indexes ignore accents and case
+        IndexModel(
+            [("title", TEXT), ("description", TEXT)],
+            name="search_text",
+            weights={"title": 3, "description": 1},
+            default_language="portuguese",
+        ),
+    ],
+    "event_rules": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("updated_at", ASCENDING), ("id", ASCENDING)], name="updated_at_id"),
+        IndexModel(
+            [("title", TEXT), ("description", TEXT)],
+            name="search_text",
+            weights={"title": 3, "description": 1},
+            default_language="portuguese",
+        ),
+    ],
+    "prayer_requests": [
+        # approve_prayer_request / answer_prayer_request: {"id": request_id}
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # get_prayer_requests: equality on is_public/is_approved, sort on created_at, id
+        IndexModel(
+            [
+                ("is_public", ASCENDING),
+                ("is_approved", ASCENDING),
+                ("created_at", DESCENDING),
+                ("id", DESCENDING),
+            ],
+            name="public_feed",
+        ),
+        # sync_changes over the public feed
+        IndexModel(
+            [("is_public", ASCENDING), ("is_approved", ASCENDING), ("updated_at", ASCENDING), ("id", ASCENDING)],
+            name="public_updated_at_id",
+        ),
+        # archive_prayer_requests (oldest first) and export_data (created_at, id)
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_at_id"),
+        # search: equality prefix keeps the scan inside the public wall
+        IndexModel(
+            [("is_public", ASCENDING), ("is_approved", ASCENDING), ("message", TEXT), ("testimony", TEXT)],
+            name="public_search_text",
+            default_language="portuguese",
+        ),
+    ],
+    "prayer_requests_archive": [
+        # archiving upserts by id
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+    "reading_plan": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # seeding upserts by day
+        IndexModel([("day", ASCENDING)], name="day_unique", unique=True),
+        # also serves ReadingPlanIndex's newest-updated_at version check
+        IndexModel([("updated_at", ASCENDING), ("id", ASCENDING)], name="updated_at_id"),
+    ],
+    "daily_stats": [
+        # get_stats: range over day; the counter upserts match on day
+        IndexModel([("day", ASCENDING)], name="day_unique", unique=True),
+    ],
+    "devices": [
+        # register_device upserts by token; reminders read every token
+        IndexModel([("token", ASCENDING)], name="token_unique", unique=True),
+    ],
+    "reminder_log": [
+        # dedup entries are keyed by _id; keep them for a month
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=30 * 24 * 3600),
+    ],
+    "worker_relay": [
+        # polled by _id range; a day covers any reconnect worth replaying
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=24 * 3600),
+    ],
+    "status_checks": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # get_status_checks pages by (timestamp, id)
+        IndexModel([("timestamp", ASCENDING), ("id", ASCENDING)], name="timestamp_id"),
+        # the timestamp TTL index is created by retention.ensure_status_ttl,
+        # since its expiry is configurable
+    ],
+    "tombstones": [
+        IndexModel([("updated_at", ASCENDING), ("id", ASCENDING)], name="updated_at_id"),
+    ],
+}
+
+
+async def ensure_indexes(db) -> None:
+    """Create every declared index. Failures are logged, never raised, so a
+    conflicting legacy index or duplicate data does not block startup.
+    Indexes are created one at a time: a failing index does not take the
+    rest of its collection's indexes down with it."""
+    for collection, models in INDEXES.items():
+        for model in models:
+            try:
+                await db[collection].create_indexes([model])
+            except OperationFailure as exc:
+                logger.error("Could not create index %s on %s: %s", model.document["name"], collection, exc)
+
+
+async def audit_indexes(db) -> Dict[str, Dict[str, List[str]]]:
+    """Return {collection: {"missing": [...], "unused": [...]}}.
+
+    "unused" lists indexes (other than `_id_`) with zero accesses according to
+    `$indexStats`; the counters reset when mongod restarts.
+    """
+    report = {}
+    for collection, models in INDEXES.items():
+        declared = [model.document["name"] for model in models]
+        existing = await db[collection].index_information()
+        missing = [name for name in declared if name not in existing]
+
+        unused = []
+        try:
+            async for stats in db[collection].aggregate([{"$indexStats": {}}]):
+                if stats["name"] != "_id_" and stats["accesses"]["ops"] == 0:
+                    unused.append(stats["name"])
+        except OperationFailure as exc:
+            logger.warning("$indexStats unavailable for %s: %s", collection, exc)
+
+        report[collection] = {"missing": missing, "unused": sorted(unused)}
+    return report
+
+
+async def log_index_report(db) -> None:
+    # the report is diagnostic only and must never block startup
+    try:
+        report = await audit_indexes(db)
+    except Exception as exc:
+        logger.warning("Could not audit indexes: %s", exc)
+        return
+    for collection, entry in report.items():
+        if entry["missing"]:
+            logger.warning("Missing indexes on %s: %s", collection, ", ".join(entry["missing"]))
+        if entry["unused"]:
+            logger.info("Unused indexes on %s: %s", collection, ", ".join(entry["unused"]))
@@ -0,0 +1,35 @@
+"""
+Expiring lock documents, so that one worker out of several runs a job.
+
+A lock is `{"_id": name, "owner", "expires_at"}`. Acquiring it is a
+single upsert that only matches an expired lock; while another owner
+holds a live one the upsert inserts a duplicate `_id` and fails. The
+expiry frees locks left behind by a crashed worker.
+"""
+
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo.errors import DuplicateKeyError
+
+
+def lock_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+async def acquire_lock(collection, name: str, owner: str, ttl: timedelta, now: datetime) -> bool:
+    try:
+        await collection.update_one(
+            {"_id": name, "expires_at": {"$lt": now}},
+            {"$set": {"owner": owner, "expires_at": now + ttl}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+async def release_lock(collection, name: str, owner: str) -> None:
+    await collection.delete_one({"_id": name, "owner": owner})
@@ -0,0 +1,262 @@
+"""
+Prometheus-format metrics without an external client library.
+
+- `MetricsMiddleware` (ASGI) records per-route latency histograms, status
+  codes and in-flight requests. Routes are labelled by their path template,
+  so path parameters do not create new series.
+- `MongoCommandMetrics` is a pymongo `CommandListener` that records
+  command durations per collection and logs commands slower than a
+  threshold.
+- `EventLoopMonitor` samples event loop lag, which separates a blocked
+  loop (CPU-bound validation/serialization) from slow Mongo round trips.
+
+Pymongo calls listeners from Motor's worker threads, so every metric is
+guarded by a lock.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> ([count per bucket], sum, count)
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, *labels: str, value: float) -> None:
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._values.items())
+        lines = self.header()
+        for labels, (counts, total, count) in items:
+            for bound, bucket_count in zip(self.buckets, counts):
+                bucket_labels = _format_labels(self.labelnames, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {bucket_count}")
+            inf_labels = _format_labels(self.labelnames, labels, 'le="+Inf"')
+            plain_labels = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_bucket{inf_labels} {count}")
+            lines.append(f"{self.name}_sum{plain_labels} {total}")
+            lines.append(f"{self.name}_count{plain_labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[_Metric]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[_Metric]]) -> None:
+        """`collector` is called on every scrape and returns fresh metrics,
+        e.g. gauges filled from another component's stats()."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for metric in collector():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+))
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests by route and status code.", ("method", "route", "status")
+))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served (includes open SSE streams).", ("method",)
+))
+MONGO_COMMAND_DURATION = REGISTRY.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency by command and collection.", ("command", "collection")
+))
+MONGO_COMMANDS = REGISTRY.register(Counter(
+    "mongodb_commands_total", "MongoDB commands by command, collection and outcome.", ("command", "collection", "outcome")
+))
+MONGO_SLOW_COMMANDS = REGISTRY.register(Counter(
+    "mongodb_slow_commands_total", "MongoDB commands slower than the slow query threshold.", ("command", "collection")
+))
+EVENT_LOOP_LAG = REGISTRY.register(Histogram(
+    "event_loop_lag_seconds", "Delay of a scheduled wake-up on the asyncio event loop.", (),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+))
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec(method)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.observe(method, path, value=elapsed)
+            HTTP_REQUESTS.inc(method, path, str(status[0]))
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    def __init__(self, slow_threshold: float = 0.1):
+        self.slow_threshold = slow_threshold
+        self._pending: Dict[Tuple, str] = {}
+
+    @staticmethod
+    def _key(event) -> Tuple:
+        return (event.connection_id, event.request_id)
+
+    def started(self, event):
+        command = event.command
+        collection = command.get("collection") if event.command_name == "getMore" else command.get(event.command_name)
+        self._pending[self._key(event)] = collection if isinstance(collection, str) else ""
+
+    def _finish(self, event, outcome: str):
+        collection = self._pending.pop(self._key(event), "")
+        seconds = event.duration_micros / 1_000_000
+        MONGO_COMMAND_DURATION.observe(event.command_name, collection, value=seconds)
+        MONGO_COMMANDS.inc(event.command_name, collection, outcome)
+        if seconds >= self.slow_threshold:
+            MONGO_SLOW_COMMANDS.inc(event.command_name, collection)
+            logger.warning(
+                "Slow MongoDB command %s on %s took %.1f ms", event.command_name, collection or "-", seconds * 1000
+            )
+
+    def succeeded(self, event):
+        self._finish(event, "success")
+
+    def failed(self, event):
+        self._finish(event, "failure")
+
+
+class EventLoopMonitor:
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self._expected: Optional[float] = None
+        self._loop = PeriodicTask(self._observe, interval, "Event loop monitor")
+
+    def start(self) -> None:
+        self._expected = None
+        self._loop.start()
+
+    async def _observe(self) -> None:
+        # each tick should land `interval` after the previous one
+        now = asyncio.get_running_loop().time()
+        if self._expected is not None:
+            EVENT_LOOP_LAG.observe(value=max(0.0, now - self._expected))
+        self._expected = now + self.interval
+
+    async def stop(self) -> None:
+        await self._loop.stop(cancel=True)
+
+
+def stats_gauges(prefix: str, documentation: str, stats: dict) -> List[Gauge]:
+    """Expose the numeric values of a component's stats() dict as gauges."""
+    gauges = []
+    for key, value in stats.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        gauge = Gauge(f"{prefix}_{key}", f"{documentation} ({key}).")
+        gauge.set(value=value)
+        gauges.append(gauge)
+    return gauges
@@ -0,0 +1,82 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Pages are ordered by a sort field plus `id` as a tie-breaker, and the
+cursor is an opaque, URL-safe token holding the last (value, id) pair
+returned. Each page is a single indexed range scan of `limit + 1`
+documents, so cost per request does not grow with the collection size.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(value: Any, last_id: Optional[str]) -> str:
+    if isinstance(value, datetime):
+        payload = ["d", value.isoformat(), last_id]
+    else:
+        payload = ["v", value, last_id]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Optional[str]]:
+    """Inverse of `encode_cursor`. Values go straight into Mongo filters, so
+    anything but a scalar (e.g. {"$ne": null}) is rejected like any other
+    malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        kind, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+        if kind == "d" and isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        elif kind != "v" or isinstance(value, bool) or not isinstance(value, (int, float, str, type(None))):
+            raise ValueError(cursor)
+        if not isinstance(last_id, (str, type(None))):
+            raise ValueError(cursor)
+        return value, last_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(field: str, direction: int, cursor: str, tiebreak: bool = True) -> dict:
+    value, last_id = decode_cursor(cursor)
+    op = "$gt" if direction == 1 else "$lt"
+    if not tiebreak:
+        return {field: {op: value}}
+    return {"$or": [{field: {op: value}}, {field: value, "id": {op: last_id}}]}
+
+
+async def fetch_page(
+    collection,
+    query: dict,
+    field: str,
+    direction: int,
+    limit: int,
+    after: Optional[str] = None,
+    tiebreak: bool = True,
+    projection: Optional[dict] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """Return (documents, next_cursor). `next_cursor` is None on the last page.
+
+    Pass `tiebreak=False` when `field` is unique on its own, so the sort
+    matches a single-field index.
+    """
+    if after:
+        query = {"$and": [query, keyset_filter(field, direction, after, tiebreak)]}
+    sort = [(field, direction)]
+    if tiebreak:
+        sort.append(("id", direction))
+
+    docs = await collection.find(query, projection).sort(sort).limit(limit + 1).to_list(limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(last[field], last.get("id"))
+    return docs, next_cursor
@@ -0,0 +1,72 @@
+"""
+The background loop shared by the buffers and maintenance jobs.
+
+`PeriodicTask` calls an async `tick` every `interval` seconds, or sooner
+when `wake()` is called (e.g. a write buffer whose batch filled up).
+Errors from `tick` are logged and the loop carries on. `stop()` lets a
+tick in progress finish, so a flush is never interrupted mid-write. Jobs
+that are safe to abandon halfway can pass `cancel=True` instead.
+
+The wake-up event is created in `start()`, on the running loop, so a
+component built at import time binds to no event loop until then.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    def __init__(self, tick: Callable[[], Awaitable[object]], interval: float, name: str, immediate: bool = False):
+        self.tick = tick
+        self.interval = interval
+        self.name = name
+        self.immediate = immediate
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def wake(self) -> None:
+        """Run the next tick now instead of at the end of the interval."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        if self.immediate:
+            await self._tick()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._stopping:
+                return
+            await self._tick()
+
+    async def _tick(self) -> None:
+        try:
+            await self.tick()
+        except Exception:
+            logger.exception("%s failed", self.name)
+
+    async def stop(self, cancel: bool = False) -> None:
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        if cancel:
+            self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
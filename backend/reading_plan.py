@@ -0,0 +1,131 @@
+"""
+The reading plan held in memory, indexed by day of year.
+
+The plan has one entry per day (365 or 366) and only changes when it is
+re-seeded, so handlers read it from a tuple instead of querying Mongo.
+`ReadingPlanIndex` loads the collection once at startup. Every `interval`
+seconds it compares a cheap version (document count, newest `updated_at`)
+and reloads only when that moved. A reload builds a new tuple and swaps
+it in with a single assignment, so a request sees either the old plan or
+the new one, never a mix.
+
+Days are resolved in the church's timezone. In a leap year, a 365-day plan
+repeats its last entry on 31 December; in a common year, a 366-day plan
+never reaches its last entry.
+"""
+
+import logging
+from bisect import bisect_right
+from datetime import date, datetime, timedelta, tzinfo
+from typing import Callable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from pymongo import DESCENDING
+
+from pagination import decode_cursor, encode_cursor
+from periodic import PeriodicTask
+from stats import local_day
+
+logger = logging.getLogger(__name__)
+
+
+class ReadingPlanIndex:
+    def __init__(self, tz: tzinfo, interval: float = 60.0, on_reload: Optional[Callable[[], None]] = None):
+        self.collection = None
+        self.tz = tz
+        self.interval = interval
+        self.on_reload = on_reload
+        # _days[day - 1] is that day's entry; _numbers is the sorted list of days present
+        self._days: Tuple[Optional[dict], ...] = ()
+        self._numbers: Tuple[int, ...] = ()
+        self._version = None
+        self._loop = PeriodicTask(self.refresh, interval, "Reading plan refresh")
+        self.reloads = 0
+        self.checks = 0
+
+    def __len__(self) -> int:
+        return len(self._numbers)
+
+    async def version(self) -> tuple:
+        newest = await self.collection.find_one(
+            {}, {"_id": 0, "updated_at": 1, "id": 1}, sort=[("updated_at", DESCENDING), ("id", DESCENDING)]
+        )
+        count = await self.collection.count_documents({})
+        return count, newest and newest.get("updated_at")
+
+    async def reload(self, version: Optional[tuple] = None) -> None:
+        # the version is read first: a change landing mid-load shows up as a
+        # newer version on the next check and triggers another reload
+        version = version or await self.version()
+        self.load(await self.collection.find({}, {"_id": 0}).to_list(None))
+        self._version = version
+        logger.info("Loaded %d reading plan days", len(self))
+
+    def load(self, docs: List[dict]) -> None:
+        """Replace the plan with `docs` in one step."""
+        days: List[Optional[dict]] = [None] * max((doc["day"] for doc in docs), default=0)
+        for doc in docs:
+            days[doc["day"] - 1] = doc
+        self._days, self._numbers = tuple(days), tuple(sorted({doc["day"] for doc in docs}))
+        self.reloads += 1
+        if self.on_reload:
+            self.on_reload()
+
+    async def refresh(self) -> bool:
+        """Reload if the collection changed since the last load."""
+        self.checks += 1
+        version = await self.version()
+        if version == self._version:
+            return False
+        await self.reload(version)
+        return True
+
+    def for_date(self, day: date) -> Optional[dict]:
+        days = self._days
+        if not days:
+            return None
+        entry = days[min(day.timetuple().tm_yday, len(days)) - 1]
+        if entry is None:
+            return None
+        # the stored date belongs to the year the plan was seeded for
+        return {**entry, "date": datetime(day.year, day.month, day.day)}
+
+    def today(self, now: Optional[datetime] = None) -> Optional[dict]:
+        return self.for_date(local_day(self.tz, now))
+
+    def between(self, start: date, end: date) -> List[dict]:
+        """Entries for each calendar day from `start` to `end`, inclusive."""
+        entries = (self.for_date(start + timedelta(days=i)) for i in range((end - start).days + 1))
+        return [entry for entry in entries if entry is not None]
+
+    def page(self, after: Optional[str], limit: int, year: Optional[int] = None) -> Tuple[List[dict], Optional[str]]:
+        """Keyset page over `day`, with the same cursors as pagination.fetch_page.
+
+        Each entry is dated in `year` (default: the current local year), as
+        `for_date` would date it. A day that year never reaches (366 in a
+        common year) is dated 31 December."""
+        days, numbers = self._days, self._numbers
+        first = 0
+        if after:
+            last_day = decode_cursor(after)[0]
+            if not isinstance(last_day, int):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            first = bisect_right(numbers, last_day)
+        docs = [days[number - 1] for number in numbers[first:first + limit + 1]]
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(docs[-1]["day"], docs[-1].get("id"))
+        year = year or local_day(self.tz).year
+        january_1 = datetime(year, 1, 1)
+        last = datetime(year, 12, 31)
+        return [{**doc, "date": min(january_1 + timedelta(days=doc["day"] - 1), last)} for doc in docs], next_cursor
+
+    def start(self) -> None:
+        self._loop.start()
+
+    async def stop(self) -> None:
+        await self._loop.stop(cancel=True)
+
+    def stats(self) -> dict:
+        return {"days": len(self), "reloads": self.reloads, "checks": self.checks}
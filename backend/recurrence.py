@@ -0,0 +1,86 @@
+"""
+Weekly recurring events stored as rules and expanded on demand.
+
+A rule looks like {"id", "title", "description", "location", "type",
+"weekday" (0 = Monday), "time" ("HH:MM", church local time),
+"interval_weeks", "starts_at", "until"}. Occurrences are generated lazily
+for a requested window, so storage is O(rules) and the next occurrence is
+computed from the rules alone, without touching `db.events`.
+
+Datetimes out are naive UTC, like the rest of the API; aware inputs are
+converted with `naive_utc`. The local wall-clock time of each rule is
+resolved in the church time zone.
+"""
+
+import heapq
+from datetime import datetime, time, timedelta, timezone, tzinfo
+from typing import Iterable, Iterator, List, Optional
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Naive UTC for an aware datetime; naive values are taken as UTC already."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _to_local(value: datetime, tz: tzinfo) -> datetime:
+    return value.replace(tzinfo=timezone.utc).astimezone(tz)
+
+
+def _to_utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def occurrence_id(rule: dict, day) -> str:
+    return f"{rule['id']}:{day:%Y%m%d}"
+
+
+def expand_rule(rule: dict, start: datetime, end: Optional[datetime], tz: tzinfo) -> Iterator[dict]:
+    """Yield occurrences of `rule` with start <= date < end, in date order.
+    `end=None` keeps going until the rule's `until`, if any."""
+    hour, minute = (int(part) for part in rule["time"].split(":"))
+    interval = rule.get("interval_weeks") or 1
+    start, end = naive_utc(start), naive_utc(end)
+    starts_at = naive_utc(rule.get("starts_at"))
+    until = naive_utc(rule.get("until"))
+
+    first_day = _to_local(start, tz).date()
+    anchor = _to_local(starts_at, tz).date() if starts_at else None
+    if anchor and anchor > first_day:
+        first_day = anchor
+    day = first_day + timedelta(days=(rule["weekday"] - first_day.weekday()) % 7)
+    if anchor and interval > 1:
+        # keep every `interval` weeks counted from the week of starts_at
+        anchor_day = anchor + timedelta(days=(rule["weekday"] - anchor.weekday()) % 7)
+        day += timedelta(weeks=-((day - anchor_day).days // 7) % interval)
+
+    while True:
+        occurs_at = _to_utc(datetime.combine(day, time(hour, minute), tzinfo=tz))
+        if (end is not None and occurs_at >= end) or (until is not None and occurs_at > until):
+            return
+        if occurs_at >= start:
+            yield {
+                "id": occurrence_id(rule, day),
+                "title": rule["title"],
+                "description": rule["description"],
+                "date": occurs_at,
+                "time": rule["time"],
+                "location": rule["location"],
+                "type": rule["type"],
+                "rule_id": rule["id"],
+                "updated_at": rule.get("updated_at"),
+            }
+        day += timedelta(weeks=interval)
+
+
+def expand_rules(rules: Iterable[dict], start: datetime, end: Optional[datetime], tz: tzinfo) -> Iterator[dict]:
+    """Occurrences of all rules in one (date, id)-ordered stream."""
+    return heapq.merge(
+        *(expand_rule(rule, start, end, tz) for rule in rules),
+        key=lambda occurrence: (occurrence["date"], occurrence["id"]),
+    )
+
+
+def next_occurrence(rules: List[dict], after: datetime, tz: tzinfo) -> Optional[dict]:
+    return next(expand_rules(rules, after, None, tz), None)
@@ -0,0 +1,131 @@
+"""
+Live-wall events and cache invalidations shared between worker processes.
+
+Each worker has its own SSE broker and read cache. `WorkerRelay` applies
+a message locally right away and also inserts it into the `worker_relay`
+collection. Every `interval` seconds each worker polls that collection
+and applies what the other workers wrote: prayer wall events go to its
+broker, invalidations to its cache. Messages expire through a TTL index
+(see indexes.py).
+
+Message ids come from `Broker.next_id()` and sort by time across workers
+whose clocks agree to within `grace` (NTP is enough). An insert can
+become visible slightly after a later-stamped one from another worker.
+Each poll therefore re-reads the last `grace` seconds and skips the ids
+it has already applied. On startup the worker loads
+the most recent events into its broker's replay log, so a client that
+reconnects to it after another worker dropped the connection can still
+resume with `Last-Event-ID`.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+from pymongo import DESCENDING
+
+from broker import Broker
+from cache import TTLCache
+from periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+RELAY_COLLECTION = "worker_relay"
+
+
+def _id_millis(message_id: str) -> int:
+    return int(message_id.split("-", 1)[0])
+
+
+class WorkerRelay:
+    def __init__(self, broker: Broker, cache: TTLCache, interval: float = 0.5, grace: float = 2.0):
+        self.collection = None
+        self.broker = broker
+        self.cache = cache
+        self.grace_ms = int(grace * 1000)
+        self._loop = PeriodicTask(self.poll, interval, "Worker relay poll", immediate=True)
+        self._writes: Set[asyncio.Task] = set()
+        # ids applied within the grace window, with their timestamps
+        self._applied: Dict[str, int] = {}
+        self._newest_ms: Optional[int] = None
+        self.sent = 0
+        self.received = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        self._loop.start()
+
+    def publish(self, event: str, data) -> None:
+        message_id, event, payload = self.broker.publish(event, data)
+        self._send({"_id": message_id, "kind": "event", "event": event, "data": payload})
+
+    def invalidate(self, *namespaces: str) -> None:
+        for namespace in namespaces:
+            self.cache.invalidate(namespace)
+        self._send({"_id": self.broker.next_id(), "kind": "invalidate", "namespaces": list(namespaces)})
+
+    def _send(self, doc: dict) -> None:
+        if self.collection is None:
+            return
+        doc.update(worker=self.broker.worker, created_at=datetime.utcnow())
+        task = asyncio.get_running_loop().create_task(self._insert(doc))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _insert(self, doc: dict) -> None:
+        try:
+            await self.collection.insert_one(doc)
+            self.sent += 1
+        except Exception:
+            # other workers miss this message; their cache TTL still bounds staleness
+            self.failed += 1
+            logger.exception("Could not relay %s message %s", doc["kind"], doc["_id"])
+
+    async def poll(self) -> None:
+        if self._newest_ms is None:
+            await self._load_replay()
+            return
+        floor = f"{self._newest_ms - self.grace_ms:013d}"
+        cursor = self.collection.find({"_id": {"$gt": floor}, "worker": {"$ne": self.broker.worker}}).sort("_id", 1)
+        async for doc in cursor:
+            if doc["_id"] in self._applied:
+                continue
+            self._apply(doc)
+        horizon = self._newest_ms - self.grace_ms
+        self._applied = {message_id: ms for message_id, ms in self._applied.items() if ms >= horizon}
+
+    async def _load_replay(self) -> None:
+        self._newest_ms = int(time.time() * 1000)
+        recent = await (
+            self.collection.find({"kind": "event"})
+            .sort("_id", DESCENDING)
+            .limit(self.broker.replay_size)
+            .to_list(self.broker.replay_size)
+        )
+        for doc in reversed(recent):
+            self.broker.deliver((doc["_id"], doc["event"], doc["data"]))
+            self._mark(doc["_id"])
+
+    def _apply(self, doc: dict) -> None:
+        if doc["kind"] == "event":
+            self.broker.deliver((doc["_id"], doc["event"], doc["data"]))
+        elif doc["kind"] == "invalidate":
+            for namespace in doc["namespaces"]:
+                self.cache.invalidate(namespace)
+        self.received += 1
+        self._mark(doc["_id"])
+
+    def _mark(self, message_id: str) -> None:
+        ms = _id_millis(message_id)
+        self._applied[message_id] = ms
+        self._newest_ms = max(self._newest_ms, ms)
+
+    async def stop(self) -> None:
+        await self._loop.stop(cancel=True)
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {"sent": self.sent, "received": self.received, "failed": self.failed, "pending_writes": len(self._writes)}
@@ -0,0 +1,260 @@
+"""
+Event reminders pushed to registered devices, off the request path.
+
+`ReminderScheduler` runs in the background. Every `interval` seconds it
+asks `upcoming(start, end)` for events starting within `lead` and sends
+each one an "upcoming" reminder. Handlers call `notify()` to queue an
+immediate reminder, e.g. a "new" one when an event is created. Both
+paths fan out to the `devices` collection in batches of `batch_size`
+tokens, with at most `concurrency` batches in flight. A failed batch is
+retried with exponential backoff.
+
+Each (event, kind) pair is claimed with an insert into `reminder_log`,
+keyed by `_id`, before anything is sent. Several workers or repeated
+scans therefore send a reminder at most once. The transport is pluggable:
+`ExpoTransport` for production, `MemoryTransport` and `FileTransport` for
+local runs and tests.
+"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime, timedelta, timezone, tzinfo
+from pathlib import Path
+from typing import Awaitable, Callable, Deque, List, NamedTuple, Optional, Tuple
+
+import httpx
+import orjson
+from pymongo.errors import DuplicateKeyError
+
+from periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+REMINDER_LOG = "reminder_log"
+
+
+class PushMessage(NamedTuple):
+    token: str
+    title: str
+    body: str
+    data: dict
+
+
+class PushError(Exception):
+    """A batch could not be delivered; it is retried."""
+
+
+class PushTransport(ABC):
+    @abstractmethod
+    async def send(self, messages: List[PushMessage]) -> List[str]:
+        """Deliver `messages`; return tokens the service reports as no longer
+        registered. Raise PushError for failures worth retrying."""
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryTransport(PushTransport):
+    def __init__(self, maxlen: int = 1000):
+        self.sent = deque(maxlen=maxlen)
+
+    async def send(self, messages: List[PushMessage]) -> List[str]:
+        self.sent.extend(messages)
+        return []
+
+
+class FileTransport(PushTransport):
+    """Appends one JSON line per message to `path`."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    async def send(self, messages: List[PushMessage]) -> List[str]:
+        lines = b"".join(orjson.dumps(message._asdict()) + b"\n" for message in messages)
+        await asyncio.to_thread(self._append, lines)
+        return []
+
+    def _append(self, lines: bytes) -> None:
+        with self.path.open("ab") as file:
+            file.write(lines)
+
+
+class ExpoTransport(PushTransport):
+    URL = "https://exp.host/--/api/v2/push/send"
+
+    def __init__(self, access_token: Optional[str] = None, timeout: float = 10.0):
+        headers = {"Authorization": f"Bearer {access_token}"} if access_token else {}
+        self._client = httpx.AsyncClient(timeout=timeout, headers=headers)
+
+    async def send(self, messages: List[PushMessage]) -> List[str]:
+        payload = [{"to": m.token, "title": m.title, "body": m.body, "data": m.data} for m in messages]
+        try:
+            response = await self._client.post(self.URL, json=payload)
+        except httpx.HTTPError as exc:
+            raise PushError(str(exc)) from exc
+        if response.status_code == 429 or response.status_code >= 500:
+            raise PushError(f"Expo push service returned {response.status_code}")
+        response.raise_for_status()
+        tickets = response.json().get("data", [])
+        return [
+            message.token
+            for message, ticket in zip(messages, tickets)
+            if ticket.get("details", {}).get("error") == "DeviceNotRegistered"
+        ]
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def build_transport(name: str, path: Optional[str] = None, access_token: Optional[str] = None) -> PushTransport:
+    if name == "expo":
+        return ExpoTransport(access_token)
+    if name == "file":
+        return FileTransport(Path(path or "reminders.ndjson"))
+    if name == "memory":
+        return MemoryTransport()
+    raise ValueError(f"Unknown reminder transport: {name}")
+
+
+def reminder_message(event: dict, kind: str, tz: tzinfo) -> dict:
+    local = event["date"].replace(tzinfo=timezone.utc).astimezone(tz)
+    when = f"{local:%d/%m} às {local:%H:%M}"
+    if kind == "new":
+        body = f"Novo evento: {when} - {event['location']}"
+    else:
+        body = f"Começa {when} - {event['location']}"
+    return {"title": event["title"], "body": body, "data": {"event_id": event["id"], "kind": kind}}
+
+
+class ReminderScheduler:
+    def __init__(
+        self,
+        transport: PushTransport,
+        upcoming: Callable[[datetime, datetime], Awaitable[List[dict]]],
+        tz: tzinfo,
+        lead: timedelta = timedelta(hours=2),
+        interval: float = 60.0,
+        batch_size: int = 100,
+        concurrency: int = 4,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0,
+    ):
+        self.db = None
+        self.transport = transport
+        self.upcoming = upcoming
+        self.tz = tz
+        self.lead = lead
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._slots = asyncio.Semaphore(concurrency)
+        self._notified: Deque[Tuple[dict, str]] = deque()
+        self._scanner = PeriodicTask(self.scan, interval, "Reminder scan", immediate=True)
+        self._sender = PeriodicTask(self._send_notified, interval, "Reminder notifications")
+        self.reminders = 0
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.unregistered = 0
+
+    def start(self) -> None:
+        self._scanner.start()
+        self._sender.start()
+
+    def notify(self, event: dict, kind: str) -> None:
+        """Queue a reminder for `event` without waiting for it to be sent."""
+        self._notified.append((event, kind))
+        self._sender.wake()
+
+    async def _send_notified(self) -> None:
+        while self._notified:
+            event, kind = self._notified.popleft()
+            try:
+                await self.remind(event, kind)
+            except Exception:
+                logger.exception("Reminder for event %s failed", event.get("id"))
+
+    async def scan(self, now: Optional[datetime] = None) -> int:
+        now = now or datetime.utcnow()
+        sent = 0
+        for event in await self.upcoming(now, now + self.lead):
+            if await self.remind(event, "upcoming", now):
+                sent += 1
+        return sent
+
+    async def remind(self, event: dict, kind: str, now: Optional[datetime] = None) -> bool:
+        """Fan one reminder out to every device; False if it was already claimed."""
+        now = now or datetime.utcnow()
+        try:
+            await self.db[REMINDER_LOG].insert_one({"_id": f"{event['id']}:{kind}", "created_at": now})
+        except DuplicateKeyError:
+            return False
+        self.reminders += 1
+        message = reminder_message(event, kind, self.tz)
+
+        # a slot is taken before each batch is started, so the device cursor
+        # is only read as fast as batches are sent
+        batches = []
+        batch: List[str] = []
+        async for device in self.db.devices.find({}, {"_id": 0, "token": 1}).batch_size(self.batch_size):
+            batch.append(device["token"])
+            if len(batch) == self.batch_size:
+                await self._slots.acquire()
+                batches.append(asyncio.create_task(self._send_batch(batch, message)))
+                batch = []
+        if batch:
+            await self._slots.acquire()
+            batches.append(asyncio.create_task(self._send_batch(batch, message)))
+        await asyncio.gather(*batches)
+        return True
+
+    async def _send_batch(self, tokens: List[str], message: dict) -> None:
+        messages = [PushMessage(token, **message) for token in tokens]
+        try:
+            unregistered = await self._send_with_retries(messages)
+            if unregistered:
+                self.unregistered += len(unregistered)
+                await self.db.devices.delete_many({"token": {"$in": unregistered}})
+        except Exception:
+            self.failed += len(messages)
+            logger.exception("Dropping %d reminders", len(messages))
+        finally:
+            self._slots.release()
+
+    async def _send_with_retries(self, messages: List[PushMessage]) -> List[str]:
+        """At most `max_retries` attempts, with backoff between them; the
+        last PushError is raised."""
+        attempts = max(1, self.max_retries)
+        for attempt in range(1, attempts + 1):
+            try:
+                unregistered = await self.transport.send(messages)
+            except PushError as exc:
+                if attempt == attempts:
+                    raise
+                self.retries += 1
+                logger.warning("Reminder batch failed (attempt %d of %d): %s", attempt, attempts, exc)
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            else:
+                self.sent += len(messages)
+                return unregistered
+
+    async def stop(self) -> None:
+        # reminders are claimed before they are sent, so let sends in flight finish
+        await self._scanner.stop()
+        await self._sender.stop()
+        # reminders queued during the sender's last tick
+        await self._send_notified()
+        await self.transport.close()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": len(self._notified),
+            "reminders": self.reminders,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "unregistered_devices": self.unregistered,
+        }
@@ -0,0 +1,137 @@
+"""
+Retention for the collections that grow with use.
+
+- `status_checks` expires through a TTL index on `timestamp`, so mongod
+  deletes old heartbeats in the background.
+- Prayer requests older than `max_age` that are answered, or untouched
+  since then, are moved to `prayer_requests_archive` in batches by
+  `PrayerArchiver`. Each move is an idempotent upsert into the archive
+  followed by a delete. The delete is conditional on `updated_at`, so a
+  request edited in between stays live and is archived on a later run.
+  Tombstones are recorded so synced clients drop archived requests.
+
+Only one worker archives at a time (see locks.py).
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from pymongo import ASCENDING, DeleteOne, ReplaceOne
+from pymongo.errors import OperationFailure
+
+from locks import acquire_lock, lock_owner, release_lock
+from periodic import PeriodicTask
+from sync import record_tombstones
+
+logger = logging.getLogger(__name__)
+
+STATUS_TTL_INDEX = "timestamp_ttl"
+PRAYER_ARCHIVE = "prayer_requests_archive"
+ARCHIVE_LOCK_ID = "prayer_archive"
+
+
+async def ensure_status_ttl(collection, expire_after: timedelta) -> None:
+    seconds = int(expire_after.total_seconds())
+    try:
+        await collection.create_index(
+            [("timestamp", ASCENDING)], name=STATUS_TTL_INDEX, expireAfterSeconds=seconds
+        )
+    except OperationFailure:
+        # the index exists with another expiry; change it in place
+        try:
+            await collection.database.command(
+                "collMod", collection.name, index={"name": STATUS_TTL_INDEX, "expireAfterSeconds": seconds}
+            )
+        except OperationFailure as exc:
+            logger.error("Could not set the %s TTL on %s: %s", STATUS_TTL_INDEX, collection.name, exc)
+
+
+def archive_filter(cutoff: datetime) -> dict:
+    return {"created_at": {"$lt": cutoff}, "$or": [{"is_answered": True}, {"updated_at": {"$lt": cutoff}}]}
+
+
+async def archive_prayer_requests(db, max_age: timedelta, batch_size: int, now: Optional[datetime] = None) -> List[str]:
+    """Move eligible requests to the archive, oldest first; return the ids
+    removed from `prayer_requests`."""
+    now = now or datetime.utcnow()
+    query = archive_filter(now - max_age)
+    archived: List[str] = []
+    while True:
+        docs = await (
+            db.prayer_requests.find(query, {"_id": 0}).sort("created_at", ASCENDING).limit(batch_size).to_list(batch_size)
+        )
+        if not docs:
+            break
+        ids = [doc["id"] for doc in docs]
+        await db[PRAYER_ARCHIVE].bulk_write(
+            [ReplaceOne({"id": doc["id"]}, {**doc, "archived_at": now}, upsert=True) for doc in docs],
+            ordered=False,
+        )
+        result = await db.prayer_requests.bulk_write(
+            [DeleteOne({"id": doc["id"], "updated_at": doc.get("updated_at")}) for doc in docs],
+            ordered=False,
+        )
+        if result.deleted_count == len(ids):
+            deleted = ids
+        else:
+            remaining = {doc["id"] async for doc in db.prayer_requests.find({"id": {"$in": ids}}, {"_id": 0, "id": 1})}
+            deleted = [doc_id for doc_id in ids if doc_id not in remaining]
+        await record_tombstones(db, "prayer_requests", deleted, now)
+        archived.extend(deleted)
+        if not deleted:
+            break
+    return archived
+
+
+class PrayerArchiver:
+    def __init__(
+        self,
+        max_age: timedelta,
+        batch_size: int = 500,
+        interval: float = 3600.0,
+        on_archived: Optional[Callable[[List[str]], None]] = None,
+    ):
+        self.db = None
+        self.max_age = max_age
+        self.batch_size = batch_size
+        self.interval = interval
+        self.on_archived = on_archived
+        self._loop = PeriodicTask(self.run_once, interval, "Prayer request archiving", immediate=True)
+        self.runs = 0
+        self.archived = 0
+        self.last_run_seconds = 0.0
+
+    def start(self) -> None:
+        self._loop.start()
+
+    async def run_once(self, now: Optional[datetime] = None) -> List[str]:
+        now = now or datetime.utcnow()
+        owner = lock_owner()
+        if not await acquire_lock(self.db.job_locks, ARCHIVE_LOCK_ID, owner, timedelta(seconds=self.interval), now):
+            return []
+        started = time.perf_counter()
+        try:
+            archived = await archive_prayer_requests(self.db, self.max_age, self.batch_size, now)
+        finally:
+            await release_lock(self.db.job_locks, ARCHIVE_LOCK_ID, owner)
+        self.runs += 1
+        self.archived += len(archived)
+        self.last_run_seconds = time.perf_counter() - started
+        if archived:
+            logger.info("Archived %d prayer requests", len(archived))
+            if self.on_archived:
+                self.on_archived(archived)
+        return archived
+
+    async def stop(self) -> None:
+        # each archived batch is idempotent, so a run can be abandoned halfway
+        await self._loop.stop(cancel=True)
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "archived": self.archived,
+            "last_run_seconds": self.last_run_seconds,
+        }
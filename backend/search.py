@@ -0,0 +1,64 @@
+"""
+Keyword search over events, recurring event rules and the public prayer wall.
+
+Each collection has a Mongo text index with Portuguese stemming and stop
+words (see indexes.py). Text indexes (version 3) ignore case and
+diacritics, so "oracao" matches "oração". Each source returns its best
+matches by `textScore`. The results are merged into one ranking ordered
+by (score desc, collection, id), and the cursor holds the last
+(score, "collection:id") pair. Later pages therefore continue the merged
+order without using skip.
+"""
+
+import asyncio
+import heapq
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from pagination import decode_cursor, encode_cursor
+
+
+class SearchSource(NamedTuple):
+    name: str
+    filter: dict
+    projection: dict
+
+
+def _after(source: str, cursor: Optional[str]) -> dict:
+    if cursor is None:
+        return {}
+    score, key = decode_cursor(cursor)
+    last_source, _, last_id = str(key).partition(":")
+    if source > last_source:
+        return {"score": {"$lte": score}}
+    if source < last_source:
+        return {"score": {"$lt": score}}
+    return {"$or": [{"score": {"$lt": score}}, {"score": score, "id": {"$gt": last_id}}]}
+
+
+async def _search_source(db, source: SearchSource, query: str, limit: int, after: Optional[str]) -> List[dict]:
+    pipeline = [
+        {"$match": {"$text": {"$search": query}, **source.filter}},
+        {"$project": {**source.projection, "score": {"$meta": "textScore"}}},
+        {"$match": _after(source.name, after)},
+        {"$sort": {"score": -1, "id": 1}},
+        {"$limit": limit + 1},
+    ]
+    docs = await db[source.name].aggregate(pipeline).to_list(limit + 1)
+    for doc in docs:
+        doc["source"] = source.name
+    return docs
+
+
+async def search(
+    db, sources: Iterable[SearchSource], query: str, limit: int, after: Optional[str] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """Return (documents, next_cursor), best match first. Every document
+    carries its `source` collection name and text `score`."""
+    per_source = await asyncio.gather(*(_search_source(db, source, query, limit, after) for source in sources))
+    merged = list(heapq.merge(*per_source, key=lambda doc: (-doc["score"], doc["source"], doc["id"])))
+    docs = merged[:limit]
+    next_cursor = None
+    if len(merged) > limit:
+        last = docs[-1]
+        next_cursor = encode_cursor(last["score"], f"{last['source']}:{last['id']}")
+    return docs, next_cursor
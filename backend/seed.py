@@ -0,0 +1,255 @@
+"""
+Startup seeding: recurring event rules and the yearly reading plan.
+
+The reading plan is generated deterministically from `BIBLE_BOOKS`, covering
+the whole Bible in 365 or 366 days depending on the year. Everything is
+written as upserts in one `bulk_write` per collection, and a marker
+document records which seed version/year is loaded, so a warm boot costs
+a single `find_one`. When several workers boot together, only the one
+holding the seed lock (an expiring document in `seed_state`) does the work.
+"""
+
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from pymongo import DeleteMany, UpdateOne
+
+from locks import acquire_lock, lock_owner, release_lock
+from sync import record_tombstones
+
+logger = logging.getLogger(__name__)
+
+# Bump when the seeded content changes so existing databases are refreshed
+SEED_VERSION = 3
+SEED_MARKER_ID = "seed"
+SEED_LOCK_ID = "seed_lock"
+SEED_LOCK_TTL = timedelta(minutes=5)
+# the dated sample events seed version 1 inserted, once per title, before any
+# admin-created event could exist
+LEGACY_SAMPLE_EVENTS = [
+    {
+        "title": "Culto de Domingo",
+        "description": "Culto de adoração e palavra",
+        "time": "19:30",
+        "location": "Igreja PIB do Cordeiro",
+        "type": "culto",
+    },
+    {
+        "title": "EBD - Escola Bíblica Dominical",
+        "description": "Estudo bíblico para toda família",
+        "time": "09:00",
+        "location": "Igreja PIB do Cordeiro",
+        "type": "estudo",
+    },
+]
+
+BIBLE_BOOKS: List[Tuple[str, int]] = [
+    ("Gênesis", 50), ("Êxodo", 40), ("Levítico", 27), ("Números", 36), ("Deuteronômio", 34),
+    ("Josué", 24), ("Juízes", 21), ("Rute", 4), ("1 Samuel", 31), ("2 Samuel", 24),
+    ("1 Reis", 22), ("2 Reis", 25), ("1 Crônicas", 29), ("2 Crônicas", 36), ("Esdras", 10),
+    ("Neemias", 13), ("Ester", 10), ("Jó", 42), ("Salmos", 150), ("Provérbios", 31),
+    ("Eclesiastes", 12), ("Cantares", 8), ("Isaías", 66), ("Jeremias", 52), ("Lamentações", 5),
+    ("Ezequiel", 48), ("Daniel", 12), ("Oséias", 14), ("Joel", 3), ("Amós", 9),
+    ("Obadias", 1), ("Jonas", 4), ("Miquéias", 7), ("Naum", 3), ("Habacuque", 3),
+    ("Sofonias", 3), ("Ageu", 2), ("Zacarias", 14), ("Malaquias", 4),
+    ("Mateus", 28), ("Marcos", 16), ("Lucas", 24), ("João", 21), ("Atos", 28),
+    ("Romanos", 16), ("1 Coríntios", 16), ("2 Coríntios", 13), ("Gálatas", 6), ("Efésios", 6),
+    ("Filipenses", 4), ("Colossenses", 4), ("1 Tessalonicenses", 5), ("2 Tessalonicenses", 3),
+    ("1 Timóteo", 6), ("2 Timóteo", 4), ("Tito", 3), ("Filemom", 1), ("Hebreus", 13),
+    ("Tiago", 5), ("1 Pedro", 5), ("2 Pedro", 3), ("1 João", 5), ("2 João", 1),
+    ("3 João", 1), ("Judas", 1), ("Apocalipse", 22),
+]
+
+
+def days_in_year(year: int) -> int:
+    return (datetime(year + 1, 1, 1) - datetime(year, 1, 1)).days
+
+
+def _days_per_book(total_days: int) -> List[int]:
+    """Split `total_days` across the books in proportion to their chapter
+    counts (largest remainder), giving every book at least one day."""
+    total_chapters = sum(chapters for _, chapters in BIBLE_BOOKS)
+    shares = [chapters * total_days / total_chapters for _, chapters in BIBLE_BOOKS]
+    days = [max(1, int(share)) for share in shares]
+    by_remainder = sorted(range(len(shares)), key=lambda i: shares[i] - int(shares[i]), reverse=True)
+    i = 0
+    while sum(days) < total_days:
+        days[by_remainder[i % len(days)]] += 1
+        i += 1
+    while sum(days) > total_days:
+        # trim from the book with the most days
+        days[days.index(max(days))] -= 1
+    return days
+
+
+def _chapter_range(first: int, last: int) -> str:
+    return str(first) if first == last else f"{first}-{last}"
+
+
+def generate_reading_plan(year: int) -> List[dict]:
+    """Return one {"day", "book", "chapters", "date"} entry per day of `year`."""
+    total_days = days_in_year(year)
+    start = datetime(year, 1, 1)
+    plan = []
+    for (book, chapters), book_days in zip(BIBLE_BOOKS, _days_per_book(total_days)):
+        for j in range(book_days):
+            first = j * chapters // book_days + 1
+            last = (j + 1) * chapters // book_days
+            day = len(plan) + 1
+            plan.append({
+                "day": day,
+                "book": book,
+                "chapters": _chapter_range(first, last),
+                "date": start + timedelta(days=day - 1),
+            })
+    return plan
+
+
+def sample_event_rules(ministries: List[dict]) -> List[dict]:
+    """Weekly services plus one meeting rule per ministry with a "meeting"."""
+    rules = [
+        {
+            "title": "Culto de Domingo",
+            "description": "Culto de adoração e palavra",
+            "weekday": 6,
+            "time": "19:30",
+            "location": "Igreja PIB do Cordeiro",
+            "type": "culto"
+        },
+        {
+            "title": "EBD - Escola Bíblica Dominical",
+            "description": "Estudo bíblico para toda família",
+            "weekday": 6,
+            "time": "09:00",
+            "location": "Igreja PIB do Cordeiro",
+            "type": "estudo"
+        }
+    ]
+    for ministry in ministries:
+        meeting = ministry.get("meeting")
+        if meeting:
+            rules.append({
+                "title": ministry["name"],
+                "description": ministry["description"],
+                "weekday": meeting["weekday"],
+                "time": meeting["time"],
+                "location": "Igreja PIB do Cordeiro",
+                "type": "reuniao",
+            })
+    return rules
+
+
+def seed_marker(now: datetime) -> str:
+    return f"v{SEED_VERSION}:{now.year}"
+
+
+async def seed_database(db, ministries: List[dict] = (), now: Optional[datetime] = None) -> bool:
+    """Seed event rules and the reading plan. Returns False when the
+    database already holds this seed version for the current year, or
+    another worker is seeding it right now."""
+    now = now or datetime.utcnow()
+    marker = seed_marker(now)
+    current = await db.seed_state.find_one({"_id": SEED_MARKER_ID})
+    if current and current.get("version") == marker:
+        return False
+
+    owner = lock_owner()
+    if not await acquire_lock(db.seed_state, SEED_LOCK_ID, owner, SEED_LOCK_TTL, now):
+        logger.info("Seeding is running in another worker, skipping")
+        return False
+    try:
+        # the previous lock holder may have finished between our two reads
+        current = await db.seed_state.find_one({"_id": SEED_MARKER_ID})
+        if current and current.get("version") == marker:
+            return False
+        await _seed(db, ministries, now, marker, current)
+    finally:
+        await release_lock(db.seed_state, SEED_LOCK_ID, owner)
+    return True
+
+
+async def _seed(db, ministries: List[dict], now: datetime, marker: str, current: Optional[dict]) -> None:
+    # rules are only created if missing, never overwritten
+    rules = sample_event_rules(ministries)
+    await db.event_rules.bulk_write(
+        [
+            UpdateOne(
+                {"title": rule["title"]},
+                {"$setOnInsert": {"id": str(uuid.uuid4()), "interval_weeks": 1, "updated_at": now, **rule}},
+                upsert=True,
+            )
+            for rule in rules
+        ],
+        ordered=False,
+    )
+
+    # before seed version 2 the Sunday services were single dated events
+    if current is None or current.get("version", "").startswith("v1:"):
+        await _remove_legacy_sample_events(db, now)
+
+    await _remove_duplicate_reading_days(db, now)
+
+    plan = generate_reading_plan(now.year)
+    # days past the end of this year (day 366 after a leap year) are removed
+    stale = await db.reading_plan.find({"day": {"$gt": len(plan)}}, {"_id": 0, "id": 1}).to_list(None)
+    await db.reading_plan.bulk_write(
+        [
+            UpdateOne(
+                {"day": reading["day"]},
+                {"$set": {**reading, "updated_at": now}, "$setOnInsert": {"id": str(uuid.uuid4())}},
+                upsert=True,
+            )
+            for reading in plan
+        ]
+        + [DeleteMany({"day": {"$gt": len(plan)}})],
+        ordered=False,
+    )
+    await record_tombstones(db, "reading_plan", [doc["id"] for doc in stale if "id" in doc], now)
+
+    await db.seed_state.update_one(
+        {"_id": SEED_MARKER_ID},
+        {"$set": {"version": marker, "seeded_at": now}},
+        upsert=True,
+    )
+    logger.info("Seeded database (%s, %d reading plan days)", marker, len(plan))
+
+
+async def _remove_legacy_sample_events(db, now: datetime) -> None:
+    """Delete the v1 sample service events, now served by rules. Only the
+    first event stored under each title is a candidate, and only if it
+    still matches the sample exactly; services admins created with the
+    same title are left alone."""
+    removed = []
+    for sample in LEGACY_SAMPLE_EVENTS:
+        first = await db.events.find_one({"title": sample["title"]}, sort=[("_id", 1)])
+        if first is None or first.get("rule_id") is not None:
+            continue
+        if any(first.get(field) != value for field, value in sample.items()):
+            continue
+        await db.events.delete_one({"_id": first["_id"]})
+        if "id" in first:
+            removed.append(first["id"])
+    if removed:
+        await record_tombstones(db, "events", removed, now)
+
+
+async def _remove_duplicate_reading_days(db, now: datetime) -> None:
+    """Keep one reading plan entry per day. Seeding before the seed lock
+    could insert a day twice, which blocks the `day_unique` index and
+    leaves the extra copy out of the upserts by day."""
+    pipeline = [
+        {"$sort": {"_id": 1}},
+        {"$group": {"_id": "$day", "docs": {"$push": {"_id": "$_id", "id": "$id"}}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    extra = []
+    async for group in db.reading_plan.aggregate(pipeline):
+        # the oldest copy stays
+        extra.extend(group["docs"][1:])
+    if not extra:
+        return
+    await db.reading_plan.delete_many({"_id": {"$in": [doc["_id"] for doc in extra]}})
+    await record_tombstones(db, "reading_plan", [doc["id"] for doc in extra if doc.get("id")], now)
+    logger.info("Removed %d duplicate reading plan days", len(extra))
@@ -0,0 +1,82 @@
+"""
+Opt-in fast path for list responses, selected with SERIALIZATION_MODE:
+
+- "pydantic" (default): build one model per document and let FastAPI
+  validate and encode the list again against `response_model`.
+- "validate": fetch only the model fields, validate the whole batch with a
+  single `TypeAdapter` call and encode it with orjson.
+- "trusted": fetch only the model fields and encode the documents as
+  stored, without validation. Only safe for collections written solely
+  through this API; fields missing from old documents are not defaulted.
+
+`subset(fields)` returns a serializer for a model trimmed to the requested
+fields (sparse fieldsets, `?fields=`). Its projection fetches only those
+fields, and it always encodes with orjson, because FastAPI would reject a
+trimmed item against the full `response_model`.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, TypeAdapter, create_model
+
+SERIALIZATION_MODES = ("pydantic", "validate", "trusted")
+
+
+class DocumentSerializer:
+    def __init__(self, model: Type[BaseModel], mode: str = "pydantic"):
+        if mode not in SERIALIZATION_MODES:
+            raise ValueError(f"Unknown serialization mode: {mode}")
+        self.model = model
+        self.mode = mode
+        self.adapter = TypeAdapter(List[model])
+        # Mongo projection limited to the model fields; also drops _id
+        self.projection = {"_id": 0, **{name: 1 for name in model.model_fields}}
+        self._subsets: Dict[Tuple[str, ...], "DocumentSerializer"] = {}
+        self._trim = False
+
+    def parse_fields(self, fields: Optional[str], required: Tuple[str, ...] = ("id",)) -> Optional[Tuple[str, ...]]:
+        """Parse a comma-separated `fields=` value into a tuple in model field
+        order (usable as a cache key) that includes `required`; None means
+        every field."""
+        if not fields:
+            return None
+        names = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = names - set(self.model.model_fields)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        names |= set(required)
+        return tuple(name for name in self.model.model_fields if name in names)
+
+    def subset(self, fields: Optional[Tuple[str, ...]]) -> "DocumentSerializer":
+        if fields is None:
+            return self
+        serializer = self._subsets.get(fields)
+        if serializer is None:
+            model = create_model(
+                f"{self.model.__name__}Fields",
+                **{name: (self.model.model_fields[name].annotation, self.model.model_fields[name]) for name in fields},
+            )
+            serializer = DocumentSerializer(model, "trusted" if self.mode == "trusted" else "validate")
+            serializer._trim = True
+            self._subsets[fields] = serializer
+        return serializer
+
+    def load(self, docs: List[dict]) -> List[Any]:
+        if self.mode == "pydantic":
+            return [self.model(**doc) for doc in docs]
+        if self.mode == "trusted":
+            if self._trim:
+                # documents may carry extra fields fetched for sorting/paging
+                return [{name: doc[name] for name in self.projection if name in doc} for doc in docs]
+            return docs
+        return self.adapter.dump_python(self.adapter.validate_python(docs))
+
+    def respond(self, items: List[Any], headers: Optional[Dict[str, str]] = None) -> Any:
+        """Return a value for the route. In "pydantic" mode that is the list
+        itself, so FastAPI applies `response_model` as before; headers must
+        then be set on the injected Response by the caller."""
+        if self.mode == "pydantic":
+            return items
+        return ORJSONResponse(items, headers=headers)
@@ -1,15 +1,51 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, Body, Header, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
+import hmac
 import logging
+import time
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Literal, Optional, Tuple, Union
 import uuid
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from itertools import islice
+from zoneinfo import ZoneInfo
 from bson import ObjectId
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from admission import AdmissionController, AdmissionMiddleware
+from broker import Broker
+from cache import TTLCache
+from compression import CompressionMiddleware, CompressionSettings
+from counters import CounterBuffer
+from database import client_factory
+from export import EXPORT_MEDIA_TYPES, ExportSource, export_query, export_rows
+from http_cache import CachedBody, conditional_response
+from indexes import ensure_indexes, log_index_report
+from metrics import REGISTRY, EventLoopMonitor, MetricsMiddleware, MongoCommandMetrics, stats_gauges
+from pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, fetch_page
+from reading_plan import ReadingPlanIndex
+from recurrence import expand_rules, naive_utc, next_occurrence
+from relay import RELAY_COLLECTION, WorkerRelay
+from reminders import ReminderScheduler, build_transport
+from retention import PrayerArchiver, ensure_status_ttl
+from search import SearchSource, search
+from seed import seed_database
+from serialization import DocumentSerializer
+from stats import (
+    APP_OPENS, DAILY_STATS, PRAYER_ANSWERED, PRAYER_APPROVED, PRAYER_RECEIVED,
+    day_key, load_daily_stats, local_day, weekly_totals,
+)
+from sync import SyncSource, backfill_updated_at, fetch_changes
+from write_buffer import WriteBuffer
 
 
 ROOT_DIR = Path(__file__).parent
@@ -17,8 +53,47 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+mongo_metrics = MongoCommandMetrics(slow_threshold=float(os.environ.get('MONGO_SLOW_QUERY_MS', 100)) / 1000)
+# The client is created per worker process in the lifespan (see database.py)
+create_mongo_client = client_factory(mongo_url, event_listeners=[mongo_metrics])
+client: Optional[AsyncIOMotorClient] = None
+db = None
+
+# Read cache for hot endpoints; write routes invalidate by namespace
+cache = TTLCache(
+    maxsize=int(os.environ.get('CACHE_MAX_ENTRIES', 256)),
+    ttl=float(os.environ.get('CACHE_TTL_SECONDS', 60)),
+)
+
+# Live prayer wall broker; the relay carries its events and cache
+# invalidations to the other worker processes
+prayer_broker = Broker(
+    queue_size=int(os.environ.get('PRAYER_STREAM_QUEUE_SIZE', 100)),
+    replay_size=int(os.environ.get('PRAYER_STREAM_REPLAY_SIZE', 1000)),
+)
+relay = WorkerRelay(
+    prayer_broker,
+    cache,
+    interval=float(os.environ.get('WORKER_RELAY_INTERVAL_SECONDS', 0.5)),
+    grace=float(os.environ.get('WORKER_RELAY_GRACE_SECONDS', 2)),
+)
+
+# Response compression, shared by the middleware and pre-serialized responses
+COMPRESSION = CompressionSettings(
+    minimum_size=int(os.environ.get('COMPRESSION_MIN_BYTES', 1024)),
+    gzip_level=int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6)),
+    brotli_quality=int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4)),
+)
+
+# Per-day dashboard counters, incremented by the write paths and flushed
+# to db.daily_stats in the background (collection attached in the lifespan)
+daily_counters = CounterBuffer(
+    None, key_field="day", upsert=True, flush_interval=float(os.environ.get('STATS_FLUSH_SECONDS', 5))
+)
+
+def count_daily(counter: str, amount: int = 1) -> None:
+    if amount:
+        daily_counters.incr(day_key(CHURCH_TZ), counter, amount)
 
 # Create the main app without a prefix
 app = FastAPI()
@@ -45,6 +120,8 @@ class Event(BaseModel):
     time: str
     location: str = "Igreja PIB do Cordeiro"
     type: str  # "culto", "reuniao", "evento"
+    rule_id: Optional[str] = None  # set on occurrences of a recurring EventRule
+    updated_at: Optional[datetime] = None
 
 class EventCreate(BaseModel):
     title: str
@@ -54,6 +131,44 @@ class EventCreate(BaseModel):
     location: str = "Igreja PIB do Cordeiro"
     type: str
 
+    @field_validator("date")
+    @classmethod
+    def to_naive_utc(cls, value: datetime) -> datetime:
+        return naive_utc(value)
+
+class EventRule(BaseModel):
+    id: Optional[str] = Field(default_factory=lambda: str(uuid.uuid4()))
+    title: str
+    description: str
+    weekday: int = Field(..., ge=0, le=6)  # 0 = Monday
+    time: str = Field(..., pattern=r"^([01]\d|2[0-3]):[0-5]\d$")  # church local time
+    interval_weeks: int = Field(1, ge=1)
+    starts_at: Optional[datetime] = None
+    until: Optional[datetime] = None
+    location: str = "Igreja PIB do Cordeiro"
+    type: str
+    updated_at: Optional[datetime] = None
+
+class EventRuleCreate(BaseModel):
+    title: str
+    description: str
+    weekday: int = Field(..., ge=0, le=6)
+    time: str = Field(..., pattern=r"^([01]\d|2[0-3]):[0-5]\d$")
+    interval_weeks: int = Field(1, ge=1)
+    starts_at: Optional[datetime] = None
+    until: Optional[datetime] = None
+    location: str = "Igreja PIB do Cordeiro"
+    type: str
+
+    @field_validator("starts_at", "until")
+    @classmethod
+    def to_naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        return naive_utc(value)
+
+class DeviceRegistration(BaseModel):
+    token: str = Field(..., min_length=1, max_length=256)
+    platform: Optional[str] = None
+
 class PrayerRequest(BaseModel):
     id: Optional[str] = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
@@ -62,19 +177,47 @@ class PrayerRequest(BaseModel):
     is_approved: bool = False
     is_answered: bool = False
     testimony: Optional[str] = None
+    prayed_count: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: Optional[datetime] = None
 
 class PrayerRequestCreate(BaseModel):
     name: str
     message: str
     is_public: bool = True
 
+class PrayerCount(BaseModel):
+    id: str
+    prayed_count: int
+
+class PrayerAnswer(BaseModel):
+    id: str
+    testimony: str
+
+# Bulk write models
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    status: str  # "created", "approved", "answered", "unchanged", "not_found", "error"
+    error: Optional[str] = None
+
+class BulkResult(BaseModel):
+    results: List[BulkItemResult]
+    succeeded: int
+    failed: int
+
+class SearchResult(BaseModel):
+    type: str  # "event" or "prayer_request"
+    score: float
+    item: Union[Event, PrayerRequest]
+
 class ReadingPlan(BaseModel):
     id: Optional[str] = Field(default_factory=lambda: str(uuid.uuid4()))
     day: int
     book: str
     chapters: str
     date: datetime
+    updated_at: Optional[datetime] = None
 
 class Ministry(BaseModel):
     id: str
@@ -85,165 +228,782 @@ class Ministry(BaseModel):
     schedule: str
     whatsapp_link: str
 
+# List serializers; SERIALIZATION_MODE opts into the batch/trusted fast path
+SERIALIZATION_MODE = os.environ.get('SERIALIZATION_MODE', 'pydantic')
+status_check_serializer = DocumentSerializer(StatusCheck, SERIALIZATION_MODE)
+event_serializer = DocumentSerializer(Event, SERIALIZATION_MODE)
+event_rule_serializer = DocumentSerializer(EventRule, SERIALIZATION_MODE)
+prayer_request_serializer = DocumentSerializer(PrayerRequest, SERIALIZATION_MODE)
+reading_plan_serializer = DocumentSerializer(ReadingPlan, SERIALIZATION_MODE)
+
 # Basic routes
 @api_router.get("/")
 async def root():
     return {"message": "PIB do Cordeiro API"}
 
+# Optional group-commit buffer for status heartbeats
+STATUS_BUFFER_ENABLED = os.environ.get('STATUS_BUFFER_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+status_buffer = WriteBuffer(
+    None,  # db.status_checks, attached in the lifespan
+    batch_size=int(os.environ.get('STATUS_BUFFER_BATCH_SIZE', 200)),
+    flush_interval=float(os.environ.get('STATUS_BUFFER_FLUSH_SECONDS', 0.25)),
+)
+
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    if STATUS_BUFFER_ENABLED:
+        await status_buffer.put(status_obj.dict())
+    else:
+        _ = await db.status_checks.insert_one(status_obj.dict())
+    count_daily(APP_OPENS)
     return status_obj
 
+@api_router.get("/status/buffer")
+async def get_status_buffer_stats():
+    return {"enabled": STATUS_BUFFER_ENABLED, **status_buffer.stats()}
+
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+async def get_status_checks(
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=1000),
+):
+    status_checks, next_cursor = await fetch_page(
+        db.status_checks, {}, "timestamp", 1, limit, after, projection=status_check_serializer.projection
+    )
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    response.headers.update(headers)
+    return status_check_serializer.respond(status_check_serializer.load(status_checks), headers)
 
 # Events endpoints
 @api_router.post("/events", response_model=Event)
 async def create_event(event: EventCreate):
+    now = datetime.utcnow()
     event_dict = event.dict()
-    event_obj = Event(**event_dict)
+    event_obj = Event(**event_dict, updated_at=now)
+    remind = REMINDERS_ENABLED and event_obj.date > now
     await db.events.insert_one(event_obj.dict())
+    relay.invalidate("events", "search")
+    if remind:
+        reminder_scheduler.notify(event_obj.dict(), "new")
     return event_obj
 
+# Recurring events are stored as rules and expanded per request window
+CHURCH_TZ = ZoneInfo(os.environ.get('CHURCH_TIMEZONE', 'America/Fortaleza'))
+EVENT_RULES_HORIZON = timedelta(days=int(os.environ.get('EVENT_RULES_HORIZON_DAYS', 28)))
+
+async def load_event_rules() -> List[dict]:
+    async def load():
+        return await db.event_rules.find({}, {"_id": 0}).to_list(None)
+
+    return await cache.get_or_load(("events", "rules"), load)
+
+@api_router.post("/event-rules", response_model=EventRule)
+async def create_event_rule(rule: EventRuleCreate):
+    rule_obj = EventRule(**rule.dict(), updated_at=datetime.utcnow())
+    await db.event_rules.insert_one(rule_obj.dict())
+    relay.invalidate("events", "search")
+    return rule_obj
+
+@api_router.get("/event-rules", response_model=List[EventRule])
+async def get_event_rules():
+    return await load_event_rules()
+
 @api_router.get("/events", response_model=List[Event])
-async def get_events():
-    events = await db.events.find().sort("date", 1).to_list(100)
-    return [Event(**event) for event in events]
+async def get_events(
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; id is always included"),
+):
+    """One-off events merged with occurrences of recurring rules, ordered by
+    (date, id). Without from/to, one-off events are unbounded as before and
+    rules are expanded from now over EVENT_RULES_HORIZON_DAYS."""
+    field_set = event_serializer.parse_fields(fields)
+    serializer = event_serializer.subset(field_set)
+    # stored dates are naive UTC; "Z" or "-03:00" inputs are converted
+    from_, to = naive_utc(from_), naive_utc(to)
+
+    async def load():
+        query = {}
+        if from_ or to:
+            query["date"] = {key: value for key, value in (("$gte", from_), ("$lt", to)) if value}
+        # date and id are always fetched for the merge and the cursor
+        events, db_cursor = await fetch_page(
+            db.events, query, "date", 1, limit, after, projection={**serializer.projection, "date": 1, "id": 1}
+        )
+
+        start = from_ or datetime.utcnow()
+        end = to or start + EVENT_RULES_HORIZON
+        occurrences = expand_rules(await load_event_rules(), start, end, CHURCH_TZ)
+        if after:
+            position = decode_cursor(after)
+            occurrences = (o for o in occurrences if (o["date"], o["id"]) > position)
+        merged = sorted(events + list(islice(occurrences, limit + 1)), key=lambda e: (e["date"], e["id"]))
+
+        page = merged[:limit]
+        next_cursor = None
+        if page and (db_cursor or len(merged) > limit):
+            next_cursor = encode_cursor(page[-1]["date"], page[-1]["id"])
+        return serializer.load(page), next_cursor
+
+    events, next_cursor = await cache.get_or_load(("events", "list", after, limit, from_, to, field_set), load)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    response.headers.update(headers)
+    return serializer.respond(events, headers)
 
 @api_router.get("/events/next")
 async def get_next_event():
+    async def load():
+        now = datetime.utcnow()
+        event = await db.events.find_one({"date": {"$gte": now}}, sort=[("date", 1)])
+        occurrence = next_occurrence(await load_event_rules(), now, CHURCH_TZ)
+        candidates = [e for e in (event, occurrence) if e]
+        if candidates:
+            return Event(**min(candidates, key=lambda e: e["date"]))
+        return None
+
+    return await cache.get_or_load(("events", "next"), load)
+
+# Event reminders: pushed to registered devices by a background scheduler
+REMINDERS_ENABLED = os.environ.get('REMINDERS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+async def upcoming_events(start: datetime, end: datetime) -> List[dict]:
+    events = await (
+        db.events.find({"date": {"$gte": start, "$lt": end}}, event_serializer.projection)
+        .sort([("date", 1), ("id", 1)])
+        .to_list(None)
+    )
+    return events + list(expand_rules(await load_event_rules(), start, end, CHURCH_TZ))
+
+reminder_scheduler = ReminderScheduler(
+    build_transport(
+        os.environ.get('REMINDER_TRANSPORT', 'memory'),
+        path=os.environ.get('REMINDER_FILE'),
+        access_token=os.environ.get('EXPO_ACCESS_TOKEN'),
+    ),
+    upcoming_events,
+    CHURCH_TZ,
+    lead=timedelta(minutes=int(os.environ.get('REMINDER_LEAD_MINUTES', 120))),
+    interval=float(os.environ.get('REMINDER_SCAN_SECONDS', 60)),
+    batch_size=int(os.environ.get('REMINDER_BATCH_SIZE', 100)),
+    concurrency=int(os.environ.get('REMINDER_CONCURRENCY', 4)),
+    max_retries=int(os.environ.get('REMINDER_MAX_RETRIES', 3)),
+)
+
+@api_router.post("/devices", response_model=DeviceRegistration)
+async def register_device(device: DeviceRegistration):
     now = datetime.utcnow()
-    event = await db.events.find_one({"date": {"$gte": now}}, sort=[("date", 1)])
-    if event:
-        return Event(**event)
-    return None
+    await db.devices.update_one(
+        {"token": device.token},
+        {"$set": {"platform": device.platform, "updated_at": now}, "$setOnInsert": {"created_at": now}},
+        upsert=True,
+    )
+    return device
+
+@api_router.delete("/devices/{token}")
+async def unregister_device(token: str):
+    await db.devices.delete_one({"token": token})
+    return {"message": "Device removed"}
 
 # Prayer requests endpoints
 @api_router.post("/prayer-requests", response_model=PrayerRequest)
 async def create_prayer_request(request: PrayerRequestCreate):
     request_dict = request.dict()
     prayer_obj = PrayerRequest(**request_dict)
+    prayer_obj.updated_at = prayer_obj.created_at
     await db.prayer_requests.insert_one(prayer_obj.dict())
+    relay.invalidate("prayer_requests")
+    count_daily(PRAYER_RECEIVED)
     return prayer_obj
 
+async def load_public_prayer_requests(after: Optional[str], limit: int, fields: Optional[Tuple[str, ...]] = None):
+    serializer = prayer_request_serializer.subset(fields)
+
+    async def load():
+        requests, next_cursor = await fetch_page(
+            db.prayer_requests,
+            {"is_public": True, "is_approved": True},
+            "created_at",
+            -1,
+            limit,
+            after,
+            projection={**serializer.projection, "created_at": 1, "id": 1},
+        )
+        return serializer.load(requests), next_cursor
+
+    return await cache.get_or_load(("prayer_requests", "public", after, limit, fields), load)
+
 @api_router.get("/prayer-requests", response_model=List[PrayerRequest])
-async def get_prayer_requests():
-    requests = await db.prayer_requests.find({"is_public": True, "is_approved": True}).sort("created_at", -1).to_list(100)
-    return [PrayerRequest(**request) for request in requests]
+async def get_prayer_requests(
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; id is always included"),
+):
+    field_set = prayer_request_serializer.parse_fields(fields)
+    requests, next_cursor = await load_public_prayer_requests(after, limit, field_set)
+    if field_set is None or "prayed_count" in field_set:
+        requests = with_pending_prayers(requests)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    response.headers.update(headers)
+    return prayer_request_serializer.subset(field_set).respond(requests, headers)
+
+# "Orei por isso" taps are summed in memory and flushed as one $inc per
+# request; reads add the pending delta to the persisted count
+prayer_counters = CounterBuffer(
+    None,  # db.prayer_requests, attached in the lifespan
+    key_field="id",
+    flush_interval=float(os.environ.get('PRAYER_COUNTER_FLUSH_SECONDS', 2)),
+    timestamp_field="updated_at",
+    on_flush=lambda ids: relay.invalidate("prayer_requests"),
+)
+
+def with_pending_prayers(items: list) -> list:
+    """Copy of `items` with pending taps added to prayed_count. Cached items
+    are shared, so changed ones are copied rather than updated in place."""
+    result = []
+    for item in items:
+        request_id = item["id"] if isinstance(item, dict) else item.id
+        pending = prayer_counters.pending(request_id, "prayed_count")
+        if pending:
+            if isinstance(item, dict):
+                item = {**item, "prayed_count": item.get("prayed_count", 0) + pending}
+            else:
+                item = item.model_copy(update={"prayed_count": item.prayed_count + pending})
+        result.append(item)
+    return result
+
+@api_router.post("/prayer-requests/{request_id}/pray", response_model=PrayerCount)
+async def pray_for_request(request_id: str):
+    doc = await db.prayer_requests.find_one(
+        {"id": request_id, "is_public": True, "is_approved": True}, {"_id": 0, "prayed_count": 1}
+    )
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Request not found")
+    prayer_counters.incr(request_id, "prayed_count")
+    return PrayerCount(
+        id=request_id, prayed_count=doc.get("prayed_count", 0) + prayer_counters.pending(request_id, "prayed_count")
+    )
+
+# Live prayer wall: approvals and answers pushed over Server-Sent Events
+def publish_prayer_update(event: str, doc: dict) -> None:
+    # only requests visible on the public wall are broadcast
+    if doc.get("is_public") and doc.get("is_approved"):
+        relay.publish(event, jsonable_encoder(PrayerRequest(**doc)))
+
+@api_router.get("/prayer-requests/stream")
+async def stream_prayer_requests(last_event_id: Optional[str] = Header(None)):
+    return StreamingResponse(
+        prayer_broker.stream(last_event_id or None),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Bulk write endpoints (declared before /prayer-requests/{request_id}/... so "bulk" is not taken as an id)
+BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 500))
+BULK_OK_STATUSES = {"created", "approved", "answered", "unchanged"}
+
+def bulk_result(results: List[BulkItemResult]) -> BulkResult:
+    succeeded = sum(1 for result in results if result.status in BULK_OK_STATUSES)
+    return BulkResult(results=results, succeeded=succeeded, failed=len(results) - succeeded)
+
+async def bulk_update_by_id(
+    collection, ids: List[str], updates: List[dict], status: str, projection: dict
+) -> Tuple[BulkResult, List[dict], List[dict]]:
+    """Apply updates[i] to the document with ids[i]: one query to find which
+    ids exist and still need the change, then one unordered bulk_write.
+
+    Each update only matches while the fields it sets still hold the values
+    read by that query, so a concurrent write to the same document wins and
+    this item is reported "unchanged". Repeated ids are applied once; later
+    repeats are also "unchanged".
+
+    Returns the per-item result, the documents this write actually updated
+    (as fetched with `projection`, with the update applied) and the same
+    documents as they were before the update."""
+    pending = {}
+    async for doc in collection.find({"id": {"$in": ids}}, projection):
+        pending[doc["id"]] = doc
+
+    now = datetime.utcnow()
+    # Mongo stores milliseconds; `now` is matched again below if a write loses a race
+    now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    results, operations, operation_indexes, seen = [], [], [], set()
+    for index, (item_id, update) in enumerate(zip(ids, updates)):
+        doc = pending.get(item_id)
+        if doc is None:
+            results.append(BulkItemResult(index=index, id=item_id, status="not_found"))
+        elif item_id in seen or all(doc.get(key) == value for key, value in update.items()):
+            results.append(BulkItemResult(index=index, id=item_id, status="unchanged"))
+        else:
+            results.append(BulkItemResult(index=index, id=item_id, status=status))
+            expected = {key: doc.get(key) for key in update}
+            operations.append(UpdateOne({"id": item_id, **expected}, {"$set": {**update, "updated_at": now}}))
+            operation_indexes.append(index)
+        seen.add(item_id)
+
+    matched = len(operations)
+    if operations:
+        try:
+            matched = (await collection.bulk_write(operations, ordered=False)).matched_count
+        except BulkWriteError as exc:
+            matched = exc.details.get("nMatched", 0)
+            for error in exc.details.get("writeErrors", []):
+                result = results[operation_indexes[error["index"]]]
+                result.status, result.error = "error", error.get("errmsg")
+    applied = [index for index in operation_indexes if results[index].status == status]
+    if matched < len(applied):
+        # some documents changed since they were read: keep only the ones this write stamped
+        stamped = set()
+        async for doc in collection.find({"id": {"$in": [ids[i] for i in applied]}, "updated_at": now}, {"id": 1}):
+            stamped.add(doc["id"])
+        for index in applied:
+            if ids[index] not in stamped:
+                results[index].status = "unchanged"
+        applied = [index for index in applied if ids[index] in stamped]
+    previous = [pending[ids[index]] for index in applied]
+    updated = [{**pending[ids[index]], **updates[index], "updated_at": now} for index in applied]
+    return bulk_result(results), updated, previous
+
+@api_router.post("/events/bulk", response_model=BulkResult)
+async def create_events_bulk(events: List[EventCreate] = Body(..., min_length=1, max_length=BULK_MAX_ITEMS)):
+    now = datetime.utcnow()
+    event_objs = [Event(**event.dict(), updated_at=now) for event in events]
+    results = [BulkItemResult(index=index, id=event.id, status="created") for index, event in enumerate(event_objs)]
+    try:
+        await db.events.bulk_write([InsertOne(event.dict()) for event in event_objs], ordered=False)
+    except BulkWriteError as exc:
+        for error in exc.details.get("writeErrors", []):
+            result = results[error["index"]]
+            result.status, result.error = "error", error.get("errmsg")
+    relay.invalidate("events", "search")
+    return bulk_result(results)
+
+@api_router.patch("/prayer-requests/bulk/approve", response_model=BulkResult)
+async def approve_prayer_requests_bulk(ids: List[str] = Body(..., min_length=1, max_length=BULK_MAX_ITEMS)):
+    result, updated, _ = await bulk_update_by_id(
+        db.prayer_requests,
+        ids,
+        [{"is_approved": True}] * len(ids),
+        "approved",
+        prayer_request_serializer.projection,
+    )
+    relay.invalidate("prayer_requests", "search")
+    count_daily(PRAYER_APPROVED, len(updated))
+    for doc in updated:
+        publish_prayer_update("approved", doc)
+    return result
+
+@api_router.patch("/prayer-requests/bulk/answer", response_model=BulkResult)
+async def answer_prayer_requests_bulk(answers: List[PrayerAnswer] = Body(..., min_length=1, max_length=BULK_MAX_ITEMS)):
+    result, updated, previous = await bulk_update_by_id(
+        db.prayer_requests,
+        [answer.id for answer in answers],
+        [{"is_answered": True, "testimony": answer.testimony} for answer in answers],
+        "answered",
+        prayer_request_serializer.projection,
+    )
+    relay.invalidate("prayer_requests", "search")
+    # a new testimony on an already answered request is not counted again
+    count_daily(PRAYER_ANSWERED, sum(1 for doc in previous if not doc.get("is_answered")))
+    for doc in updated:
+        publish_prayer_update("answered", doc)
+    return result
 
 @api_router.patch("/prayer-requests/{request_id}/approve")
 async def approve_prayer_request(request_id: str):
-    result = await db.prayer_requests.update_one(
-        {"id": request_id},
-        {"$set": {"is_approved": True}}
+    # the filter skips no-op updates, matching the old modified_count check
+    update = {"is_approved": True, "updated_at": datetime.utcnow()}
+    doc = await db.prayer_requests.find_one_and_update(
+        {"id": request_id, "is_approved": {"$ne": True}},
+        {"$set": update},
+        projection=prayer_request_serializer.projection,
     )
-    if result.modified_count == 0:
+    if doc is None:
         raise HTTPException(status_code=404, detail="Request not found")
+    relay.invalidate("prayer_requests", "search")
+    count_daily(PRAYER_APPROVED)
+    publish_prayer_update("approved", {**doc, **update})
     return {"message": "Request approved"}
 
 @api_router.patch("/prayer-requests/{request_id}/answer")
 async def answer_prayer_request(request_id: str, testimony: str):
-    result = await db.prayer_requests.update_one(
-        {"id": request_id},
-        {"$set": {"is_answered": True, "testimony": testimony}}
+    update = {"is_answered": True, "testimony": testimony, "updated_at": datetime.utcnow()}
+    doc = await db.prayer_requests.find_one_and_update(
+        {"id": request_id, "$or": [{"is_answered": {"$ne": True}}, {"testimony": {"$ne": testimony}}]},
+        {"$set": update},
+        projection=prayer_request_serializer.projection,
     )
-    if result.modified_count == 0:
+    if doc is None:
         raise HTTPException(status_code=404, detail="Request not found")
+    relay.invalidate("prayer_requests", "search")
+    if not doc.get("is_answered"):
+        count_daily(PRAYER_ANSWERED)
+    publish_prayer_update("answered", {**doc, **update})
     return {"message": "Prayer answered"}
 
-# Reading plan endpoints
+# Reading plan endpoints, served from memory; the index reloads when the collection changes
+READING_PLAN_MAX_AGE = 300
+READING_RANGE_MAX_DAYS = 366
+reading_plan_index = ReadingPlanIndex(
+    CHURCH_TZ,
+    interval=float(os.environ.get('READING_PLAN_REFRESH_SECONDS', 60)),
+    on_reload=lambda: cache.invalidate("reading_plan"),
+)
+
 @api_router.get("/reading-plan", response_model=List[ReadingPlan])
-async def get_reading_plan():
-    plans = await db.reading_plan.find().sort("day", 1).to_list(365)
-    return [ReadingPlan(**plan) for plan in plans]
+async def get_reading_plan(
+    request: Request,
+    after: Optional[str] = None,
+    limit: int = Query(365, ge=1, le=366),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; id is always included"),
+):
+    field_set = reading_plan_serializer.parse_fields(fields)
+    serializer = reading_plan_serializer.subset(field_set)
+
+    # entries are dated in the current local year, so the year is part of the key
+    year = local_day(CHURCH_TZ).year
+
+    async def load():
+        plans, next_cursor = reading_plan_index.page(after, limit, year)
+        return CachedBody.from_content(serializer.load(plans)), next_cursor
+
+    payload, next_cursor = await cache.get_or_load(("reading_plan", "page", year, after, limit, field_set), load)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return conditional_response(request, payload, READING_PLAN_MAX_AGE, headers, COMPRESSION)
 
 @api_router.get("/reading-plan/today")
 async def get_today_reading():
-    today = datetime.utcnow()
-    day_of_year = today.timetuple().tm_yday
-    plan = await db.reading_plan.find_one({"day": day_of_year})
+    plan = reading_plan_index.today()
     if plan:
         return ReadingPlan(**plan)
     return None
 
+@api_router.get("/reading-plan/range", response_model=List[ReadingPlan])
+async def get_reading_range(
+    start: Optional[date] = Query(None, description="First day (church timezone); defaults to today"),
+    end: Optional[date] = Query(None, description="Last day, inclusive; defaults to a week from start"),
+):
+    start = start or local_day(CHURCH_TZ)
+    end = end or start + timedelta(days=6)
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days >= READING_RANGE_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Ranges are limited to {READING_RANGE_MAX_DAYS} days")
+    return reading_plan_index.between(start, end)
+
+# Cache counters
+@api_router.get("/cache/stats")
+async def get_cache_stats():
+    return cache.stats()
+
+# Static content, serialized once at startup. "meeting" is the structured
+# form of "schedule", seeded as a weekly EventRule.
+MINISTRIES = [
+    {
+        "id": "mcm",
+        "name": "MCM - Mulheres Cristãs em Missão",
+        "description": "Ministério dedicado às mulheres da igreja, promovendo crescimento espiritual e comunhão.",
+        "leader": "Irmã Maria",
+        "contact": "(99) 99999-9999",
+        "schedule": "Sextas-feiras às 19h30",
+        "meeting": {"weekday": 4, "time": "19:30"},
+        "whatsapp_link": "https://wa.me/5599999999999"
+    },
+    {
+        "id": "unijovem",
+        "name": "UNIJOVEM",
+        "description": "Ministério jovem focado no discipulado e evangelização da juventude.",
+        "leader": "Pastor João",
+        "contact": "(99) 99999-9998",
+        "schedule": "Sábados às 19h30",
+        "meeting": {"weekday": 5, "time": "19:30"},
+        "whatsapp_link": "https://wa.me/5599999999998"
+    },
+    {
+        "id": "umhbb",
+        "name": "UMHBB",
+        "description": "União Masculina Batista, fortalecendo os homens na fé e liderança cristã.",
+        "leader": "Irmão Pedro",
+        "contact": "(99) 99999-9997",
+        "schedule": "Sábados às 19h30",
+        "meeting": {"weekday": 5, "time": "19:30"},
+        "whatsapp_link": "https://wa.me/5599999999997"
+    },
+    {
+        "id": "mensageiras",
+        "name": "Mensageiras do Rei",
+        "description": "Ministério infantil dedicado ao ensino bíblico para crianças.",
+        "leader": "Irmã Ana",
+        "contact": "(99) 99999-9996",
+        "schedule": "Sábados às 15h30",
+        "meeting": {"weekday": 5, "time": "15:30"},
+        "whatsapp_link": "https://wa.me/5599999999996"
+    }
+]
+
+MEDIA_LINKS = {
+    "pregacoes": "https://drive.google.com/drive/folders/PREGACOES_FOLDER_ID",
+    "estudos": "https://drive.google.com/drive/folders/ESTUDOS_FOLDER_ID",
+    "videos": "https://drive.google.com/drive/folders/VIDEOS_FOLDER_ID"
+}
+
+CHURCH_INFO = {
+    "name": "Primeira Igreja Batista do Cordeiro",
+    "address": "R. Sete de Setembro, 451, São João dos Patos - MA, CEP 65665-000",
+    "phone": "(99) 99999-9999",
+    "instagram": "@pibdocordeiro",
+    "maps_link": "https://maps.google.com/?q=R.+Sete+de+Setembro,+451,+São+João+dos+Patos+-+MA"
+}
+
+MINISTRIES_BODY = CachedBody.from_content([Ministry(**ministry) for ministry in MINISTRIES])
+MEDIA_LINKS_BODY = CachedBody.from_content(MEDIA_LINKS)
+CHURCH_INFO_BODY = CachedBody.from_content(CHURCH_INFO)
+STATIC_MAX_AGE = 3600
+
 # Ministries endpoint
 @api_router.get("/ministries", response_model=List[Ministry])
-async def get_ministries():
-    ministries = [
-        {
-            "id": "mcm",
-            "name": "MCM - Mulheres Cristãs em Missão",
-            "description": "Ministério dedicado às mulheres da igreja, promovendo crescimento espiritual e comunhão.",
-            "leader": "Irmã Maria",
-            "contact": "(99) 99999-9999",
-            "schedule": "Sextas-feiras às 19h30",
-            "whatsapp_link": "https://wa.me/5599999999999"
-        },
-        {
-            "id": "unijovem",
-            "name": "UNIJOVEM",
-            "description": "Ministério jovem focado no discipulado e evangelização da juventude.",
-            "leader": "Pastor João",
-            "contact": "(99) 99999-9998",
-            "schedule": "Sábados às 19h30",
-            "whatsapp_link": "https://wa.me/5599999999998"
-        },
-        {
-            "id": "umhbb",
-            "name": "UMHBB",
-            "description": "União Masculina Batista, fortalecendo os homens na fé e liderança cristã.",
-            "leader": "Irmão Pedro",
-            "contact": "(99) 99999-9997",
-            "schedule": "Sábados às 19h30",
-            "whatsapp_link": "https://wa.me/5599999999997"
-        },
-        {
-            "id": "mensageiras",
-            "name": "Mensageiras do Rei",
-            "description": "Ministério infantil dedicado ao ensino bíblico para crianças.",
-            "leader": "Irmã Ana",
-            "contact": "(99) 99999-9996",
-            "schedule": "Sábados às 15h30",
-            "whatsapp_link": "https://wa.me/5599999999996"
-        }
-    ]
-    return ministries
+async def get_ministries(request: Request):
+    return conditional_response(request, MINISTRIES_BODY, STATIC_MAX_AGE, compression=COMPRESSION)
 
 # Media links endpoint
 @api_router.get("/media-links")
-async def get_media_links():
-    return {
-        "pregacoes": "https://drive.google.com/drive/folders/PREGACOES_FOLDER_ID",
-        "estudos": "https://drive.google.com/drive/folders/ESTUDOS_FOLDER_ID",
-        "videos": "https://drive.google.com/drive/folders/VIDEOS_FOLDER_ID"
-    }
+async def get_media_links(request: Request):
+    return conditional_response(request, MEDIA_LINKS_BODY, STATIC_MAX_AGE, compression=COMPRESSION)
 
 # Church info endpoint
 @api_router.get("/church-info")
-async def get_church_info():
-    return {
-        "name": "Primeira Igreja Batista do Cordeiro",
-        "address": "R. Sete de Setembro, 451, São João dos Patos - MA, CEP 65665-000",
-        "phone": "(99) 99999-9999",
-        "instagram": "@pibdocordeiro",
-        "maps_link": "https://maps.google.com/?q=R.+Sete+de+Setembro,+451,+São+João+dos+Patos+-+MA"
+async def get_church_info(request: Request):
+    return conditional_response(request, CHURCH_INFO_BODY, STATIC_MAX_AGE, compression=COMPRESSION)
+
+# Delta sync for offline-first clients
+SYNC_LAG_SECONDS = float(os.environ.get('SYNC_LAG_SECONDS', 2.0))
+SYNC_SOURCES = [
+    SyncSource("events", {}, event_serializer.projection),
+    SyncSource("event_rules", {}, event_rule_serializer.projection),
+    SyncSource("prayer_requests", {"is_public": True, "is_approved": True}, prayer_request_serializer.projection),
+    SyncSource("reading_plan", {}, reading_plan_serializer.projection),
+]
+SYNC_SERIALIZERS = {
+    "events": event_serializer,
+    "event_rules": event_rule_serializer,
+    "prayer_requests": prayer_request_serializer,
+    "reading_plan": reading_plan_serializer,
+}
+
+@api_router.get("/sync")
+async def sync_changes(since: Optional[str] = None, limit: int = Query(500, ge=1, le=1000)):
+    result = await fetch_changes(db, SYNC_SOURCES, since, limit, SYNC_LAG_SECONDS)
+    result["changes"] = {
+        name: SYNC_SERIALIZERS[name].load(docs) for name, docs in result["changes"].items()
     }
+    return result
+
+# Keyword search; recurring rules are returned as their next occurrence
+SEARCH_SOURCES = [
+    SearchSource("events", {}, event_serializer.projection),
+    SearchSource("event_rules", {}, event_rule_serializer.projection),
+    SearchSource("prayer_requests", {"is_public": True, "is_approved": True}, prayer_request_serializer.projection),
+]
+
+def search_result(doc: dict, now: datetime) -> Optional[SearchResult]:
+    source, score = doc.pop("source"), doc.pop("score")
+    if source == "prayer_requests":
+        return SearchResult(type="prayer_request", score=score, item=PrayerRequest(**doc))
+    if source == "event_rules":
+        doc = next_occurrence([doc], now, CHURCH_TZ)
+        if doc is None:
+            return None
+    return SearchResult(type="event", score=score, item=Event(**doc))
+
+@api_router.get("/search", response_model=List[SearchResult])
+async def search_content(
+    response: Response,
+    q: str = Query(..., min_length=2, max_length=100),
+    after: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=50),
+):
+    query = " ".join(q.lower().split())
+
+    async def load():
+        docs, next_cursor = await search(db, SEARCH_SOURCES, query, limit, after)
+        now = datetime.utcnow()
+        return [result for result in (search_result(doc, now) for doc in docs) if result], next_cursor
+
+    results, next_cursor = await cache.get_or_load(("search", query, limit, after), load)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return results
+
+# Retention: heartbeats expire via TTL, old prayer requests move to an archive
+RETENTION_ENABLED = os.environ.get('RETENTION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+STATUS_CHECK_TTL = timedelta(days=int(os.environ.get('STATUS_CHECK_TTL_DAYS', 30)))
+
+def on_prayer_requests_archived(ids: List[str]) -> None:
+    relay.invalidate("prayer_requests", "search")
+
+prayer_archiver = PrayerArchiver(
+    max_age=timedelta(days=int(os.environ.get('PRAYER_ARCHIVE_AFTER_DAYS', 180))),
+    batch_size=int(os.environ.get('PRAYER_ARCHIVE_BATCH_SIZE', 500)),
+    interval=float(os.environ.get('PRAYER_ARCHIVE_INTERVAL_SECONDS', 3600)),
+    on_archived=on_prayer_requests_archived,
+)
+
+# Streaming exports for admin data pulls; EXPORT_TOKEN, when set, must be sent
+# as X-Export-Token. Prayer exports include private requests and are only
+# served once a token is configured.
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+EXPORT_TOKEN = os.environ.get('EXPORT_TOKEN')
+EXPORT_SOURCES = {
+    "events": ExportSource("events", "date", list(Event.model_fields)),
+    "prayer-requests": ExportSource("prayer_requests", "created_at", list(PrayerRequest.model_fields)),
+    "status": ExportSource("status_checks", "timestamp", list(StatusCheck.model_fields)),
+}
+EXPORTS_REQUIRING_TOKEN = {"prayer-requests"}
+
+@api_router.get("/export/{name}")
+async def export_data(
+    name: Literal["events", "prayer-requests", "status"],
+    format: Literal["ndjson", "csv"] = "ndjson",
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+    x_export_token: Optional[str] = Header(None),
+):
+    if not EXPORT_TOKEN and name in EXPORTS_REQUIRING_TOKEN:
+        raise HTTPException(status_code=404, detail="Export not enabled")
+    if EXPORT_TOKEN and not hmac.compare_digest((x_export_token or "").encode(), EXPORT_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid export token")
+    source = EXPORT_SOURCES[name]
+    query = export_query(source, naive_utc(from_), naive_utc(to))
+    rows = export_rows(db[source.collection], source, query, format, EXPORT_BATCH_SIZE)
+    return StreamingResponse(
+        rows,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{format}"'},
+    )
+
+# Dashboard stats: one daily_stats document per day
+@api_router.get("/stats")
+async def get_stats(days: int = Query(84, ge=1, le=366)):
+    last_day = local_day(CHURCH_TZ)
+    rows = await load_daily_stats(db[DAILY_STATS], last_day - timedelta(days=days - 1), last_day)
+    return {"days": rows, "weeks": weekly_totals(rows)}
+
+# Home screen endpoint: every section in one round trip
+HOME_SECTION_TIMEOUT = float(os.environ.get('HOME_SECTION_TIMEOUT_SECONDS', 1.0))
+HOME_PRAYER_REQUESTS_LIMIT = 5
+
+async def get_latest_prayer_requests():
+    requests, _ = await load_public_prayer_requests(None, HOME_PRAYER_REQUESTS_LIMIT)
+    return with_pending_prayers(requests)
+
+async def get_church_info_content():
+    return CHURCH_INFO
+
+async def run_home_section(name: str, loader, timeout: float):
+    """Return (name, value, error, milliseconds); a failed or slow section
+    yields None plus an error label instead of failing the whole response."""
+    started = time.perf_counter()
+    value, error = None, None
+    try:
+        value = await asyncio.wait_for(loader(), timeout)
+    except asyncio.TimeoutError:
+        error = "timeout"
+        logger.warning("Home section %s timed out after %.2fs", name, timeout)
+    except Exception:
+        error = "error"
+        logger.exception("Home section %s failed", name)
+    return name, value, error, (time.perf_counter() - started) * 1000
+
+@api_router.get("/home")
+async def get_home(response: Response):
+    sections = {
+        "next_event": get_next_event,
+        "today_reading": get_today_reading,
+        "prayer_requests": get_latest_prayer_requests,
+        "church_info": get_church_info_content,
+    }
+    results = await asyncio.gather(
+        *(run_home_section(name, loader, HOME_SECTION_TIMEOUT) for name, loader in sections.items())
+    )
+
+    home = {}
+    errors = {}
+    timings = []
+    for name, value, error, elapsed_ms in results:
+        home[name] = value
+        if error:
+            errors[name] = error
+        timings.append(f"{name};dur={elapsed_ms:.1f}")
+    home["errors"] = errors
+    response.headers["Server-Timing"] = ", ".join(timings)
+    return home
 
 # Include the router in the main app
 app.include_router(api_router)
 
+# Prometheus metrics
+loop_monitor = EventLoopMonitor()
+REGISTRY.add_collector(lambda: stats_gauges("read_cache", "Read cache counter", cache.stats()))
+REGISTRY.add_collector(lambda: stats_gauges("status_buffer", "Status write buffer", status_buffer.stats()))
+REGISTRY.add_collector(lambda: stats_gauges("daily_counters", "Dashboard counter buffer", daily_counters.stats()))
+REGISTRY.add_collector(lambda: stats_gauges("prayer_counters", "Prayer tap counter buffer", prayer_counters.stats()))
+REGISTRY.add_collector(lambda: stats_gauges("reminders", "Event reminder scheduler", reminder_scheduler.stats()))
+REGISTRY.add_collector(lambda: stats_gauges("prayer_archive", "Prayer request archiver", prayer_archiver.stats()))
+REGISTRY.add_collector(lambda: stats_gauges("reading_plan", "In-memory reading plan index", reading_plan_index.stats()))
+REGISTRY.add_collector(lambda: stats_gauges("prayer_stream", "Prayer wall SSE broker", prayer_broker.stats()))
+REGISTRY.add_collector(lambda: stats_gauges("worker_relay", "Cross-worker relay", relay.stats()))
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+# Admission control: write rate limits and separate read/write concurrency caps.
+# Added before CORS so rejections still carry CORS headers; long-lived
+# streams are exempt so they do not hold a read slot.
+ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+admission = AdmissionController(
+    client_rate=float(os.environ.get('ADMISSION_CLIENT_WRITES_PER_SECOND', 2)),
+    client_burst=float(os.environ.get('ADMISSION_CLIENT_WRITE_BURST', 20)),
+    global_rate=float(os.environ.get('ADMISSION_GLOBAL_WRITES_PER_SECOND', 200)),
+    global_burst=float(os.environ.get('ADMISSION_GLOBAL_WRITE_BURST', 400)),
+    read_concurrency=int(os.environ.get('ADMISSION_READ_CONCURRENCY', 64)),
+    write_concurrency=int(os.environ.get('ADMISSION_WRITE_CONCURRENCY', 16)),
+    queue_timeout=float(os.environ.get('ADMISSION_QUEUE_TIMEOUT_SECONDS', 0.1)),
+)
+if ADMISSION_ENABLED:
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=admission,
+        exempt_paths=os.environ.get('ADMISSION_EXEMPT_PATHS', '/api/prayer-requests/stream').split(','),
+        # heartbeats and prayer taps only pass the global bucket; after a
+        # service the whole congregation uses the church Wi-Fi's single address
+        client_exempt_paths=os.environ.get(
+            'ADMISSION_CLIENT_EXEMPT_PATHS', '/api/status,/api/prayer-requests/{request_id}/pray'
+        ).split(','),
+        trusted_proxies=int(os.environ.get('ADMISSION_TRUSTED_PROXIES', 1)),
+    )
+    REGISTRY.add_collector(lambda: stats_gauges("admission", "Admission control", admission.stats()))
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Server-Timing", "Retry-After"],
+)
+# Compression sits inside metrics, so recorded latency includes it
+app.add_middleware(
+    CompressionMiddleware,
+    settings=COMPRESSION,
 )
+app.add_middleware(MetricsMiddleware)
 
 # Configure logging
 logging.basicConfig(
@@ -252,49 +1012,54 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global client, db
+    client = create_mongo_client()
+    db = client[os.environ['DB_NAME']]
+    status_buffer.collection = db.status_checks
+    daily_counters.collection = db[DAILY_STATS]
+    prayer_archiver.db = db
+    prayer_counters.collection = db.prayer_requests
+    reminder_scheduler.db = db
+    reading_plan_index.collection = db.reading_plan
+    relay.collection = db[RELAY_COLLECTION]
+
+    # Seed data, then create indexes; with several workers only one seeds.
+    # Seeding first lets it remove duplicates that block unique indexes.
+    await seed_database(db, MINISTRIES)
+    await ensure_indexes(db)
+    await log_index_report(db)
+
+    await reading_plan_index.reload()
+    await backfill_updated_at(db, SYNC_SERIALIZERS)
+    if RETENTION_ENABLED:
+        await ensure_status_ttl(db.status_checks, STATUS_CHECK_TTL)
+
+    if STATUS_BUFFER_ENABLED:
+        status_buffer.start()
+    daily_counters.start()
+    prayer_counters.start()
+    if REMINDERS_ENABLED:
+        reminder_scheduler.start()
+    if RETENTION_ENABLED:
+        prayer_archiver.start()
+    reading_plan_index.start()
+    relay.start()
+    loop_monitor.start()
+
+    yield
+
+    await loop_monitor.stop()
+    await reading_plan_index.stop()
+    await prayer_archiver.stop()
+    await reminder_scheduler.stop()
+    if STATUS_BUFFER_ENABLED:
+        await status_buffer.close()
+    await daily_counters.close()
+    await prayer_counters.close()
+    # last, so the invalidations sent by the final flushes still go out
+    await relay.stop()
     client.close()
 
-# Initialize some data
-@app.on_event("startup")
-async def startup_event():
-    # Create some sample events
-    sample_events = [
-        {
-            "id": str(uuid.uuid4()),
-            "title": "Culto de Domingo",
-            "description": "Culto de adoração e palavra",
-            "date": datetime.utcnow() + timedelta(days=(6 - datetime.utcnow().weekday()) % 7),
-            "time": "19:30",
-            "location": "Igreja PIB do Cordeiro",
-            "type": "culto"
-        },
-        {
-            "id": str(uuid.uuid4()),
-            "title": "EBD - Escola Bíblica Dominical",
-            "description": "Estudo bíblico para toda família",
-            "date": datetime.utcnow() + timedelta(days=(6 - datetime.utcnow().weekday()) % 7),
-            "time": "09:00",
-            "location": "Igreja PIB do Cordeiro",
-            "type": "estudo"
-        }
-    ]
-    
-    # Check if events exist, if not create them
-    for event_data in sample_events:
-        existing = await db.events.find_one({"title": event_data["title"]})
-        if not existing:
-            await db.events.insert_one(event_data)
-    
-    # Create reading plan if it doesn't exist
-    plan_exists = await db.reading_plan.find_one()
-    if not plan_exists:
-        # Simple 365-day reading plan
-        sample_readings = [
-            {"id": str(uuid.uuid4()), "day": 1, "book": "Gênesis", "chapters": "1-3", "date": datetime.utcnow()},
-            {"id": str(uuid.uuid4()), "day": 2, "book": "Gênesis", "chapters": "4-6", "date": datetime.utcnow() + timedelta(days=1)},
-            {"id": str(uuid.uuid4()), "day": 3, "book": "Gênesis", "chapters": "7-9", "date": datetime.utcnow() + timedelta(days=2)},
-        ]
-        for reading in sample_readings:
-            await db.reading_plan.insert_one(reading)
\ No newline at end of file
+app.router.lifespan_context = lifespan
@@ -0,0 +1,59 @@
+"""
+Daily rollups for the leadership dashboards.
+
+Write paths count app opens and prayer requests received, approved and
+answered into a `CounterBuffer` keyed by church-local day. The buffer
+folds them into one `daily_stats` document per day with `$inc` upserts,
+so `GET /api/stats` reads one document per day, whatever the size of the
+raw collections. Weekly totals are summed from the daily rows.
+"""
+
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Dict, List, Optional
+
+DAILY_STATS = "daily_stats"
+
+APP_OPENS = "app_opens"
+PRAYER_RECEIVED = "prayer_requests_received"
+PRAYER_APPROVED = "prayer_requests_approved"
+PRAYER_ANSWERED = "prayer_requests_answered"
+COUNTERS = [APP_OPENS, PRAYER_RECEIVED, PRAYER_APPROVED, PRAYER_ANSWERED]
+PRAYER_COUNTERS = [PRAYER_RECEIVED, PRAYER_APPROVED, PRAYER_ANSWERED]
+
+
+def local_day(tz: tzinfo, at: Optional[datetime] = None) -> date:
+    """Church-local calendar day of a naive UTC datetime (default: now)."""
+    at = at or datetime.utcnow()
+    return at.replace(tzinfo=timezone.utc).astimezone(tz).date()
+
+
+def day_key(tz: tzinfo, at: Optional[datetime] = None) -> str:
+    return local_day(tz, at).isoformat()
+
+
+async def load_daily_stats(collection, first_day: date, last_day: date) -> List[dict]:
+    """One row per day in [first_day, last_day], zero-filled."""
+    stored: Dict[str, dict] = {}
+    cursor = collection.find({"day": {"$gte": first_day.isoformat(), "$lte": last_day.isoformat()}}, {"_id": 0})
+    async for doc in cursor:
+        stored[doc["day"]] = doc
+
+    rows = []
+    day = first_day
+    while day <= last_day:
+        doc = stored.get(day.isoformat(), {})
+        rows.append({"day": day.isoformat(), **{name: doc.get(name, 0) for name in COUNTERS}})
+        day += timedelta(days=1)
+    return rows
+
+
+def weekly_totals(rows: List[dict]) -> List[dict]:
+    """Sum prayer counters per ISO week (Monday start) over daily rows."""
+    weeks: Dict[str, dict] = {}
+    for row in rows:
+        day = date.fromisoformat(row["day"])
+        week_start = (day - timedelta(days=day.weekday())).isoformat()
+        week = weeks.setdefault(week_start, {"week_start": week_start, **{name: 0 for name in PRAYER_COUNTERS}})
+        for name in PRAYER_COUNTERS:
+            week[name] += row[name]
+    return list(weeks.values())
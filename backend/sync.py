@@ -0,0 +1,128 @@
+"""
+Delta sync for offline-first clients.
+
+Synced documents carry `updated_at`, set by every write path. Deletions are
+recorded in the `tombstones` collection. A sync token holds one keyset
+position, `(updated_at, id)`, per source, so each call is one indexed
+range scan per collection. Writes from the last `lag` seconds are held
+back until the next call, so a write that commits late, or a worker whose
+clock is slightly behind, is not skipped.
+"""
+
+import base64
+import json
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException
+
+TOMBSTONES = "tombstones"
+
+Position = Tuple[datetime, str]
+
+
+class SyncSource(NamedTuple):
+    name: str
+    filter: dict
+    projection: dict
+
+
+def encode_token(positions: Dict[str, Position]) -> str:
+    payload = {name: [updated_at.isoformat(), last_id] for name, (updated_at, last_id) in positions.items()}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_token(token: str) -> Dict[str, Position]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        positions = {name: (datetime.fromisoformat(updated_at), last_id) for name, (updated_at, last_id) in payload.items()}
+        if not all(isinstance(last_id, str) for _, last_id in positions.values()):
+            raise ValueError(token)
+        return positions
+    except (ValueError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+
+
+def _after(position: Optional[Position]) -> dict:
+    if position is None:
+        return {}
+    updated_at, last_id = position
+    return {"$or": [{"updated_at": {"$gt": updated_at}}, {"updated_at": updated_at, "id": {"$gt": last_id}}]}
+
+
+async def _changes(collection, base: dict, position: Optional[Position], until: datetime, limit: int, projection: dict):
+    query = {"$and": [base, _after(position), {"updated_at": {"$lte": until}}]}
+    docs = await (
+        collection.find(query, {**projection, "updated_at": 1})
+        .sort([("updated_at", 1), ("id", 1)])
+        .limit(limit + 1)
+        .to_list(limit + 1)
+    )
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    if docs:
+        position = (docs[-1]["updated_at"], docs[-1]["id"])
+    return docs, position, has_more
+
+
+async def fetch_changes(
+    db,
+    sources: Iterable[SyncSource],
+    token: Optional[str],
+    limit: int,
+    lag: float = 2.0,
+    now: Optional[datetime] = None,
+) -> dict:
+    """Return {"changes": {source: [docs]}, "deleted": {collection: [ids]},
+    "token": str, "has_more": bool}. Without a token every live document is
+    returned (tombstones are skipped, there is nothing to delete yet)."""
+    positions = decode_token(token) if token else {}
+    until = (now or datetime.utcnow()) - timedelta(seconds=lag)
+    has_more = False
+
+    changes = {}
+    for source in sources:
+        docs, position, more = await _changes(
+            db[source.name], source.filter, positions.get(source.name), until, limit, source.projection
+        )
+        changes[source.name] = docs
+        if position is not None:
+            positions[source.name] = position
+        has_more = has_more or more
+
+    deleted: Dict[str, List[str]] = {}
+    if token:
+        tombstones, position, more = await _changes(
+            db[TOMBSTONES], {}, positions.get(TOMBSTONES), until, limit, {"_id": 0, "id": 1, "collection": 1}
+        )
+        for tombstone in tombstones:
+            deleted.setdefault(tombstone["collection"], []).append(tombstone["id"])
+        if position is not None:
+            positions[TOMBSTONES] = position
+        has_more = has_more or more
+    else:
+        # start new clients after any existing tombstones
+        latest = await db[TOMBSTONES].find_one(
+            {"updated_at": {"$lte": until}}, sort=[("updated_at", -1), ("id", -1)]
+        )
+        if latest:
+            positions[TOMBSTONES] = (latest["updated_at"], latest["id"])
+
+    return {"changes": changes, "deleted": deleted, "token": encode_token(positions), "has_more": has_more}
+
+
+async def record_tombstones(db, collection: str, ids: List[str], now: Optional[datetime] = None) -> None:
+    if not ids:
+        return
+    now = now or datetime.utcnow()
+    await db[TOMBSTONES].insert_many([{"collection": collection, "id": doc_id, "updated_at": now} for doc_id in ids])
+
+
+async def backfill_updated_at(db, collections: Iterable[str], now: Optional[datetime] = None) -> None:
+    """Stamp documents written before `updated_at` existed, so that they are
+    picked up by token-based sync."""
+    now = now or datetime.utcnow()
+    for name in collections:
+        await db[name].update_many({"updated_at": {"$exists": False}}, {"$set": {"updated_at": now}})
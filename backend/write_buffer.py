@@ -0,0 +1,83 @@
+"""
+Group-commit buffer for fire-and-forget inserts.
+
+Documents are queued in memory and written with one `insert_many` when the
+batch fills up or `flush_interval` seconds pass, whichever comes first.
+Callers are acknowledged as soon as the document is queued, so a document
+can be lost if the process dies before the next flush; `close()` drains
+everything still pending on a clean shutdown.
+"""
+
+import asyncio
+import logging
+import time
+from typing import List
+
+from periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBuffer:
+    def __init__(self, collection, batch_size: int = 200, flush_interval: float = 0.25, max_pending: int = 10000):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: List[dict] = []
+        self._loop = PeriodicTask(self.flush, flush_interval, "Write buffer flush")
+        # put() flushes directly under backpressure, concurrently with the loop
+        self._flush_lock = asyncio.Lock()
+        self.flushes = 0
+        self.written = 0
+        self.failed = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+
+    def start(self) -> None:
+        self._loop.start()
+
+    async def put(self, doc: dict) -> None:
+        # backpressure: if Mongo falls behind, writers wait for a flush
+        if len(self._pending) >= self.max_pending:
+            await self.flush()
+        self._pending.append(doc)
+        if len(self._pending) >= self.batch_size:
+            self._loop.wake()
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            while self._pending:
+                batch = self._pending[:self.batch_size]
+                del self._pending[:self.batch_size]
+                started = time.perf_counter()
+                try:
+                    await self.collection.insert_many(batch, ordered=False)
+                    self.written += len(batch)
+                except Exception:
+                    # already acknowledged to the client; nothing to retry against
+                    self.failed += len(batch)
+                    logger.exception("Failed to flush %d buffered %s documents", len(batch), self.collection.name)
+                elapsed = time.perf_counter() - started
+                self.flushes += 1
+                self.last_flush_seconds = elapsed
+                self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+                self.total_flush_seconds += elapsed
+
+    async def close(self) -> None:
+        await self._loop.stop()
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": len(self._pending),
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+            "flushes": self.flushes,
+            "written": self.written,
+            "failed": self.failed,
+            "last_flush_seconds": self.last_flush_seconds,
+            "max_flush_seconds": self.max_flush_seconds,
+            "avg_flush_seconds": self.total_flush_seconds / self.flushes if self.flushes else 0.0,
+        }
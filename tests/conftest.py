@@ -0,0 +1,35 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+@pytest.fixture(scope="session")
+def api():
+    """(server module, TestClient) over an in-memory database. The app's
+    background components are module-level and bind to one event loop, so
+    every test shares a single lifespan, as a worker process would."""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    from fastapi.testclient import TestClient
+
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "test_api")
+    os.environ.setdefault("ADMISSION_ENABLED", "false")
+    # tests flush prayer taps themselves
+    os.environ.setdefault("PRAYER_COUNTER_FLUSH_SECONDS", "3600")
+    import server
+
+    mongo = mongomock_motor.AsyncMongoMockClient()
+    create_mongo_client = server.create_mongo_client
+    server.create_mongo_client = lambda: mongo
+    server.cache.clear()
+    try:
+        with TestClient(server.app) as client:
+            yield server, client
+    finally:
+        server.create_mongo_client = create_mongo_client
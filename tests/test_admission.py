@@ -0,0 +1,78 @@
+import asyncio
+
+from admission import AdmissionController, AdmissionMiddleware, client_key
+
+
+def scope(path="/api/prayer-requests", method="POST", forwarded=None, client=("10.0.0.9", 5000)):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return {"type": "http", "method": method, "path": path, "headers": headers, "client": client}
+
+
+def test_client_key_uses_the_hop_added_by_the_trusted_proxy():
+    # the caller controls everything left of what our proxy appended
+    assert client_key(scope(forwarded="1.2.3.4, 203.0.113.7")) == "203.0.113.7"
+    assert client_key(scope(forwarded="1.2.3.4, 203.0.113.7, 10.0.0.2"), trusted_proxies=2) == "203.0.113.7"
+    assert client_key(scope(forwarded="203.0.113.7"), trusted_proxies=2) == "203.0.113.7"
+
+
+def test_client_key_without_forwarding():
+    assert client_key(scope()) == "10.0.0.9"
+    assert client_key(scope(forwarded="1.2.3.4"), trusted_proxies=0) == "10.0.0.9"
+    assert client_key(scope(client=None)) == "unknown"
+
+
+def run_writes(middleware, scopes):
+    statuses = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def run():
+        handler = middleware(app)
+        for request_scope in scopes:
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    statuses.append(message["status"])
+
+            await handler(request_scope, receive, send)
+
+    asyncio.run(run())
+    return statuses
+
+
+def test_rotating_spoofed_hops_share_one_bucket():
+    controller = AdmissionController(client_rate=0, client_burst=2)
+    statuses = run_writes(
+        lambda app: AdmissionMiddleware(app, controller),
+        [scope(forwarded=f"198.51.100.{i}, 203.0.113.7") for i in range(4)],
+    )
+    assert statuses == [200, 200, 429, 429]
+
+
+def test_heartbeats_skip_the_per_client_bucket():
+    controller = AdmissionController(client_rate=0, client_burst=2, global_rate=0, global_burst=5)
+    statuses = run_writes(
+        lambda app: AdmissionMiddleware(app, controller, client_exempt_paths=["/api/status"]),
+        [scope(path="/api/status", forwarded="203.0.113.7") for _ in range(6)],
+    )
+    # one NAT address, limited only by the global bucket
+    assert statuses == [200] * 5 + [503]
+
+
+def test_client_exemptions_match_route_templates():
+    controller = AdmissionController(client_rate=0, client_burst=1)
+    middleware = lambda app: AdmissionMiddleware(
+        app, controller, client_exempt_paths=["/api/status", "/api/prayer-requests/{request_id}/pray"]
+    )
+    taps = [scope(path=f"/api/prayer-requests/{n}/pray", forwarded="203.0.113.7") for n in range(5)]
+    assert run_writes(middleware, taps) == [200] * 5
+    # the template matches one segment, the whole path
+    others = [
+        scope(path="/api/prayer-requests/a/b/pray", forwarded="203.0.113.7"),
+        scope(path="/api/prayer-requests/1/pray/extra", forwarded="203.0.113.7"),
+    ]
+    assert run_writes(middleware, others) == [200, 429]
@@ -0,0 +1,120 @@
+"""
+Bulk approve and answer: per-item results, duplicate ids, and the daily
+counters, which must count each request once.
+
+Runs the app over mongomock-motor (see the `api` fixture); skipped when it
+is not installed.
+"""
+
+import asyncio
+
+import pytest
+
+
+def create_requests(client, count):
+    ids = []
+    for n in range(count):
+        response = client.post("/api/prayer-requests", json={"name": f"Irmão {n}", "message": "Oração"})
+        assert response.status_code == 200
+        ids.append(response.json()["id"])
+    return ids
+
+
+def counted(server, counter):
+    """Today's value of a daily counter: flushed rows plus the pending delta."""
+    today = server.day_key(server.CHURCH_TZ)
+    stored = asyncio.run(server.db[server.DAILY_STATS].find_one({"day": today})) or {}
+    return stored.get(counter, 0) + server.daily_counters.pending(today, counter)
+
+
+def statuses(response):
+    assert response.status_code == 200
+    return [result["status"] for result in response.json()["results"]]
+
+
+def test_bulk_approve_reports_each_item(api):
+    server, client = api
+    first, second = create_requests(client, 2)
+    assert client.patch(f"/api/prayer-requests/{first}/approve").status_code == 200
+    before = counted(server, server.PRAYER_APPROVED)
+
+    response = client.patch("/api/prayer-requests/bulk/approve", json=[first, second, "missing", second])
+    assert statuses(response) == ["unchanged", "approved", "not_found", "unchanged"]
+    assert response.json()["succeeded"] == 3
+    assert response.json()["failed"] == 1
+    assert counted(server, server.PRAYER_APPROVED) == before + 1
+
+
+def test_duplicate_ids_are_approved_once(api):
+    server, client = api
+    (request_id,) = create_requests(client, 1)
+    before = counted(server, server.PRAYER_APPROVED)
+    subscriber = server.prayer_broker.subscribe()
+    try:
+        response = client.patch("/api/prayer-requests/bulk/approve", json=[request_id, request_id])
+        assert statuses(response) == ["approved", "unchanged"]
+        assert [message[1] for message in subscriber.queue] == ["approved"]
+    finally:
+        server.prayer_broker.unsubscribe(subscriber)
+    assert counted(server, server.PRAYER_APPROVED) == before + 1
+    assert client.patch("/api/prayer-requests/bulk/approve", json=[request_id]).json()["results"][0]["status"] == "unchanged"
+
+
+def test_bulk_answer_counts_first_answers_only(api):
+    server, client = api
+    first, second = create_requests(client, 2)
+    assert client.patch(f"/api/prayer-requests/{first}/answer", params={"testimony": "Deus ouviu"}).status_code == 200
+    before = counted(server, server.PRAYER_ANSWERED)
+
+    answers = [
+        {"id": first, "testimony": "Deus ouviu"},
+        {"id": first, "testimony": "Testemunho novo"},
+        {"id": second, "testimony": "Curado"},
+        {"id": "missing", "testimony": "?"},
+    ]
+    response = client.patch("/api/prayer-requests/bulk/answer", json=answers)
+    assert statuses(response) == ["unchanged", "unchanged", "answered", "not_found"]
+    assert counted(server, server.PRAYER_ANSWERED) == before + 1
+
+    # a changed testimony is an update, but not a new answer
+    response = client.patch("/api/prayer-requests/bulk/answer", json=[{"id": first, "testimony": "Testemunho novo"}])
+    assert statuses(response) == ["answered"]
+    assert counted(server, server.PRAYER_ANSWERED) == before + 1
+    doc = asyncio.run(server.db.prayer_requests.find_one({"id": first}))
+    assert doc["testimony"] == "Testemunho novo"
+
+
+class RacingCollection:
+    """Approves `racer` through another write just before the bulk write lands."""
+
+    def __init__(self, collection, racer):
+        self.collection = collection
+        self.racer = racer
+
+    def find(self, *args, **kwargs):
+        return self.collection.find(*args, **kwargs)
+
+    async def bulk_write(self, operations, **kwargs):
+        await self.collection.update_one({"id": self.racer}, {"$set": {"is_approved": True}})
+        return await self.collection.bulk_write(operations, **kwargs)
+
+
+def test_a_concurrent_approve_wins_the_race(api):
+    server, client = api
+    raced, other = create_requests(client, 2)
+    collection = RacingCollection(server.db.prayer_requests, raced)
+
+    result, updated, previous = asyncio.run(
+        server.bulk_update_by_id(
+            collection, [raced, other], [{"is_approved": True}] * 2, "approved", server.prayer_request_serializer.projection
+        )
+    )
+    assert [item.status for item in result.results] == ["unchanged", "approved"]
+    assert [doc["id"] for doc in updated] == [other]
+    assert [doc["is_approved"] for doc in previous] == [False]
+
+
+@pytest.mark.parametrize("path", ["/api/prayer-requests/bulk/approve", "/api/prayer-requests/bulk/answer"])
+def test_empty_bulk_is_rejected(api, path):
+    _, client = api
+    assert client.patch(path, json=[]).status_code == 422
@@ -0,0 +1,170 @@
+import asyncio
+
+from cache import TTLCache
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class SlowLoader:
+    """Counts calls and blocks each load until `release()`."""
+
+    def __init__(self, value="value"):
+        self.value = value
+        self.calls = 0
+        self.started = asyncio.Event()
+        self.gate = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        self.started.set()
+        await self.gate.wait()
+        return f"{self.value}-{self.calls}"
+
+    def release(self):
+        self.gate.set()
+
+
+def test_concurrent_misses_share_one_load():
+    async def scenario():
+        cache = TTLCache()
+        loader = SlowLoader()
+        tasks = [asyncio.create_task(cache.get_or_load(("events", "list"), loader)) for _ in range(5)]
+        await loader.started.wait()
+        loader.release()
+        results = await asyncio.gather(*tasks)
+        return cache, loader, results
+
+    cache, loader, results = run(scenario())
+    assert loader.calls == 1
+    assert results == ["value-1"] * 5
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_hits_after_the_load():
+    async def scenario():
+        cache = TTLCache()
+        loader = SlowLoader()
+        loader.release()
+        first = await cache.get_or_load(("events",), loader)
+        second = await cache.get_or_load(("events",), loader)
+        return cache, loader, first, second
+
+    cache, loader, first, second = run(scenario())
+    assert first == second == "value-1"
+    assert loader.calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_cancelled_loading_caller_hands_the_load_to_a_waiter():
+    async def scenario():
+        cache = TTLCache()
+        loader = SlowLoader()
+        owner = asyncio.create_task(cache.get_or_load(("events",), loader))
+        await loader.started.wait()
+        waiter = asyncio.create_task(cache.get_or_load(("events",), loader))
+        await asyncio.sleep(0)
+        owner.cancel()
+        loader.started.clear()
+        # the waiter starts its own load once the owner is gone
+        await loader.started.wait()
+        loader.release()
+        return cache, loader, owner, await waiter
+
+    cache, loader, owner, value = run(scenario())
+    assert owner.cancelled()
+    assert loader.calls == 2
+    assert value == "value-2"
+    assert cache.stats()["size"] == 1
+
+
+def test_cancelled_waiter_does_not_cancel_the_load():
+    async def scenario():
+        cache = TTLCache()
+        loader = SlowLoader()
+        owner = asyncio.create_task(cache.get_or_load(("events",), loader))
+        await loader.started.wait()
+        waiter = asyncio.create_task(cache.get_or_load(("events",), loader))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        loader.release()
+        return loader, waiter, await owner
+
+    loader, waiter, value = run(scenario())
+    assert waiter.cancelled()
+    assert value == "value-1"
+    assert loader.calls == 1
+
+
+def test_invalidation_during_a_load_discards_the_result():
+    async def scenario():
+        cache = TTLCache()
+        loader = SlowLoader()
+        task = asyncio.create_task(cache.get_or_load(("events", "list"), loader))
+        await loader.started.wait()
+        cache.invalidate("events")
+        loader.release()
+        stale = await task
+        fresh = await cache.get_or_load(("events", "list"), loader)
+        return cache, loader, stale, fresh
+
+    cache, loader, stale, fresh = run(scenario())
+    # the caller still gets its value, but it is not cached
+    assert stale == "value-1"
+    assert fresh == "value-2"
+    assert loader.calls == 2
+
+
+def test_invalidating_another_namespace_keeps_the_result():
+    async def scenario():
+        cache = TTLCache()
+        loader = SlowLoader()
+        task = asyncio.create_task(cache.get_or_load(("events", "list"), loader))
+        await loader.started.wait()
+        cache.invalidate("prayer_requests")
+        loader.release()
+        await task
+        return cache
+
+    assert run(scenario()).stats()["size"] == 1
+
+
+def test_failed_load_reaches_waiters_and_is_not_cached():
+    async def failing():
+        await asyncio.sleep(0)
+        raise RuntimeError("mongo down")
+
+    async def scenario():
+        cache = TTLCache()
+        results = await asyncio.gather(
+            *(cache.get_or_load(("events",), failing) for _ in range(3)), return_exceptions=True
+        )
+        return cache, results
+
+    cache, results = run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.stats()["size"] == 0
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("cache.time.monotonic", lambda: now[0])
+
+    async def load():
+        return now[0]
+
+    async def scenario():
+        cache = TTLCache(maxsize=2, ttl=10)
+        await cache.get_or_load(("a",), load)
+        await cache.get_or_load(("b",), load)
+        await cache.get_or_load(("a",), load)  # a is now most recently used
+        await cache.get_or_load(("c",), load)  # evicts b
+        assert set(key[0] for key in cache._entries) == {"a", "c"}
+        now[0] += 11
+        assert await cache.get_or_load(("a",), load) == 1011.0
+        return cache
+
+    assert run(scenario()).stats()["evictions"] == 1
@@ -0,0 +1,49 @@
+import gzip
+
+from starlette.requests import Request
+
+from compression import CompressionSettings, choose_encoding
+from http_cache import CachedBody, conditional_response
+
+BODY = CachedBody.from_content([{"id": str(i), "book": "Gênesis", "chapters": "1-3"} for i in range(100)])
+
+
+def request(accept="gzip", etag=None):
+    headers = [(b"accept-encoding", accept.encode())]
+    if etag:
+        headers.append((b"if-none-match", etag.encode()))
+    return Request({"type": "http", "method": "GET", "path": "/api/reading-plan", "headers": headers})
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("br;q=0, gzip;q=0") is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding("*") in ("br", "gzip")
+
+
+def test_cached_bodies_use_the_configured_settings():
+    settings = CompressionSettings(minimum_size=100, gzip_level=1)
+    response = conditional_response(request(), BODY, 60, compression=settings)
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == "W/" + BODY.etag
+    assert response.body == gzip.compress(BODY.body, compresslevel=1, mtime=0)
+    assert gzip.decompress(response.body) == BODY.body
+
+
+def test_configured_minimum_size_leaves_small_bodies_alone():
+    settings = CompressionSettings(minimum_size=len(BODY.body) + 1)
+    response = conditional_response(request(), BODY, 60, compression=settings)
+    assert "content-encoding" not in response.headers
+    assert response.body == BODY.body
+
+
+def test_compressed_variants_are_kept_per_settings():
+    fast, small = CompressionSettings(gzip_level=1), CompressionSettings(gzip_level=9)
+    assert BODY.encoded("gzip", fast) is BODY.encoded("gzip", fast)
+    assert BODY.encoded("gzip", small) == gzip.compress(BODY.body, compresslevel=9, mtime=0)
+
+
+def test_weak_etag_still_revalidates():
+    compressed = conditional_response(request(), BODY, 60)
+    assert conditional_response(request(etag=compressed.headers["etag"]), BODY, 60).status_code == 304
@@ -0,0 +1,139 @@
+"""
+/api/events merges one-off events with recurring rule occurrences.
+
+Runs the app over mongomock-motor (see the `api` fixture); skipped when it
+is not installed.
+"""
+
+import base64
+import json
+import time
+from datetime import datetime
+
+import pytest
+
+# 2031-03-02 is a Sunday; the window is given with the church's -03:00 offset
+WINDOW = {"from": "2031-03-02T00:00:00-03:00", "to": "2031-03-30T00:00:00-03:00"}
+
+
+@pytest.fixture(scope="module")
+def client(api):
+    server, client = api
+    for day, time in [(3, "22:30:00"), (5, "12:00:00"), (9, "22:30:00"), (20, "09:00:00"), (29, "23:00:00")]:
+        response = client.post(
+            "/api/events",
+            json={
+                "title": f"Evento {day}",
+                "description": "Evento avulso",
+                "date": f"2031-03-{day:02d}T{time}",
+                "time": "19:30",
+                "type": "evento",
+            },
+        )
+        assert response.status_code == 200
+    response = client.post(
+        "/api/event-rules",
+        json={"title": "Culto", "description": "Culto de domingo", "weekday": 6, "time": "19:30", "type": "culto"},
+    )
+    assert response.status_code == 200
+    return client
+
+
+def test_offset_window_is_converted_to_utc(client):
+    events = client.get("/api/events", params={**WINDOW, "limit": 100}).json()
+    dates = [event["date"] for event in events]
+    assert dates == sorted(dates)
+    # 00:00 at -03:00 is 03:00 UTC: a 22:30 UTC event on 2 March would be outside
+    assert dates[0] >= "2031-03-02T03:00:00"
+    assert dates[-1] < "2031-03-30T03:00:00"
+    assert "2031-03-29T23:00:00" in dates
+    assert "2031-03-09T22:30:00" in dates
+
+    utc = client.get("/api/events", params={"from": "2031-03-02T03:00:00Z", "to": "2031-03-30T03:00:00Z", "limit": 100})
+    assert utc.status_code == 200
+    assert utc.json() == events
+
+
+def test_cursor_pages_cover_the_merged_list(client):
+    full = client.get("/api/events", params={**WINDOW, "limit": 100}).json()
+    assert any(event["rule_id"] for event in full) and any(not event["rule_id"] for event in full)
+
+    paged, after = [], None
+    while True:
+        params = {**WINDOW, "limit": 2, **({"after": after} if after else {})}
+        response = client.get("/api/events", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        paged += page
+        after = response.headers.get("X-Next-Cursor")
+        if not after:
+            break
+    assert [event["id"] for event in paged] == [event["id"] for event in full]
+
+
+def test_ties_on_date_are_ordered_by_id(client):
+    events = client.get("/api/events", params={**WINDOW, "limit": 100}).json()
+    # the one-off event on 9 March starts with the Sunday service
+    tied = [event for event in events if event["date"] == "2031-03-09T22:30:00"]
+    assert len(tied) >= 2
+    assert [event["id"] for event in tied] == sorted(event["id"] for event in tied)
+    keys = [(event["date"], event["id"]) for event in events]
+    assert keys == sorted(keys)
+
+
+def test_offset_datetimes_are_stored_as_naive_utc(client):
+    response = client.post(
+        "/api/event-rules",
+        json={
+            "title": "Vigília",
+            "description": "Vigília mensal",
+            "weekday": 4,
+            "time": "22:00",
+            "type": "culto",
+            "starts_at": "2031-03-01T00:00:00-03:00",
+            "until": "2031-03-31T00:00:00Z",
+        },
+    )
+    assert response.status_code == 200
+    assert response.json()["starts_at"] == "2031-03-01T03:00:00"
+    assert response.json()["until"] == "2031-03-31T00:00:00"
+    assert datetime.fromisoformat(response.json()["starts_at"]).tzinfo is None
+
+
+def test_create_event_with_utc_designator(api, client):
+    server, _ = api
+    response = client.post(
+        "/api/events",
+        json={
+            "title": "Conferência",
+            "description": "Conferência anual",
+            "date": "2030-01-01T19:30:00.000Z",
+            "time": "16:30",
+            "type": "evento",
+        },
+    )
+    assert response.status_code == 200
+    created = response.json()
+    assert created["date"] == "2030-01-01T19:30:00"
+
+    stored = client.portal.call(server.db.events.find_one, {"id": created["id"]})
+    assert stored["date"] == datetime(2030, 1, 1, 19, 30)
+
+    # the "new event" reminder is queued for the future event
+    claim = f"{created['id']}:new"
+    for _ in range(50):
+        if client.portal.call(server.db.reminder_log.find_one, {"_id": claim}):
+            break
+        time.sleep(0.02)
+    else:
+        pytest.fail("no reminder was queued for the new event")
+
+
+@pytest.mark.parametrize("path", ["/api/events", "/api/prayer-requests", "/api/reading-plan"])
+def test_cursor_cannot_inject_query_operators(client, path):
+    payload = json.dumps(["v", {"$ne": None}, {"$ne": None}]).encode()
+    after = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+    response = client.get(path, params={"after": after})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
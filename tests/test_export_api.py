@@ -0,0 +1,37 @@
+"""
+/api/export access control. Prayer exports carry private requests, so they
+need a configured EXPORT_TOKEN.
+"""
+
+import orjson
+import pytest
+
+
+@pytest.fixture
+def client(api, monkeypatch):
+    server, client = api
+    client.post("/api/prayer-requests", json={"name": "Ana", "message": "Pela família", "is_public": False})
+    monkeypatch.setattr(server, "EXPORT_TOKEN", None)
+    return client
+
+
+def test_prayer_export_is_disabled_without_a_token(client):
+    response = client.get("/api/export/prayer-requests")
+    assert response.status_code == 404
+    assert "Pela família" not in response.text
+
+
+def test_other_exports_stay_open_without_a_token(client):
+    assert client.get("/api/export/events").status_code == 200
+
+
+def test_configured_token_is_required(api, client, monkeypatch):
+    server, _ = api
+    monkeypatch.setattr(server, "EXPORT_TOKEN", "s3cret")
+    assert client.get("/api/export/prayer-requests").status_code == 403
+    assert client.get("/api/export/events", headers={"X-Export-Token": "wrong"}).status_code == 403
+
+    response = client.get("/api/export/prayer-requests", headers={"X-Export-Token": "s3cret"})
+    assert response.status_code == 200
+    rows = [orjson.loads(line) for line in response.text.splitlines()]
+    assert any(row["message"] == "Pela família" and not row["is_public"] for row in rows)
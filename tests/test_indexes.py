@@ -0,0 +1,134 @@
+"""
+Checks that every query issued by the API is served by an index.
+
+Needs a reachable mongod (MONGO_URL, default mongodb://localhost:27017);
+the module is skipped otherwise.
+"""
+
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from indexes import ensure_indexes, audit_indexes
+
+MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+
+
+def _stages(plan):
+    yield plan.get("stage")
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _stages(child)
+
+
+@pytest.fixture(scope="module")
+def db_name():
+    sync_client = MongoClient(MONGO_URL, serverSelectionTimeoutMS=500)
+    try:
+        sync_client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip(f"no mongod reachable at {MONGO_URL}")
+
+    name = f"test_indexes_{uuid.uuid4().hex[:8]}"
+    db = sync_client[name]
+    now = datetime.utcnow()
+    db.events.insert_many([
+        {"id": str(uuid.uuid4()), "title": f"Evento {i}", "date": now + timedelta(days=i)}
+        for i in range(-5, 20)
+    ])
+    db.prayer_requests.insert_many([
+        {
+            "id": str(uuid.uuid4()),
+            "is_public": i % 2 == 0,
+            "is_approved": i % 3 == 0,
+            "created_at": now - timedelta(hours=i),
+        }
+        for i in range(30)
+    ])
+    db.reading_plan.insert_many([{"id": str(uuid.uuid4()), "day": d} for d in range(1, 31)])
+
+    async def create():
+        client = AsyncIOMotorClient(MONGO_URL)
+        await ensure_indexes(client[name])
+        client.close()
+
+    asyncio.run(create())
+    yield name
+    sync_client.drop_database(name)
+    sync_client.close()
+
+
+def _explain(db_name, collection, filter, sort=None):
+    client = MongoClient(MONGO_URL)
+    cursor = client[db_name][collection].find(filter)
+    if sort:
+        cursor = cursor.sort(sort)
+    plan = cursor.explain()["queryPlanner"]["winningPlan"]
+    client.close()
+    return set(_stages(plan))
+
+
+@pytest.mark.parametrize(
+    "collection, filter, sort",
+    [
+        # get_events
+        ("events", {}, [("date", 1), ("id", 1)]),
+        # get_next_event
+        ("events", {"date": {"$gte": datetime.utcnow()}}, [("date", 1)]),
+        # get_prayer_requests
+        ("prayer_requests", {"is_public": True, "is_approved": True}, [("created_at", -1), ("id", -1)]),
+        # approve_prayer_request / answer_prayer_request
+        ("prayer_requests", {"id": "some-id"}, None),
+        # seed upserts by day
+        ("reading_plan", {"day": 42}, None),
+        # ReadingPlanIndex.version
+        ("reading_plan", {}, [("updated_at", -1), ("id", -1)]),
+        # get_status_checks
+        ("status_checks", {}, [("timestamp", 1), ("id", 1)]),
+        # sync_changes
+        ("events", {"updated_at": {"$lte": datetime.utcnow()}}, [("updated_at", 1), ("id", 1)]),
+        (
+            "prayer_requests",
+            {"is_public": True, "is_approved": True, "updated_at": {"$lte": datetime.utcnow()}},
+            [("updated_at", 1), ("id", 1)],
+        ),
+        ("tombstones", {"updated_at": {"$lte": datetime.utcnow()}}, [("updated_at", 1), ("id", 1)]),
+        # archive_prayer_requests
+        (
+            "prayer_requests",
+            {"created_at": {"$lt": datetime.utcnow()}, "$or": [{"is_answered": True}, {"updated_at": {"$lt": datetime.utcnow()}}]},
+            [("created_at", 1)],
+        ),
+        # export_data
+        ("prayer_requests", {"created_at": {"$gte": datetime.utcnow()}}, [("created_at", 1), ("id", 1)]),
+        ("status_checks", {"timestamp": {"$gte": datetime.utcnow()}}, [("timestamp", 1), ("id", 1)]),
+        # get_stats
+        ("daily_stats", {"day": {"$gte": "2026-01-01", "$lte": "2026-03-31"}}, None),
+        # search_content
+        ("events", {"$text": {"$search": "culto"}}, None),
+        ("prayer_requests", {"$text": {"$search": "oracao"}, "is_public": True, "is_approved": True}, None),
+    ],
+)
+def test_route_queries_use_an_index(db_name, collection, filter, sort):
+    stages = _explain(db_name, collection, filter, sort)
+    assert "IXSCAN" in stages
+    assert "COLLSCAN" not in stages
+
+
+def test_audit_reports_nothing_missing(db_name):
+    async def run():
+        client = AsyncIOMotorClient(MONGO_URL)
+        report = await audit_indexes(client[db_name])
+        client.close()
+        return report
+
+    report = asyncio.run(run())
+    assert all(not entry["missing"] for entry in report.values())
@@ -0,0 +1,98 @@
+import asyncio
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from pagination import decode_cursor, encode_cursor, fetch_page, keyset_filter
+
+CREATED = datetime(2031, 3, 2, 22, 30, 15, 123456)
+
+
+@pytest.mark.parametrize("value", [CREATED, 42, "2031-03-02", None])
+def test_cursor_round_trip(value):
+    cursor = encode_cursor(value, "abc")
+    assert decode_cursor(cursor) == (value, "abc")
+    # URL-safe and unpadded, so it can go in a query string as is
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+
+def test_datetime_cursor_keeps_its_type():
+    value, _ = decode_cursor(encode_cursor(CREATED, None))
+    assert isinstance(value, datetime)
+    assert value == CREATED
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor!", base64.urlsafe_b64encode(b'{"a": 1}').decode(), "e30"])
+def test_invalid_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(cursor)
+    assert raised.value.status_code == 400
+
+
+def raw_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        ["v", {"$ne": None}, "abc"],
+        ["v", ["a", "b"], "abc"],
+        ["v", True, "abc"],
+        ["v", 7, {"$gt": ""}],
+        ["v", 7, 12],
+        ["d", {"$ne": None}, "abc"],
+        ["d", 1700000000, "abc"],
+        ["d", "yesterday", "abc"],
+        ["x", 7, "abc"],
+        ["v", 7],
+    ],
+)
+def test_cursor_with_operators_or_wrong_types_is_a_400(payload):
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(raw_cursor(payload))
+    assert raised.value.status_code == 400
+    with pytest.raises(HTTPException):
+        keyset_filter("created_at", 1, raw_cursor(payload))
+
+
+def test_scalar_cursors_are_accepted():
+    assert decode_cursor(raw_cursor(["v", 1.5, None])) == (1.5, None)
+    assert decode_cursor(raw_cursor(["d", CREATED.isoformat(), "abc"])) == (CREATED, "abc")
+
+
+def test_keyset_filter_ascending_and_descending():
+    cursor = encode_cursor(CREATED, "m")
+    assert keyset_filter("created_at", 1, cursor) == {
+        "$or": [{"created_at": {"$gt": CREATED}}, {"created_at": CREATED, "id": {"$gt": "m"}}]
+    }
+    assert keyset_filter("created_at", -1, cursor) == {
+        "$or": [{"created_at": {"$lt": CREATED}}, {"created_at": CREATED, "id": {"$lt": "m"}}]
+    }
+    assert keyset_filter("day", 1, encode_cursor(7, "x"), tiebreak=False) == {"day": {"$gt": 7}}
+
+
+@pytest.mark.parametrize("direction", [1, -1])
+def test_pages_break_ties_on_id(direction):
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    # three documents share each timestamp, so most page boundaries fall inside a tie
+    docs = [{"id": f"{letter}{i}", "created_at": datetime(2031, 3, i)} for i in range(1, 5) for letter in "cab"]
+
+    async def scenario():
+        collection = mongomock_motor.AsyncMongoMockClient()["test_pagination"].items
+        await collection.insert_many([dict(doc) for doc in docs])
+        pages, after = [], None
+        while True:
+            page, after = await fetch_page(collection, {}, "created_at", direction, 2, after, projection={"_id": 0})
+            pages.append(page)
+            if after is None:
+                return pages
+
+    pages = asyncio.run(scenario())
+    seen = [(doc["created_at"], doc["id"]) for page in pages for doc in page]
+    assert seen == sorted(((doc["created_at"], doc["id"]) for doc in docs), reverse=direction == -1)
+    assert all(len(page) == 2 for page in pages)
+    assert len(pages) == 6
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from counters import CounterBuffer
+from periodic import PeriodicTask
+from write_buffer import WriteBuffer
+
+
+def test_ticks_every_interval_and_on_wake():
+    async def scenario():
+        ticks = []
+
+        async def tick():
+            ticks.append(asyncio.get_running_loop().time())
+
+        task = PeriodicTask(tick, 0.05, "test")
+        task.start()
+        await asyncio.sleep(0.22)
+        periodic = len(ticks)
+        task.interval = 60
+        task.wake()
+        await asyncio.sleep(0.01)
+        woken = len(ticks) - periodic
+        await task.stop()
+        return periodic, woken
+
+    periodic, woken = asyncio.run(scenario())
+    assert periodic >= 2
+    assert woken == 1
+
+
+def test_immediate_first_tick_and_errors_do_not_stop_the_loop(caplog):
+    async def scenario():
+        calls = []
+
+        async def tick():
+            calls.append(1)
+            raise RuntimeError("boom")
+
+        task = PeriodicTask(tick, 0.02, "Flaky job", immediate=True)
+        task.start()
+        await asyncio.sleep(0.05)
+        await task.stop()
+        return calls
+
+    assert len(asyncio.run(scenario())) >= 2
+    assert "Flaky job failed" in caplog.text
+
+
+@pytest.mark.parametrize("cancel, finished", [(False, True), (True, False)])
+def test_stop_finishes_or_cancels_the_running_tick(cancel, finished):
+    async def scenario():
+        state = {"started": asyncio.Event(), "finished": False}
+
+        async def tick():
+            state["started"].set()
+            await asyncio.sleep(0.05)
+            state["finished"] = True
+
+        task = PeriodicTask(tick, 60, "slow", immediate=True)
+        task.start()
+        await state["started"].wait()
+        await task.stop(cancel=cancel)
+        return state["finished"]
+
+    assert asyncio.run(scenario()) is finished
+
+
+def test_buffers_drain_on_close():
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient()["test_periodic"]
+        writes = WriteBuffer(db.status_checks, batch_size=2, flush_interval=60)
+        counters = CounterBuffer(db.daily_stats, key_field="day", upsert=True, flush_interval=60)
+        writes.start()
+        counters.start()
+        for i in range(3):
+            counters.incr("2031-03-02", "app_opens")
+        # a full batch wakes the loop without waiting for the interval
+        await writes.put({"id": "1"})
+        await writes.put({"id": "2"})
+        await asyncio.sleep(0.01)
+        await writes.put({"id": "3"})
+        await asyncio.sleep(0.01)
+        early = await db.status_checks.count_documents({})
+        await writes.close()
+        await counters.close()
+        return early, await db.status_checks.count_documents({}), await db.daily_stats.find_one({"day": "2031-03-02"})
+
+    early, written, day = asyncio.run(scenario())
+    assert early == 2
+    assert written == 3
+    assert day["app_opens"] == 3
@@ -0,0 +1,71 @@
+"""
+"Orei por isso" taps: summed in a CounterBuffer, added to reads while
+pending, and written with one $inc per request on flush.
+
+Runs the app over mongomock-motor (see the `api` fixture); skipped when it
+is not installed.
+"""
+
+import asyncio
+
+import pytest
+
+
+@pytest.fixture
+def approved(api):
+    server, client = api
+    request_id = client.post("/api/prayer-requests", json={"name": "Maria", "message": "Pela família"}).json()["id"]
+    assert client.patch(f"/api/prayer-requests/{request_id}/approve").status_code == 200
+    return request_id
+
+
+def flush(client, server):
+    # on the app's event loop, like the background flush
+    client.portal.call(server.prayer_counters.flush)
+
+
+def stored_count(server, request_id):
+    return asyncio.run(server.db.prayer_requests.find_one({"id": request_id}))["prayed_count"]
+
+
+def listed_count(client, request_id):
+    requests = client.get("/api/prayer-requests", params={"fields": "prayed_count"}).json()
+    return next(request["prayed_count"] for request in requests if request["id"] == request_id)
+
+
+def test_taps_are_merged_until_the_flush(api, approved):
+    server, client = api
+    flush(client, server)
+    counts = [client.post(f"/api/prayer-requests/{approved}/pray").json()["prayed_count"] for _ in range(3)]
+    assert counts == [1, 2, 3]
+    assert server.prayer_counters.stats()["pending_keys"] == 1
+    assert server.prayer_counters.pending(approved, "prayed_count") == 3
+    assert stored_count(server, approved) == 0
+    # reads add the pending taps to the stored count
+    assert listed_count(client, approved) == 3
+
+    written = server.prayer_counters.stats()["written"]
+    flush(client, server)
+    assert server.prayer_counters.stats()["written"] == written + 1
+    assert server.prayer_counters.pending(approved, "prayed_count") == 0
+    assert stored_count(server, approved) == 3
+    assert listed_count(client, approved) == 3
+
+
+def test_flush_invalidates_cached_prayer_requests(api, approved):
+    server, client = api
+    listed_count(client, approved)
+    assert any(key[0] == "prayer_requests" for key in server.cache._entries)
+
+    client.post(f"/api/prayer-requests/{approved}/pray")
+    flush(client, server)
+    assert not any(key[0] == "prayer_requests" for key in server.cache._entries)
+    assert listed_count(client, approved) == 1
+
+
+def test_taps_on_hidden_requests_are_rejected(api):
+    server, client = api
+    pending = client.post("/api/prayer-requests", json={"name": "João", "message": "Emprego"}).json()["id"]
+    assert client.post(f"/api/prayer-requests/{pending}/pray").status_code == 404
+    assert client.post("/api/prayer-requests/missing/pray").status_code == 404
+    assert server.prayer_counters.pending(pending, "prayed_count") == 0
@@ -0,0 +1,138 @@
+import asyncio
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from reading_plan import ReadingPlanIndex
+from seed import generate_reading_plan
+
+TZ = ZoneInfo("America/Fortaleza")  # UTC-3
+
+
+def index_for(year):
+    index = ReadingPlanIndex(TZ)
+    index.load([{**reading, "id": f"day-{reading['day']}"} for reading in generate_reading_plan(year)])
+    return index
+
+
+@pytest.fixture
+def common_plan():
+    return index_for(2025)
+
+
+@pytest.fixture
+def leap_plan():
+    return index_for(2024)
+
+
+def test_today_stays_on_the_local_day_after_21h(common_plan):
+    # 20:30 and 21:30 on 10 June in Maranhão; UTC has already moved to 11 June at 21:00
+    for utc in (datetime(2025, 6, 10, 23, 30), datetime(2025, 6, 11, 0, 30), datetime(2025, 6, 11, 2, 59)):
+        today = common_plan.today(now=utc)
+        assert today["day"] == 161
+        assert today["date"] == datetime(2025, 6, 10)
+    assert common_plan.today(now=datetime(2025, 6, 11, 3))["day"] == 162
+
+
+def test_today_rolls_over_the_year_in_local_time(common_plan):
+    assert common_plan.today(now=datetime(2026, 1, 1, 2))["date"] == datetime(2025, 12, 31)
+    assert common_plan.today(now=datetime(2026, 1, 1, 2))["day"] == 365
+    assert common_plan.today(now=datetime(2026, 1, 1, 3))["day"] == 1
+
+
+def test_common_year_plan_in_a_leap_year(common_plan):
+    feb_29 = common_plan.for_date(date(2028, 2, 29))
+    assert feb_29["day"] == 60
+    assert feb_29["date"] == datetime(2028, 2, 29)
+    # 31 December is day 366: the plan's last day is read again
+    dec_30, dec_31 = common_plan.between(date(2028, 12, 30), date(2028, 12, 31))
+    assert dec_30["day"] == dec_31["day"] == 365
+    assert dec_31["date"] == datetime(2028, 12, 31)
+
+
+def test_leap_year_plan(leap_plan):
+    assert len(leap_plan) == 366
+    assert leap_plan.for_date(date(2024, 2, 29))["day"] == 60
+    assert leap_plan.for_date(date(2024, 12, 31))["day"] == 366
+    # in a common year the last entry is never reached
+    assert leap_plan.for_date(date(2025, 12, 31))["day"] == 365
+
+
+def test_between_crosses_the_new_year(common_plan):
+    entries = common_plan.between(date(2025, 12, 30), date(2026, 1, 2))
+    assert [entry["day"] for entry in entries] == [364, 365, 1, 2]
+    assert [entry["date"].date() for entry in entries] == [
+        date(2025, 12, 30), date(2025, 12, 31), date(2026, 1, 1), date(2026, 1, 2),
+    ]
+    assert common_plan.between(date(2026, 1, 2), date(2026, 1, 1)) == []
+
+
+def test_empty_index():
+    index = ReadingPlanIndex(TZ)
+    assert index.today() is None
+    assert index.between(date(2025, 1, 1), date(2025, 1, 7)) == []
+    assert index.page(None, 10) == ([], None)
+
+
+def test_pages_follow_the_day_cursor(common_plan):
+    seen, after = [], None
+    while True:
+        docs, after = common_plan.page(after, 100)
+        seen += [doc["day"] for doc in docs]
+        if not after:
+            break
+    assert seen == list(range(1, 366))
+
+
+def test_pages_date_entries_like_for_date(common_plan, leap_plan):
+    for plan, year in [(common_plan, 2031), (common_plan, 2032), (leap_plan, 2031), (leap_plan, 2032)]:
+        docs, _ = plan.page(None, 366, year)
+        by_day = {doc["day"]: doc["date"] for doc in docs}
+        for day, dated in by_day.items():
+            if day <= 365 or year == 2032:
+                assert plan.for_date(dated.date())["day"] == day
+        assert by_day[1] == datetime(year, 1, 1)
+        assert by_day[60] == (datetime(2032, 2, 29) if year == 2032 else datetime(2031, 3, 1))
+    # a 366-day plan in a common year: the last entry is never reached
+    docs, _ = leap_plan.page(None, 366, 2031)
+    assert docs[-1]["day"] == 366
+    assert docs[-1]["date"] == datetime(2031, 12, 31)
+
+
+def test_pages_default_to_the_current_local_year(common_plan):
+    docs, _ = common_plan.page(None, 1)
+    assert docs[0]["date"] == datetime(common_plan.today()["date"].year, 1, 1)
+    # the stored seed-year date is not changed in place
+    assert common_plan.for_date(date(2031, 1, 1))["date"] == datetime(2031, 1, 1)
+    assert common_plan._days[0]["date"] == datetime(2025, 1, 1)
+
+
+def test_refresh_reloads_only_when_the_collection_changes():
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    reloads = []
+
+    async def scenario():
+        collection = mongomock_motor.AsyncMongoMockClient()["test_reading_plan"].reading_plan
+        await collection.insert_many(
+            [{**reading, "id": f"day-{reading['day']}", "updated_at": datetime(2025, 1, 1)} for reading in generate_reading_plan(2025)]
+        )
+        index = ReadingPlanIndex(TZ, on_reload=lambda: reloads.append(len(index)))
+        index.collection = collection
+        await index.reload()
+        unchanged = await index.refresh()
+        await collection.update_one({"day": 5}, {"$set": {"book": "Rute", "updated_at": datetime(2025, 2, 1)}})
+        changed = await index.refresh()
+        return index, unchanged, changed
+
+    index, unchanged, changed = asyncio.run(scenario())
+    assert (unchanged, changed) == (False, True)
+    assert index.for_date(date(2025, 1, 5))["book"] == "Rute"
+    assert reloads == [365, 365]
+
+
+def test_list_and_today_agree_on_the_date(api):
+    _, client = api
+    today = client.get("/api/reading-plan/today").json()
+    listed = client.get("/api/reading-plan", params={"limit": 366}).json()
+    assert next(entry for entry in listed if entry["day"] == today["day"])["date"] == today["date"]
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from recurrence import expand_rule, expand_rules, naive_utc, next_occurrence
+
+TZ = ZoneInfo("America/Fortaleza")  # UTC-3, no DST
+
+# 2031-03-02 is a Sunday
+SUNDAY = datetime(2031, 3, 2)
+
+
+def rule(**overrides):
+    return {
+        "id": "rule-1",
+        "title": "Culto",
+        "description": "Culto de domingo",
+        "weekday": 6,
+        "time": "19:30",
+        "location": "Igreja PIB do Cordeiro",
+        "type": "culto",
+        **overrides,
+    }
+
+
+def dates(occurrences):
+    return [occurrence["date"] for occurrence in occurrences]
+
+
+def test_weekly_rule_resolves_local_time_to_utc():
+    occurrences = list(expand_rule(rule(), SUNDAY, SUNDAY + timedelta(days=21), TZ))
+    assert dates(occurrences) == [
+        datetime(2031, 3, 2, 22, 30),
+        datetime(2031, 3, 9, 22, 30),
+        datetime(2031, 3, 16, 22, 30),
+    ]
+    assert occurrences[0]["id"] == "rule-1:20310302"
+    assert occurrences[0]["rule_id"] == "rule-1"
+
+
+def test_start_and_end_bounds():
+    # start is inclusive, end exclusive
+    occurs = datetime(2031, 3, 2, 22, 30)
+    assert dates(expand_rule(rule(), occurs, occurs + timedelta(weeks=1), TZ)) == [occurs]
+    assert dates(expand_rule(rule(), occurs + timedelta(minutes=1), occurs + timedelta(weeks=1), TZ)) == []
+
+
+def test_local_evening_occurrence_after_utc_midnight():
+    # 23:00 in Fortaleza on Sunday is 02:00 UTC on Monday
+    start = datetime(2031, 3, 3)
+    assert dates(expand_rule(rule(time="23:00"), start, start + timedelta(days=7), TZ)) == [datetime(2031, 3, 3, 2)]
+
+
+def test_interval_weeks_counts_from_starts_at():
+    biweekly = rule(interval_weeks=2, starts_at=datetime(2031, 3, 9))
+    expected = [datetime(2031, 3, 9, 22, 30), datetime(2031, 3, 23, 22, 30), datetime(2031, 4, 6, 22, 30)]
+    assert dates(expand_rule(biweekly, SUNDAY, datetime(2031, 4, 7), TZ)) == expected
+    # a window opening in an off week skips to the next on week
+    assert dates(expand_rule(biweekly, datetime(2031, 3, 10), datetime(2031, 4, 7), TZ)) == expected[1:]
+
+
+def test_starts_at_in_the_future_is_the_first_occurrence():
+    later = rule(starts_at=datetime(2031, 3, 20))
+    assert dates(expand_rule(later, SUNDAY, datetime(2031, 4, 1), TZ)) == [
+        datetime(2031, 3, 23, 22, 30),
+        datetime(2031, 3, 30, 22, 30),
+    ]
+
+
+def test_until_is_inclusive_and_ends_an_open_window():
+    ending = rule(until=datetime(2031, 3, 16, 22, 30))
+    assert dates(expand_rule(ending, SUNDAY, None, TZ)) == [
+        datetime(2031, 3, 2, 22, 30),
+        datetime(2031, 3, 9, 22, 30),
+        datetime(2031, 3, 16, 22, 30),
+    ]
+
+
+def test_offset_inputs_match_naive_utc():
+    naive = list(expand_rule(rule(), SUNDAY, SUNDAY + timedelta(days=14), TZ))
+    offset = timezone(timedelta(hours=-3))
+    aware = list(
+        expand_rule(
+            rule(),
+            datetime(2031, 3, 1, 21, tzinfo=offset),
+            datetime(2031, 3, 15, 21, tzinfo=offset),
+            TZ,
+        )
+    )
+    assert aware == naive
+    assert all(occurrence["date"].tzinfo is None for occurrence in aware)
+
+    bounded = rule(
+        interval_weeks=2,
+        starts_at=datetime(2031, 3, 9, tzinfo=timezone.utc),
+        until=datetime(2031, 3, 23, 19, 30, tzinfo=offset),
+    )
+    assert dates(expand_rule(bounded, SUNDAY, None, TZ)) == [
+        datetime(2031, 3, 9, 22, 30),
+        datetime(2031, 3, 23, 22, 30),
+    ]
+
+
+def test_naive_utc():
+    assert naive_utc(None) is None
+    assert naive_utc(SUNDAY) is SUNDAY
+    assert naive_utc(datetime(2031, 3, 1, 21, tzinfo=timezone(timedelta(hours=-3)))) == SUNDAY
+
+
+def test_expand_rules_merges_by_date_then_id():
+    rules = [rule(id="b"), rule(id="a"), rule(id="c", weekday=2, time="20:00")]
+    occurrences = list(expand_rules(rules, SUNDAY, SUNDAY + timedelta(days=8), TZ))
+    assert [o["id"] for o in occurrences] == ["a:20310302", "b:20310302", "c:20310305", "a:20310309", "b:20310309"]
+
+
+def test_next_occurrence():
+    assert next_occurrence([rule(), rule(id="x", weekday=2)], SUNDAY, TZ)["id"] == "rule-1:20310302"
+    assert next_occurrence([rule(until=SUNDAY)], SUNDAY, TZ) is None
@@ -0,0 +1,207 @@
+"""
+Two workers sharing one database through WorkerRelay (mongomock-motor).
+Polls are driven by hand instead of by the background loop.
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from broker import Broker
+from cache import TTLCache
+from relay import WorkerRelay
+
+from .conftest import BACKEND_DIR
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+
+class Worker:
+    def __init__(self, db, name):
+        self.broker = Broker(worker=name)
+        self.cache = TTLCache()
+        self.relay = WorkerRelay(self.broker, self.cache)
+        self.relay.collection = db.worker_relay
+
+    async def settle(self):
+        # let fire-and-forget relay inserts land
+        await asyncio.gather(*self.relay._writes)
+
+
+async def cached(cache, key, value):
+    async def load():
+        return value
+
+    return await cache.get_or_load(key, load)
+
+
+def run(scenario):
+    async def main():
+        db = mongomock_motor.AsyncMongoMockClient()["test_relay"]
+        a, b = Worker(db, "aaaaaaaa"), Worker(db, "bbbbbbbb")
+        await a.relay.poll()
+        await b.relay.poll()
+        return await scenario(a, b)
+
+    return asyncio.run(main())
+
+
+def test_events_reach_subscribers_on_other_workers():
+    async def scenario(a, b):
+        subscriber = b.broker.subscribe()
+        a.relay.publish("approved", {"id": "p1"})
+        await a.settle()
+        await b.relay.poll()
+        await b.relay.poll()  # already applied ids are skipped on the next poll
+        return list(subscriber.queue), list(a.broker._replay)
+
+    received, published = run(scenario)
+    assert len(received) == 1
+    assert received[0] == published[0]
+    assert json.loads(received[0][2]) == {"id": "p1"}
+
+
+def test_last_event_id_resumes_on_another_worker():
+    async def scenario(a, b):
+        ids = []
+        for n in range(3):
+            ids.append(a.broker.publish("approved", {"n": n})[0])
+            a.relay._send({"_id": ids[-1], "kind": "event", "event": "approved", "data": json.dumps({"n": n})})
+        await a.settle()
+        await b.relay.poll()
+        resumed = b.broker.subscribe(last_event_id=ids[0])
+        return ids, [message[0] for message in resumed.queue]
+
+    ids, resumed = run(scenario)
+    assert ids == sorted(ids)
+    assert resumed == ids[1:]
+
+
+def test_ids_sort_by_time_across_workers():
+    async def scenario(a, b):
+        first = a.broker.next_id()
+        await asyncio.sleep(0.002)
+        second = b.broker.next_id()
+        await asyncio.sleep(0.002)
+        return first, second, a.broker.next_id()
+
+    first, second, third = run(scenario)
+    assert first < second < third
+
+
+def test_invalidations_reach_other_workers():
+    async def scenario(a, b):
+        await cached(a.cache, ("events", "list"), "a-old")
+        await cached(b.cache, ("events", "list"), "b-old")
+        await cached(b.cache, ("ministries",), "kept")
+        a.relay.invalidate("events", "search")
+        await a.settle()
+        await b.relay.poll()
+        return (
+            await cached(a.cache, ("events", "list"), "a-new"),
+            await cached(b.cache, ("events", "list"), "b-new"),
+            await cached(b.cache, ("ministries",), "reloaded"),
+        )
+
+    assert run(scenario) == ("a-new", "b-new", "kept")
+
+
+def test_late_inserts_within_the_grace_window_are_applied():
+    async def scenario(a, b):
+        subscriber = b.broker.subscribe()
+        early_id = a.broker.next_id()
+        await asyncio.sleep(0.005)
+        a.relay.publish("approved", {"n": 2})
+        await a.settle()
+        await b.relay.poll()
+        # the earlier-stamped message becomes visible only after the later one
+        a.relay._send({"_id": early_id, "kind": "event", "event": "approved", "data": json.dumps({"n": 1})})
+        await a.settle()
+        await b.relay.poll()
+        return [json.loads(message[2])["n"] for message in subscriber.queue]
+
+    assert run(scenario) == [2, 1]
+
+
+def test_own_messages_are_not_applied_twice():
+    async def scenario(a, b):
+        subscriber = a.broker.subscribe()
+        a.relay.publish("approved", {"id": "p1"})
+        await a.settle()
+        await a.relay.poll()
+        return len(subscriber.queue), a.relay.stats()
+
+    delivered, stats = run(scenario)
+    assert delivered == 1
+    assert stats["sent"] == 1
+    assert stats["received"] == 0
+
+
+def test_startup_loads_recent_events_for_replay():
+    async def scenario(a, b):
+        first = a.broker.publish("approved", {"n": 1})
+        a.relay._send({"_id": first[0], "kind": "event", "event": "approved", "data": first[2]})
+        a.relay.publish("answered", {"n": 2})
+        await a.settle()
+        late = Worker(a.relay.collection.database, "cccccccc")
+        await late.relay.poll()
+        return first[0], [message[1] for message in late.broker.subscribe(last_event_id=first[0]).queue]
+
+    _, replayed = run(scenario)
+    assert replayed == ["answered"]
+
+
+# A full app lifespan in its own process: the session `api` fixture owns
+# this process's. The client close records whether relay writes were
+# still in flight, since a real client would drop them.
+SHUTDOWN_SCRIPT = """
+import asyncio, json, os
+from datetime import datetime
+import mongomock_motor
+from fastapi.testclient import TestClient
+import server
+
+mongo = mongomock_motor.AsyncMongoMockClient()
+server.create_mongo_client = lambda: mongo
+at_close = {}
+mongo.close = lambda: at_close.update(server.relay.stats())
+with TestClient(server.app) as client:
+    request_id = client.post("/api/prayer-requests", json={"name": "Ana", "message": "Saúde"}).json()["id"]
+    client.patch(f"/api/prayer-requests/{request_id}/approve")
+    client.post(f"/api/prayer-requests/{request_id}/pray")
+    tapped_at = datetime.utcnow()
+
+db = mongo[os.environ["DB_NAME"]]
+def find(collection, query):
+    return asyncio.run(collection.find_one(query, {"_id": 0}))
+invalidation = find(db.worker_relay, {"kind": "invalidate", "namespaces": ["prayer_requests"], "created_at": {"$gte": tapped_at}})
+print(json.dumps({
+    "invalidated": invalidation is not None,
+    "pending_at_close": at_close["pending_writes"],
+    "prayed_count": find(db.prayer_requests, {"id": request_id})["prayed_count"],
+}))
+"""
+
+
+def test_shutdown_relays_the_final_counter_flush():
+    env = {
+        **os.environ,
+        "MONGO_URL": "mongodb://localhost:27017",
+        "DB_NAME": "test_shutdown",
+        "ADMISSION_ENABLED": "false",
+        # only the flush on shutdown writes the tap
+        "PRAYER_COUNTER_FLUSH_SECONDS": "3600",
+    }
+    completed = subprocess.run(
+        [sys.executable, "-c", SHUTDOWN_SCRIPT], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert completed.returncode == 0, completed.stderr
+    assert json.loads(completed.stdout.strip().splitlines()[-1]) == {
+        "invalidated": True,
+        "pending_at_close": 0,
+        "prayed_count": 1,
+    }
@@ -0,0 +1,75 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from reminders import MemoryTransport, PushError, PushTransport, ReminderScheduler
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+EVENT = {"id": "culto", "title": "Culto", "date": datetime(2031, 3, 2, 22, 30), "location": "Igreja"}
+
+
+class FlakyTransport(MemoryTransport):
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+        self.attempts = 0
+
+    async def send(self, messages):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise PushError("unavailable")
+        return await super().send(messages)
+
+
+async def no_events(start, end):
+    return []
+
+
+def scheduler(transport, **kwargs):
+    reminders = ReminderScheduler(transport, no_events, timezone(timedelta(hours=-3)), retry_backoff=0, **kwargs)
+    reminders.db = mongomock_motor.AsyncMongoMockClient()["test_reminders"]
+    return reminders
+
+
+def remind(reminders):
+    async def run():
+        await reminders.db.devices.insert_one({"token": "device"})
+        await reminders.remind(EVENT, "new")
+
+    asyncio.run(run())
+
+
+def test_transport_must_implement_send():
+    with pytest.raises(TypeError):
+        PushTransport()
+
+
+@pytest.mark.parametrize("failures, attempts, sent", [(0, 1, 1), (2, 3, 1), (3, 3, 0), (5, 3, 0)])
+def test_max_retries_bounds_the_attempts(failures, attempts, sent):
+    transport = FlakyTransport(failures)
+    reminders = scheduler(transport, max_retries=3)
+    remind(reminders)
+    assert transport.attempts == attempts
+    assert len(transport.sent) == sent
+    assert reminders.stats()["sent"] == sent
+    assert reminders.stats()["failed"] == 1 - sent
+    assert reminders.stats()["retries"] == attempts - 1
+
+
+def test_stop_sends_reminders_queued_during_the_last_tick():
+    transport = MemoryTransport()
+    reminders = scheduler(transport, interval=3600)
+
+    async def run():
+        await reminders.db.devices.insert_one({"token": "device"})
+        reminders.start()
+        await asyncio.sleep(0)
+        # the sender wakes to find itself stopping and ends without another tick
+        reminders.notify(EVENT, "new")
+        await reminders.stop()
+
+    asyncio.run(run())
+    assert [message.data for message in transport.sent] == [{"event_id": "culto", "kind": "new"}]
+    assert reminders.stats()["queue_depth"] == 0
@@ -0,0 +1,153 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from retention import PRAYER_ARCHIVE, PrayerArchiver, archive_prayer_requests
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+NOW = datetime(2031, 3, 2, 12)
+MAX_AGE = timedelta(days=365)
+OLD = NOW - timedelta(days=400)
+
+
+def request(request_id, created_at=OLD, updated_at=None, answered=False):
+    return {
+        "id": request_id,
+        "message": "Oração",
+        "is_answered": answered,
+        "created_at": created_at,
+        "updated_at": updated_at or created_at,
+    }
+
+
+REQUESTS = [
+    request("old-answered", answered=True, updated_at=NOW - timedelta(days=10)),
+    request("old-untouched"),
+    request("old-untouched-2", created_at=OLD + timedelta(days=1)),
+    # old but prayed for or edited recently, and not answered: stays
+    request("old-active", updated_at=NOW - timedelta(days=3)),
+    request("recent", created_at=NOW - timedelta(days=30)),
+]
+
+
+def ids(docs):
+    return sorted(doc["id"] for doc in docs)
+
+
+def run(scenario):
+    async def main():
+        db = mongomock_motor.AsyncMongoMockClient()["test_retention"]
+        await db.prayer_requests.insert_many([dict(doc) for doc in REQUESTS])
+        return await scenario(db)
+
+    return asyncio.run(main())
+
+
+async def contents(db):
+    return (
+        ids(await db.prayer_requests.find({}).to_list(None)),
+        await db[PRAYER_ARCHIVE].find({}, {"_id": 0}).to_list(None),
+        ids(await db.tombstones.find({}).to_list(None)),
+    )
+
+
+def test_eligible_requests_are_archived_then_deleted():
+    async def scenario(db):
+        archived = await archive_prayer_requests(db, MAX_AGE, batch_size=2, now=NOW)
+        return archived, await contents(db)
+
+    archived, (live, archive, tombstones) = run(scenario)
+    expected = ["old-answered", "old-untouched", "old-untouched-2"]
+    assert sorted(archived) == expected
+    assert live == ["old-active", "recent"]
+    assert ids(archive) == expected
+    assert all(doc["archived_at"] == NOW for doc in archive)
+    assert tombstones == expected
+
+
+def test_rerun_after_a_partial_run_completes_the_move():
+    async def scenario(db):
+        # a previous run copied a batch into the archive and died before deleting it
+        partial = await db.prayer_requests.find({"id": {"$in": ["old-answered", "old-untouched"]}}, {"_id": 0}).to_list(None)
+        await db[PRAYER_ARCHIVE].insert_many([{**doc, "archived_at": NOW - timedelta(hours=1)} for doc in partial])
+        archived = await archive_prayer_requests(db, MAX_AGE, batch_size=2, now=NOW)
+        again = await archive_prayer_requests(db, MAX_AGE, batch_size=2, now=NOW)
+        return archived, again, await contents(db)
+
+    archived, again, (live, archive, tombstones) = run(scenario)
+    assert sorted(archived) == ["old-answered", "old-untouched", "old-untouched-2"]
+    assert again == []
+    assert live == ["old-active", "recent"]
+    # the upsert replaced the partial copies instead of duplicating them
+    assert ids(archive) == ["old-answered", "old-untouched", "old-untouched-2"]
+    assert tombstones == ["old-answered", "old-untouched", "old-untouched-2"]
+
+
+def test_request_edited_during_the_run_stays_live():
+    class EditingCollection:
+        """Edits `old-untouched` between the archive write and the delete."""
+
+        def __init__(self, collection):
+            self.collection = collection
+
+        def find(self, *args, **kwargs):
+            return self.collection.find(*args, **kwargs)
+
+        async def bulk_write(self, operations, **kwargs):
+            await self.collection.update_one({"id": "old-untouched"}, {"$set": {"updated_at": NOW}})
+            return await self.collection.bulk_write(operations, **kwargs)
+
+    class Db:
+        def __init__(self, db):
+            self.db = db
+            self.prayer_requests = EditingCollection(db.prayer_requests)
+
+        def __getattr__(self, name):
+            return getattr(self.db, name)
+
+        def __getitem__(self, name):
+            return self.db[name]
+
+    async def scenario(db):
+        archived = await archive_prayer_requests(Db(db), MAX_AGE, batch_size=10, now=NOW)
+        return archived, await contents(db)
+
+    archived, (live, _, tombstones) = run(scenario)
+    assert sorted(archived) == ["old-answered", "old-untouched-2"]
+    assert "old-untouched" in live
+    assert tombstones == ["old-answered", "old-untouched-2"]
+
+
+def test_archiver_reports_archived_ids_and_holds_the_lock():
+    reported = []
+
+    async def scenario(db):
+        archiver = PrayerArchiver(MAX_AGE, batch_size=2, on_archived=reported.append)
+        archiver.db = db
+        first = await archiver.run_once(NOW)
+        second = await archiver.run_once(NOW + timedelta(minutes=1))
+        lock = await db.job_locks.find_one({})
+        return first, second, archiver.stats(), lock
+
+    first, second, stats, lock = run(scenario)
+    assert sorted(first) == ["old-answered", "old-untouched", "old-untouched-2"]
+    assert second == []
+    assert reported == [first]
+    assert (stats["runs"], stats["archived"]) == (2, 3)
+    # released after each run
+    assert lock is None
+
+
+def test_archiver_skips_the_run_while_another_worker_holds_the_lock():
+    async def scenario(db):
+        await db.job_locks.insert_one({"_id": "prayer_archive", "owner": "other", "expires_at": NOW + timedelta(minutes=5)})
+        archiver = PrayerArchiver(MAX_AGE)
+        archiver.db = db
+        return await archiver.run_once(NOW), await contents(db)
+
+    archived, (live, archive, _) = run(scenario)
+    assert archived == []
+    assert len(live) == len(REQUESTS)
+    assert archive == []
@@ -0,0 +1,91 @@
+"""
+The merged search ranking and its cursor. Text scoring is Mongo's job, so
+`$text` is left out: documents carry fixed scores and each source applies
+only the `_after` filter, sort and limit of its pipeline.
+"""
+
+import asyncio
+
+import pytest
+
+from pagination import encode_cursor
+from search import SearchSource, _after, search
+
+filtering = pytest.importorskip("mongomock.filtering")
+
+SOURCES = [SearchSource(name, {}, {}) for name in ("event_rules", "events", "prayer_requests")]
+DOCS = {
+    "events": [{"id": "e1", "score": 3.0}, {"id": "e2", "score": 1.5}, {"id": "e3", "score": 1.5}, {"id": "e4", "score": 0.75}],
+    "event_rules": [{"id": "r1", "score": 1.5}, {"id": "r2", "score": 0.75}],
+    "prayer_requests": [{"id": "p1", "score": 2.0}, {"id": "p2", "score": 1.5}, {"id": "p3", "score": 0.5}],
+}
+# score desc, then collection, then id
+RANKING = [
+    ("events", "e1"),
+    ("prayer_requests", "p1"),
+    ("event_rules", "r1"),
+    ("events", "e2"),
+    ("events", "e3"),
+    ("prayer_requests", "p2"),
+    ("event_rules", "r2"),
+    ("events", "e4"),
+    ("prayer_requests", "p3"),
+]
+
+
+def matches(source, cursor, doc):
+    return filtering.filter_applies(_after(source, cursor), doc)
+
+
+def test_no_cursor_matches_everything():
+    assert _after("events", None) == {}
+
+
+@pytest.mark.parametrize("position", range(len(RANKING)))
+def test_after_keeps_exactly_the_documents_ranked_later(position):
+    last_source, last_id = RANKING[position]
+    score = next(doc["score"] for doc in DOCS[last_source] if doc["id"] == last_id)
+    cursor = encode_cursor(score, f"{last_source}:{last_id}")
+    later = [
+        (source, doc["id"]) for source, docs in DOCS.items() for doc in docs if matches(source, cursor, doc)
+    ]
+    assert sorted(later, key=RANKING.index) == RANKING[position + 1:]
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def aggregate(self, pipeline):
+        after, limit = pipeline[2]["$match"], pipeline[4]["$limit"]
+        docs = sorted(
+            (dict(doc) for doc in self.docs if filtering.filter_applies(after, doc)),
+            key=lambda doc: (-doc["score"], doc["id"]),
+        )
+        return FakeCursor(docs[:limit])
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 4, 9, 10])
+def test_pages_follow_the_merged_ranking(limit):
+    db = {name: FakeCollection(docs) for name, docs in DOCS.items()}
+
+    async def scenario():
+        pages, after = [], None
+        while True:
+            page, after = await search(db, SOURCES, "oração", limit, after)
+            pages.append([(doc["source"], doc["id"]) for doc in page])
+            if after is None:
+                return pages
+
+    pages = asyncio.run(scenario())
+    assert [item for page in pages for item in page] == RANKING
+    assert all(len(page) == limit for page in pages[:-1])
+    assert 0 < len(pages[-1]) <= limit
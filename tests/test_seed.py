@@ -0,0 +1,95 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from indexes import ensure_indexes
+from seed import LEGACY_SAMPLE_EVENTS, seed_database
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+NOW = datetime(2031, 3, 2, 12)
+
+
+def event(sample, **overrides):
+    return {"id": overrides.pop("id"), "date": datetime(2024, 5, 5), **sample, **overrides}
+
+
+def run_seed(events):
+    async def run():
+        db = mongomock_motor.AsyncMongoMockClient()["test_seed"]
+        if events:
+            await db.events.insert_many(events)
+        await seed_database(db, [], now=NOW)
+        remaining = sorted(doc["id"] for doc in await db.events.find({}).to_list(None))
+        tombstones = sorted(doc["id"] for doc in await db.tombstones.find({}).to_list(None))
+        return remaining, tombstones
+
+    return asyncio.run(run())
+
+
+def test_baseline_samples_are_replaced_by_rules():
+    remaining, tombstones = run_seed([event(sample, id=f"sample-{i}") for i, sample in enumerate(LEGACY_SAMPLE_EVENTS)])
+    assert remaining == []
+    assert tombstones == ["sample-0", "sample-1"]
+
+
+def test_admin_created_services_are_kept():
+    culto = LEGACY_SAMPLE_EVENTS[0]
+    remaining, tombstones = run_seed([
+        event(culto, id="sample"),
+        # later services posted by admins, identical apart from the date
+        event(culto, id="admin-1", date=datetime(2024, 5, 12)),
+        event(culto, id="admin-2", date=datetime(2024, 5, 19), description="Culto de Santa Ceia"),
+    ])
+    assert remaining == ["admin-1", "admin-2"]
+    assert tombstones == ["sample"]
+
+
+def test_first_event_that_differs_from_the_sample_is_kept():
+    # the sample was deleted long ago; an admin's edited service is now first
+    culto = LEGACY_SAMPLE_EVENTS[0]
+    remaining, tombstones = run_seed([
+        event(culto, id="admin-1", time="18:00"),
+        event(culto, id="admin-2"),
+    ])
+    assert remaining == ["admin-1", "admin-2"]
+    assert tombstones == []
+
+
+def test_duplicate_reading_days_are_removed_before_indexing():
+    async def run():
+        db = mongomock_motor.AsyncMongoMockClient()["test_seed_days"]
+        # racing seeders each inserted day 1 and day 2
+        await db.reading_plan.insert_many([
+            {"id": "day-1", "day": 1},
+            {"id": "day-1-copy", "day": 1},
+            {"id": "day-2", "day": 2},
+            {"id": "day-2-copy", "day": 2},
+            {"id": "day-2-copy-2", "day": 2},
+        ])
+        await seed_database(db, [], now=NOW)
+        await ensure_indexes(db)
+        days = [doc["day"] for doc in await db.reading_plan.find({}).sort("day", 1).to_list(None)]
+        kept = sorted(doc["id"] for doc in await db.reading_plan.find({"day": {"$lte": 2}}).to_list(None))
+        tombstones = sorted(doc["id"] for doc in await db.tombstones.find({}).to_list(None))
+        indexes = await db.reading_plan.index_information()
+        return days, kept, tombstones, indexes
+
+    days, kept, tombstones, indexes = asyncio.run(run())
+    assert days == list(range(1, 366))
+    assert kept == ["day-1", "day-2"]
+    assert tombstones == ["day-1-copy", "day-2-copy", "day-2-copy-2"]
+    assert "day_unique" in indexes
+
+
+def test_a_failing_index_does_not_block_the_others():
+    async def run():
+        db = mongomock_motor.AsyncMongoMockClient()["test_seed_indexes"]
+        await db.reading_plan.insert_many([{"id": "a", "day": 1}, {"id": "b", "day": 1}])
+        await ensure_indexes(db)
+        return await db.reading_plan.index_information()
+
+    indexes = asyncio.run(run())
+    assert "day_unique" not in indexes
+    assert {"id_unique", "updated_at_id"} <= set(indexes)
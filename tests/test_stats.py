@@ -0,0 +1,70 @@
+import asyncio
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from counters import CounterBuffer
+from stats import (
+    APP_OPENS, PRAYER_ANSWERED, PRAYER_APPROVED, PRAYER_RECEIVED, day_key, load_daily_stats, local_day, weekly_totals,
+)
+
+FORTALEZA = ZoneInfo("America/Fortaleza")  # UTC-3, no daylight saving
+
+
+def test_local_day_rolls_over_at_local_midnight():
+    assert local_day(FORTALEZA, datetime(2031, 3, 3, 2, 59)) == date(2031, 3, 2)
+    assert local_day(FORTALEZA, datetime(2031, 3, 3, 3, 0)) == date(2031, 3, 3)
+    assert day_key(FORTALEZA, datetime(2031, 1, 1, 1, 0)) == "2030-12-31"
+
+
+def test_weeks_start_on_monday_across_months_and_years():
+    rows = [
+        {"day": day, APP_OPENS: 100, PRAYER_RECEIVED: received, PRAYER_APPROVED: 0, PRAYER_ANSWERED: 0}
+        for day, received in [("2030-12-29", 1), ("2030-12-30", 2), ("2031-01-01", 4), ("2031-01-05", 8), ("2031-01-06", 16)]
+    ]
+    weeks = weekly_totals(rows)
+    assert [(week["week_start"], week[PRAYER_RECEIVED]) for week in weeks] == [
+        ("2030-12-23", 1),
+        ("2030-12-30", 14),
+        ("2031-01-06", 16),
+    ]
+    # app opens are a daily figure and are not summed per week
+    assert all(APP_OPENS not in week for week in weeks)
+
+
+def test_counts_land_on_the_local_day_and_week():
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    # Sunday 2031-03-02 21:30 and 23:59 in Fortaleza are already Monday in UTC
+    events = [
+        (datetime(2031, 3, 2, 12, 0), PRAYER_RECEIVED),
+        (datetime(2031, 3, 3, 0, 30), PRAYER_RECEIVED),
+        (datetime(2031, 3, 3, 2, 59), PRAYER_APPROVED),
+        (datetime(2031, 3, 3, 3, 0), PRAYER_RECEIVED),
+        (datetime(2031, 3, 9, 10, 0), PRAYER_APPROVED),
+    ]
+
+    async def scenario():
+        collection = mongomock_motor.AsyncMongoMockClient()["test_stats"].daily_stats
+        counters = CounterBuffer(collection, key_field="day", upsert=True)
+        for at, counter in events:
+            counters.incr(day_key(FORTALEZA, at), counter)
+        await counters.flush()
+        # a second flush adds to the same documents
+        counters.incr(day_key(FORTALEZA, datetime(2031, 3, 3, 1, 0)), PRAYER_RECEIVED)
+        await counters.flush()
+        return await load_daily_stats(collection, date(2031, 3, 1), date(2031, 3, 10))
+
+    rows = asyncio.run(scenario())
+    assert [row["day"] for row in rows] == [f"2031-03-{day:02d}" for day in range(1, 11)]
+    by_day = {row["day"]: row for row in rows}
+    assert by_day["2031-03-02"][PRAYER_RECEIVED] == 3
+    assert by_day["2031-03-02"][PRAYER_APPROVED] == 1
+    assert by_day["2031-03-03"][PRAYER_RECEIVED] == 1
+    assert by_day["2031-03-01"] == {"day": "2031-03-01", **{name: 0 for name in rows[0] if name != "day"}}
+
+    weeks = {week["week_start"]: week for week in weekly_totals(rows)}
+    assert list(weeks) == ["2031-02-24", "2031-03-03", "2031-03-10"]
+    assert (weeks["2031-02-24"][PRAYER_RECEIVED], weeks["2031-02-24"][PRAYER_APPROVED]) == (3, 1)
+    assert (weeks["2031-03-03"][PRAYER_RECEIVED], weeks["2031-03-03"][PRAYER_APPROVED]) == (1, 1)
+    assert weeks["2031-03-10"][PRAYER_RECEIVED] == 0
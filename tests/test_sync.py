@@ -0,0 +1,143 @@
+import asyncio
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from sync import SyncSource, decode_token, encode_token, fetch_changes, record_tombstones
+
+NOW = datetime(2031, 3, 2, 12)
+EVENTS = SyncSource("events", {}, {"_id": 0, "id": 1, "title": 1})
+PUBLIC_PRAYERS = SyncSource("prayer_requests", {"is_public": True}, {"_id": 0, "id": 1})
+
+
+def raw_token(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def test_token_round_trip():
+    positions = {"events": (datetime(2031, 3, 2, 11, 59, 58, 250000), "e1"), "tombstones": (NOW, "t1")}
+    token = encode_token(positions)
+    assert decode_token(token) == positions
+    assert "=" not in token
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        "not a token!",
+        raw_token(["events"]),
+        raw_token({"events": ["yesterday", "e1"]}),
+        raw_token({"events": [NOW.isoformat()]}),
+        raw_token({"events": [NOW.isoformat(), {"$ne": None}]}),
+        raw_token({"events": [1700000000, "e1"]}),
+    ],
+)
+def test_bad_token_is_a_400(token):
+    with pytest.raises(HTTPException) as raised:
+        decode_token(token)
+    assert raised.value.status_code == 400
+    assert raised.value.detail == "Invalid sync token"
+
+
+def ids(result, source="events"):
+    return [doc["id"] for doc in result["changes"][source]]
+
+
+def run(scenario):
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+
+    async def main():
+        return await scenario(mongomock_motor.AsyncMongoMockClient()["test_sync"])
+
+    return asyncio.run(main())
+
+
+def test_changes_are_paged_then_resumed_from_the_token():
+    async def scenario(db):
+        # e2 and e3 share a timestamp, so a page boundary falls inside the tie
+        await db.events.insert_many([
+            {"id": "e1", "title": "A", "updated_at": NOW - timedelta(minutes=3)},
+            {"id": "e3", "title": "C", "updated_at": NOW - timedelta(minutes=2)},
+            {"id": "e2", "title": "B", "updated_at": NOW - timedelta(minutes=2)},
+            {"id": "e4", "title": "D", "updated_at": NOW - timedelta(minutes=1)},
+        ])
+        first = await fetch_changes(db, [EVENTS], None, limit=2, now=NOW)
+        second = await fetch_changes(db, [EVENTS], first["token"], limit=2, now=NOW)
+        third = await fetch_changes(db, [EVENTS], second["token"], limit=2, now=NOW)
+        await db.events.update_one({"id": "e1"}, {"$set": {"title": "A2", "updated_at": NOW + timedelta(minutes=1)}})
+        fourth = await fetch_changes(db, [EVENTS], third["token"], limit=2, now=NOW + timedelta(minutes=2))
+        return first, second, third, fourth
+
+    first, second, third, fourth = run(scenario)
+    assert (ids(first), first["has_more"]) == (["e1", "e2"], True)
+    assert (ids(second), second["has_more"]) == (["e3", "e4"], False)
+    assert (ids(third), third["has_more"]) == ([], False)
+    assert third["token"] == second["token"]
+    assert fourth["changes"]["events"] == [{"id": "e1", "title": "A2", "updated_at": NOW + timedelta(minutes=1)}]
+
+
+def test_recent_writes_are_held_back_by_the_lag():
+    async def scenario(db):
+        await db.events.insert_many([
+            {"id": "settled", "title": "A", "updated_at": NOW - timedelta(seconds=5)},
+            {"id": "recent", "title": "B", "updated_at": NOW - timedelta(seconds=1)},
+        ])
+        first = await fetch_changes(db, [EVENTS], None, limit=10, lag=2, now=NOW)
+        # a write stamped before the last sync that only commits now is still picked up
+        await db.events.insert_one({"id": "late", "title": "C", "updated_at": NOW - timedelta(seconds=1, milliseconds=500)})
+        second = await fetch_changes(db, [EVENTS], first["token"], limit=10, lag=2, now=NOW + timedelta(seconds=3))
+        return first, second
+
+    first, second = run(scenario)
+    assert ids(first) == ["settled"]
+    assert ids(second) == ["late", "recent"]
+
+
+def test_source_filter_limits_what_is_synced():
+    async def scenario(db):
+        await db.prayer_requests.insert_many([
+            {"id": "public", "is_public": True, "updated_at": NOW - timedelta(minutes=1)},
+            {"id": "private", "is_public": False, "updated_at": NOW - timedelta(minutes=1)},
+        ])
+        return await fetch_changes(db, [EVENTS, PUBLIC_PRAYERS], None, limit=10, now=NOW)
+
+    result = run(scenario)
+    assert ids(result, "prayer_requests") == ["public"]
+    assert result["changes"]["events"] == []
+
+
+def test_deletions_are_synced_as_tombstones():
+    async def scenario(db):
+        await db.events.insert_one({"id": "e1", "title": "A", "updated_at": NOW - timedelta(minutes=5)})
+        first = await fetch_changes(db, [EVENTS], None, limit=10, now=NOW)
+        await db.events.delete_one({"id": "e1"})
+        await record_tombstones(db, "events", ["e1"], NOW + timedelta(minutes=1))
+        await record_tombstones(db, "reading_plan", ["r366"], NOW + timedelta(minutes=1))
+        second = await fetch_changes(db, [EVENTS], first["token"], limit=10, now=NOW + timedelta(minutes=2))
+        third = await fetch_changes(db, [EVENTS], second["token"], limit=10, now=NOW + timedelta(minutes=2))
+        return first, second, third
+
+    first, second, third = run(scenario)
+    assert first["deleted"] == {}
+    assert second["deleted"] == {"events": ["e1"], "reading_plan": ["r366"]}
+    assert ids(second) == []
+    assert third["deleted"] == {}
+
+
+def test_first_sync_skips_existing_tombstones():
+    async def scenario(db):
+        await record_tombstones(db, "events", ["old-1", "old-2"], NOW - timedelta(days=1))
+        await db.events.insert_one({"id": "e1", "title": "A", "updated_at": NOW - timedelta(minutes=5)})
+        first = await fetch_changes(db, [EVENTS], None, limit=10, now=NOW)
+        await record_tombstones(db, "events", ["e1"], NOW + timedelta(minutes=1))
+        second = await fetch_changes(db, [EVENTS], first["token"], limit=10, now=NOW + timedelta(minutes=2))
+        return first, second
+
+    first, second = run(scenario)
+    assert first["deleted"] == {}
+    assert ids(first) == ["e1"]
+    assert "tombstones" in decode_token(first["token"])
+    assert second["deleted"] == {"events": ["e1"]}